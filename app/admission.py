@@ -0,0 +1,144 @@
+"""Admission control for cold scrapes on the request path.
+
+At most MAX_CONCURRENT_SCRAPES requests fetch and parse at once -- capped
+at what the in-flight memory pool holds, so an admitted request never then
+waits on its budget reservation -- and the rest wait in a FIFO of at most
+MAX_QUEUED_SCRAPES.  Every request carries a deadline (when its client
+gives up), and a request is turned away rather than queued -- or dropped
+from the queue -- once it could no longer start early enough to finish
+before it.  Cache hits never come through here, so they're served ahead
+of any queued cold fetch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app import metrics
+from app.budget import MAX_INFLIGHT_BYTES, REQUEST_MEMORY_BUDGET
+
+MAX_CONCURRENT_SCRAPES = min(
+    int(os.getenv("MAX_CONCURRENT_SCRAPES", "16")),
+    max(1, MAX_INFLIGHT_BYTES // REQUEST_MEMORY_BUDGET),
+)
+MAX_QUEUED_SCRAPES = int(os.getenv("MAX_QUEUED_SCRAPES", "64"))
+# How long clients wait for a response unless they say otherwise
+CLIENT_TIMEOUT_SECONDS = float(os.getenv("CLIENT_TIMEOUT_SECONDS", "30"))
+# Starting guess for how long a cold scrape takes; refined as scrapes finish
+SCRAPE_SECONDS_ESTIMATE = float(os.getenv("SCRAPE_SECONDS_ESTIMATE", "3"))
+
+# Weight of the newest sample in the moving average of scrape time
+_EWMA_WEIGHT = 0.1
+
+
+class Overloaded(Exception):
+    """Raised instead of admitting a request; maps to a 429/503 response."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """A concurrency limit with a bounded, deadline-aware wait queue.
+
+    A finishing request hands its slot straight to the first waiter, so
+    newcomers can't overtake the queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_SCRAPES,
+        max_queued: int = MAX_QUEUED_SCRAPES,
+        estimate: float = SCRAPE_SECONDS_ESTIMATE,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.avg_seconds = estimate
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def expected_wait(self) -> float:
+        """Seconds until a request queued now would get a slot."""
+        if self.active < self.max_concurrent and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrent * self.avg_seconds
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait()))
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        """Hold a scrape slot for the ``async with``.
+
+        *deadline* is the ``time.monotonic()`` by which the client needs
+        its answer.  Raises `Overloaded` if the queue is full (429) or the
+        request couldn't start in time to meet its deadline (503).
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+        else:
+            await self._wait(deadline)
+        metrics.incr("admission.admitted")
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            took = time.monotonic() - started
+            self.avg_seconds += _EWMA_WEIGHT * (took - self.avg_seconds)
+            self._release()
+
+    async def _wait(self, deadline: float) -> None:
+        if len(self._waiters) >= self.max_queued:
+            metrics.incr("admission.rejected.queue_full")
+            raise Overloaded(429, "Too many requests queued; try again shortly", self._retry_after())
+        # The latest moment starting still leaves time to finish
+        latest_start = deadline - self.avg_seconds
+        if time.monotonic() + self.expected_wait() > latest_start:
+            metrics.incr("admission.rejected.deadline")
+            raise Overloaded(503, "Server is busy; try again shortly", self._retry_after())
+
+        metrics.incr("admission.queued")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), max(latest_start - time.monotonic(), 0))
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # Handed a slot just as we gave up on it; pass it on
+                self._release()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.incr("admission.expired")
+                raise Overloaded(503, "Server is busy; try again shortly", self._retry_after()) from None
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)  # the slot moves to the waiter
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "avg_scrape_seconds": round(self.avg_seconds, 3),
+        }
+
+
+admission = AdmissionController()
+metrics.register_collector("admission", admission.snapshot)
@@ -0,0 +1,77 @@
+"""Per-request memory budget and a global in-flight-bytes limit.
+
+Each parse request reserves REQUEST_MEMORY_BUDGET bytes from a shared pool
+of MAX_INFLIGHT_BYTES before fetching.  When the pool is exhausted new
+requests wait (backpressure) instead of all parsing at once and getting the
+worker OOM-killed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from app import metrics
+
+REQUEST_MEMORY_BUDGET = int(os.getenv("REQUEST_MEMORY_BUDGET", str(32 * 1024 * 1024)))
+MAX_INFLIGHT_BYTES = int(os.getenv("MAX_INFLIGHT_BYTES", str(256 * 1024 * 1024)))
+BUDGET_WAIT_SECONDS = float(os.getenv("BUDGET_WAIT_SECONDS", "30"))
+
+# Rough ratio of parsed-DOM memory to raw HTML size for html.parser soups.
+PARSE_OVERHEAD = 8
+
+
+def body_limit(budget: int = REQUEST_MEMORY_BUDGET) -> int:
+    """Largest body a request with *budget* bytes can afford to parse."""
+    return budget // PARSE_OVERHEAD
+
+
+class BudgetTimeout(Exception):
+    """Raised when a reservation can't be satisfied in time."""
+
+
+class ByteBudget:
+    """An asyncio byte pool; ``reserve`` waits until enough bytes are free."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self.waiting = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int, timeout: float = BUDGET_WAIT_SECONDS):
+        """Hold *nbytes* of the pool for the duration of the ``async with``.
+
+        Raises ``BudgetTimeout`` if the bytes don't free up within *timeout*.
+        """
+        nbytes = min(nbytes, self.capacity)
+        async with self._cond:
+            if self.in_use + nbytes > self.capacity:
+                metrics.incr("budget.waited")
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self.in_use + nbytes <= self.capacity),
+                        timeout,
+                    )
+                except asyncio.TimeoutError:
+                    metrics.incr("budget.timeout")
+                    raise BudgetTimeout(f"no memory budget free after {timeout:.0f}s") from None
+                finally:
+                    self.waiting -= 1
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.in_use -= nbytes
+                self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        return {"capacity": self.capacity, "in_use": self.in_use, "waiting": self.waiting}
+
+
+inflight = ByteBudget(MAX_INFLIGHT_BYTES)
+metrics.register_collector("memory_budget", inflight.snapshot)
@@ -0,0 +1,224 @@
+"""Cache of scraped recipes (and of recent failures), keyed by URL.
+
+Each worker keeps an in-process LRU.  When a shared `StateBackend` is
+configured (see `app.state`), entries are also written through to it and a
+local miss -- or a local entry that's gone stale -- is answered from there,
+so one worker's scrape serves them all.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+from app import metrics
+from app.models import ArticleRejection, Recipe
+from app.state import StateBackend, is_shared, state
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+# How long past its TTL an entry may still be served while it's refreshed
+CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "900"))
+# How long a URL that 404'd (or isn't supported) is answered from memory
+NEGATIVE_CACHE_SECONDS = float(os.getenv("NEGATIVE_CACHE_SECONDS", "300"))
+
+# (stored_at, fields, recipe, fingerprint); stored_at is wall-clock so
+# workers agree on it, fingerprint is the page's `app.fingerprint` hash
+_Entry = tuple[float, "frozenset[str] | None", Recipe, "str | None"]
+
+
+def _encode(entry: _Entry) -> bytes:
+    stored_at, fields, recipe, fingerprint = entry
+    return orjson.dumps({
+        "stored_at": stored_at,
+        "fields": sorted(fields) if fields is not None else None,
+        "article": isinstance(recipe, ArticleRejection),
+        "recipe": recipe,
+        "fingerprint": fingerprint,
+    })
+
+
+def _decode(blob: bytes) -> _Entry:
+    doc = orjson.loads(blob)
+    data = doc["recipe"]
+    # Cached recipes never carry per-request structured output
+    data.pop("ingredients_parsed", None)
+    recipe = ArticleRejection(**data) if doc["article"] else Recipe(**data)
+    fields = frozenset(doc["fields"]) if doc["fields"] is not None else None
+    return doc["stored_at"], fields, recipe, doc.get("fingerprint")
+
+
+def _covers(entry: _Entry, fields: frozenset[str] | None) -> bool:
+    """True if *entry* has every field in *fields* (None = all of them)."""
+    return entry[1] is None or (fields is not None and fields <= entry[1])
+
+
+class RecipeCache:
+    """A TTL + LRU cache.  Entries are shared, so callers must not mutate a
+    returned Recipe (use ``dataclasses.replace`` to derive variants).
+
+    Each entry remembers which fields were computed (``None`` = all of them),
+    so a partial result only answers requests for a subset of its fields.
+
+    Entries up to ``stale`` seconds past their TTL are kept so `lookup` can
+    serve them while the caller refreshes in the background.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        stale: float = CACHE_STALE_SECONDS,
+        shared: StateBackend | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale = stale
+        self.shared = shared
+        self._data: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _usable(self, entry: _Entry | None, fields: frozenset[str] | None, now: float) -> bool:
+        """True if *entry* is fresh and covers *fields*."""
+        if entry is None or now - entry[0] > self.ttl:
+            return False
+        return _covers(entry, fields)
+
+    def _install(self, key: str, entry: _Entry) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def _from_shared(self, key: str, local: _Entry | None) -> _Entry | None:
+        """The shared entry for *key* if it's newer than *local* (and keep it)."""
+        blob = self.shared.get(f"recipe:{key}")
+        if blob is None:
+            return local
+        entry = _decode(blob)
+        if local is not None and entry[0] <= local[0]:
+            return local
+        metrics.incr("cache.shared_hit")
+        with self._lock:
+            self._install(key, entry)
+        return entry
+
+    def get(self, key: str, fields: frozenset[str] | None = None) -> Recipe | None:
+        """A fresh entry covering *fields*, or None."""
+        recipe, stale = self.lookup(key, fields)
+        return None if stale else recipe
+
+    def lookup(self, key: str, fields: frozenset[str] | None = None) -> tuple[Recipe | None, bool]:
+        """Return ``(recipe, stale)``; *stale* means past TTL but still servable."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        if self.shared is not None and not self._usable(entry, fields, now):
+            # Another worker may have scraped or refreshed it since
+            entry = self._from_shared(key, entry)
+        if entry is None:
+            metrics.incr("cache.miss")
+            return None, False
+        stored_at, _, recipe, _ = entry
+        age = now - stored_at
+        if age > self.ttl + self.stale:
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            metrics.incr("cache.expired")
+            return None, False
+        if not _covers(entry, fields):
+            metrics.incr("cache.partial_miss")
+            return None, False
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+        stale = age > self.ttl
+        metrics.incr("cache.stale_hit" if stale else "cache.hit")
+        return recipe, stale
+
+    def is_fresh(self, key: str) -> bool:
+        """True if a full, unexpired entry exists (no metrics, no LRU bump)."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        if self.shared is not None and not self._usable(entry, None, now):
+            entry = self._from_shared(key, entry)
+        return self._usable(entry, None, now)
+
+    def match_fingerprint(self, key: str, fingerprint: str, fields: frozenset[str] | None = None) -> Recipe | None:
+        """The stored recipe for *key* if it was scraped from a page with the
+        same *fingerprint* and covers *fields* -- stale or not, since the
+        content is unchanged (no metrics, no LRU bump)."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        if self.shared is not None and (entry is None or entry[3] != fingerprint):
+            entry = self._from_shared(key, entry)
+        if entry is None or entry[3] != fingerprint or now - entry[0] > self.ttl + self.stale:
+            return None
+        return entry[2] if _covers(entry, fields) else None
+
+    def set(
+        self,
+        key: str,
+        recipe: Recipe,
+        fields: frozenset[str] | None = None,
+        fingerprint: str | None = None,
+    ) -> None:
+        now = time.time()
+        entry = (now, fields, recipe, fingerprint)
+        with self._lock:
+            # Never replace a full entry with a partial one
+            if fields is not None and self._usable(self._data.get(key), None, now):
+                return
+            self._install(key, entry)
+        if self.shared is not None:
+            def put(blob: bytes | None) -> tuple[bytes | None, None]:
+                if fields is not None and blob is not None and self._usable(_decode(blob), None, now):
+                    return blob, None
+                return _encode(entry), None
+
+            self.shared.update(f"recipe:{key}", put, ttl=self.ttl + self.stale)
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale": self.stale,
+            "shared": self.shared is not None,
+        }
+
+
+class NegativeCache:
+    """Remembers URLs that failed for good (404, unsupported site) so that
+    repeats are answered without fetching the page again."""
+
+    def __init__(self, backend: StateBackend, ttl: float = NEGATIVE_CACHE_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+
+    def get(self, key: str) -> tuple[int, str] | None:
+        """The cached ``(status_code, detail)`` for *key*, if any."""
+        if self.ttl <= 0:
+            return None
+        blob = self.backend.get(f"neg:{key}")
+        if blob is None:
+            return None
+        metrics.incr("cache.negative_hit")
+        status_code, detail = orjson.loads(blob)
+        return status_code, detail
+
+    def set(self, key: str, status_code: int, detail: str) -> None:
+        if self.ttl > 0:
+            self.backend.set(f"neg:{key}", orjson.dumps([status_code, detail]), ttl=self.ttl)
+
+
+recipe_cache = RecipeCache(shared=state if is_shared(state) else None)
+negative_cache = NegativeCache(state)
+metrics.register_collector("recipe_cache", recipe_cache.snapshot)
@@ -0,0 +1,341 @@
+"""Bulk-crawl supported sites from their sitemaps into a local store.
+
+    python -m app.crawl recipetineats.com gimmesomeoven.com --db crawl.db
+
+Sitemaps (found through robots.txt, else /sitemap_index.xml and
+/sitemap.xml) are parsed as they stream in, nested sitemap indexes and
+``.gz`` files included.  Every page URL goes through the same fetch and
+scrape pipeline as the API.  Sitemap and page fetches alike are spaced
+out per domain by the rate limiter, and each domain is drained by a fixed
+pool of workers.
+
+Progress is checkpointed in the SQLite store: a sitemap is read once, and
+every URL is recorded as pending/done/failed, so re-running the same
+command resumes where a crashed run stopped.  Recipes are stored as
+zlib-compressed JSON.  Per-domain throughput is printed to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import defaultdict
+from typing import Iterator
+from urllib.parse import urlparse
+from xml.etree.ElementTree import XMLPullParser
+
+import orjson
+from fastapi import HTTPException
+
+from app.models import ArticleRejection
+from app.parsers import find_site
+from app.ratelimit import DomainRateLimiter
+from app.urls import canonicalize, non_recipe_reason
+
+_CHUNK_SIZE = 64 * 1024
+# Child sitemaps that never list recipes (WordPress/Yoast naming)
+_SKIP_SITEMAP_RE = re.compile(r"(category|tag|author|page-sitemap|attachment|web-stor|product)", re.I)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class CrawlStore:
+    """SQLite file holding crawl progress and the scraped recipes."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sitemaps (url TEXT PRIMARY KEY, done INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY, domain TEXT NOT NULL, status TEXT NOT NULL,
+                error TEXT, updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS urls_status ON urls (domain, status);
+            CREATE TABLE IF NOT EXISTS recipes (url TEXT PRIMARY KEY, domain TEXT NOT NULL,
+                fetched_at REAL NOT NULL, doc BLOB NOT NULL);
+            """
+        )
+
+    def sitemap_done(self, url: str) -> bool:
+        row = self._conn.execute("SELECT done FROM sitemaps WHERE url = ?", (url,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_sitemap_done(self, url: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO sitemaps (url, done) VALUES (?, 1)", (url,))
+
+    def add_urls(self, domain: str, urls: list[str]) -> None:
+        now = time.time()
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO urls (url, domain, status, updated_at) VALUES (?, ?, ?, ?)",
+            [(u, domain, PENDING, now) for u in urls],
+        )
+        self._conn.execute("COMMIT")
+
+    def pending(self, domain: str, limit: int | None = None) -> list[str]:
+        return list(self.iter_pending(domain, limit))
+
+    def iter_pending(self, domain: str, limit: int | None = None, page: int = 500) -> Iterator[str]:
+        """Pending URLs in queue order, read *page* rows at a time."""
+        after = 0
+        left = limit if limit is not None else -1
+        while left:
+            rows = self._conn.execute(
+                "SELECT rowid, url FROM urls WHERE domain = ? AND status = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (domain, PENDING, after, page if left < 0 else min(page, left)),
+            ).fetchall()
+            if not rows:
+                return
+            for after, url in rows:
+                yield url
+            if left > 0:
+                left -= len(rows)
+
+    def record(self, url: str, domain: str, recipe=None, error: str | None = None) -> None:
+        now = time.time()
+        self._conn.execute("BEGIN")
+        if recipe is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recipes (url, domain, fetched_at, doc) VALUES (?, ?, ?, ?)",
+                (url, domain, now, zlib.compress(orjson.dumps(recipe))),
+            )
+        self._conn.execute(
+            "UPDATE urls SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+            (FAILED if error else DONE, error, now, url),
+        )
+        self._conn.execute("COMMIT")
+
+    def counts(self, domain: str) -> dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT status, COUNT(*) FROM urls WHERE domain = ? GROUP BY status", (domain,)
+        ).fetchall()
+        return dict(rows)
+
+
+def _stream(url: str) -> Iterator[bytes]:
+    """Yield the (gunzipped) body of *url* in chunks, browser-impersonated."""
+    from curl_cffi import requests as cf_requests
+
+    resp = cf_requests.get(url, impersonate="chrome", timeout=30, stream=True)
+    try:
+        if resp.status_code != 200:
+            raise ConnectionError(f"{url} returned status {resp.status_code}")
+        gz = zlib.decompressobj(16 + zlib.MAX_WBITS) if urlparse(url).path.endswith(".gz") else None
+        for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+            yield gz.decompress(chunk) if gz else chunk
+    finally:
+        resp.close()
+
+
+def parse_sitemap(chunks) -> Iterator[tuple[str, str]]:
+    """Yield ``("sitemap", loc)`` / ``("url", loc)`` from streamed sitemap
+    XML, clearing each element once read so memory stays flat."""
+    parser = XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            tag = el.tag.rpartition("}")[2]
+            if tag in ("sitemap", "url"):
+                loc = next((c.text for c in el if c.tag.rpartition("}")[2] == "loc" and c.text), None)
+                if loc:
+                    yield tag, loc.strip()
+                el.clear()
+    parser.close()
+
+
+def _wait_turn(limiter: DomainRateLimiter | None, domain: str) -> None:
+    """Block until *domain*'s next rate-limiter slot (discovery is sync)."""
+    if limiter is not None and (wait := limiter.reserve(domain)) > 0:
+        time.sleep(wait)
+
+
+def _robots_sitemaps(domain: str, limiter: DomainRateLimiter | None = None) -> list[str]:
+    _wait_turn(limiter, domain)
+    try:
+        body = b"".join(_stream(f"https://{domain}/robots.txt")).decode("utf-8", "replace")
+    except Exception:
+        return []
+    return [line.split(":", 1)[1].strip() for line in body.splitlines() if line.lower().startswith("sitemap:")]
+
+
+def discover(
+    domain: str,
+    store: CrawlStore,
+    match: re.Pattern | None = None,
+    limiter: DomainRateLimiter | None = None,
+) -> int:
+    """Walk *domain*'s sitemaps, queueing recipe-looking URLs; returns how
+    many were listed.  URL sitemaps read in an earlier run are skipped, and
+    with a *limiter* every sitemap fetch waits for *domain*'s next slot."""
+    site = find_site(domain)
+    roots = _robots_sitemaps(domain, limiter) or [f"https://{domain}/sitemap_index.xml", f"https://{domain}/sitemap.xml"]
+    todo = list(roots)
+    seen: set[str] = set()
+    found = 0
+    while todo:
+        sm = todo.pop()
+        if sm in seen or store.sitemap_done(sm):
+            continue
+        seen.add(sm)
+        batch: list[str] = []
+        is_index = False
+        _wait_turn(limiter, domain)
+        try:
+            for kind, loc in parse_sitemap(_stream(sm)):
+                if kind == "sitemap":
+                    is_index = True
+                    if not _SKIP_SITEMAP_RE.search(loc):
+                        todo.append(loc)
+                    continue
+                if urlparse(loc).netloc.lower().removeprefix("www.") != domain.removeprefix("www."):
+                    continue
+                loc = canonicalize(loc)
+                # Listing / archive pages, or paths the site never uses for recipes
+                if non_recipe_reason(loc, site) or (match and not match.search(loc)):
+                    continue
+                batch.append(loc)
+                if len(batch) >= 500:
+                    store.add_urls(domain, batch)
+                    found += len(batch)
+                    batch = []
+        except Exception as e:
+            print(f"[{domain}] sitemap {sm} failed: {e}", file=sys.stderr)
+            continue
+        store.add_urls(domain, batch)
+        found += len(batch)
+        # Indexes are cheap to re-read, and marking one done before its
+        # children would lose them if the run dies in between
+        if not is_index:
+            store.mark_sitemap_done(sm)
+    return found
+
+
+class Throughput:
+    """Per-domain done/skipped/failed counts and pages per minute."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.done: dict[str, int] = defaultdict(int)
+        # Articles and reviews: fetched fine, but not recipes
+        self.skipped: dict[str, int] = defaultdict(int)
+        self.failed: dict[str, int] = defaultdict(int)
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        lines = []
+        for domain in sorted(set(self.done) | set(self.skipped) | set(self.failed)):
+            total = self.done[domain] + self.skipped[domain] + self.failed[domain]
+            lines.append(
+                f"{domain}: {self.done[domain]} ok, {self.skipped[domain]} articles skipped, "
+                f"{self.failed[domain]} failed, "
+                f"{total / elapsed * 60:.1f} pages/min"
+            )
+        return "\n".join(lines)
+
+
+async def crawl_domain(
+    domain: str,
+    store: CrawlStore,
+    limiter: DomainRateLimiter,
+    stats: Throughput,
+    concurrency: int,
+    limit: int | None,
+) -> None:
+    """Scrape *domain*'s pending URLs with *concurrency* workers.
+
+    URLs are paged out of the store into a short queue, so memory and task
+    count stay flat however large the backlog is.
+    """
+    from app.main import scrape_url
+
+    queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def feed() -> None:
+        for url in store.iter_pending(domain, limit):
+            await queue.put(url)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker() -> None:
+        while (url := await queue.get()) is not None:
+            await limiter.acquire(domain)
+            try:
+                recipe = await asyncio.to_thread(scrape_url, url)
+            except HTTPException as e:
+                store.record(url, domain, error=f"{e.status_code}: {e.detail}")
+                stats.failed[domain] += 1
+                continue
+            except Exception as e:
+                store.record(url, domain, error=f"{type(e).__name__}: {e}")
+                stats.failed[domain] += 1
+                continue
+            if isinstance(recipe, ArticleRejection):
+                # Not stored as a recipe; marked failed so it isn't retried
+                store.record(url, domain, error="article")
+                stats.skipped[domain] += 1
+                continue
+            store.record(url, domain, recipe=recipe)
+            stats.done[domain] += 1
+
+    await asyncio.gather(feed(), *(worker() for _ in range(concurrency)))
+
+
+async def _report_every(stats: Throughput, seconds: float) -> None:
+    while True:
+        await asyncio.sleep(seconds)
+        print(stats.report(), file=sys.stderr)
+
+
+async def run(args: argparse.Namespace) -> Throughput:
+    store = CrawlStore(args.db)
+    limiter = DomainRateLimiter(min_interval=args.interval)
+    stats = Throughput()
+    match = re.compile(args.match) if args.match else None
+    domains = []
+    for d in args.domains:
+        domain = urlparse(d if "//" in d else f"https://{d}").netloc.lower()
+        if find_site(domain) is None:
+            print(f"Skipping unsupported domain {domain}", file=sys.stderr)
+            continue
+        domains.append(domain)
+        if not args.no_discover:
+            found = discover(domain, store, match, limiter)
+            print(f"[{domain}] {found} URLs listed in new sitemaps; queue: {store.counts(domain)}", file=sys.stderr)
+
+    reporter = asyncio.create_task(_report_every(stats, args.report_every))
+    try:
+        # Domains run side by side; politeness is enforced per domain
+        await asyncio.gather(
+            *(crawl_domain(d, store, limiter, stats, args.concurrency, args.limit) for d in domains)
+        )
+    finally:
+        reporter.cancel()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.crawl", description=__doc__.split("\n\n")[0])
+    ap.add_argument("domains", nargs="+", help="supported site domains (or URLs) to crawl")
+    ap.add_argument("--db", default="crawl.db", help="SQLite store and checkpoint file")
+    ap.add_argument("--concurrency", type=int, default=2, help="in-flight pages per domain")
+    ap.add_argument("--interval", type=float, default=2.0, help="minimum seconds between requests to a domain")
+    ap.add_argument("--limit", type=int, help="at most this many pending URLs per domain this run")
+    ap.add_argument("--match", help="only queue URLs matching this regex")
+    ap.add_argument("--no-discover", action="store_true", help="skip sitemaps; just drain pending URLs")
+    ap.add_argument("--report-every", type=float, default=30.0, help="seconds between throughput reports")
+    args = ap.parse_args(argv)
+    stats = asyncio.run(run(args))
+    print(stats.report() or "Nothing crawled", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
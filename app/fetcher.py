@@ -2,76 +2,409 @@
 
 from __future__ import annotations
 
+import codecs
 import os
 import random
-from urllib.parse import quote
+import re
+import threading
+import time
+from urllib.parse import quote, urlparse
 
-from curl_cffi import requests as cf_requests
-import requests
+import orjson
+
+from app import metrics
+from app.sniff import ACCEPTABLE, UNKNOWN, classify_page
+from app.state import StateBackend, state
 
 ALLRECIPES_PROXY = os.getenv("ALLRECIPES_PROXY")
 
 # Browser identities for curl_cffi to impersonate (TLS fingerprint + headers)
 _IMPERSONATE_TARGETS = ["chrome", "chrome110", "edge99"]
 
+# Circuit breaker tuning: consecutive failures before a (domain, strategy)
+# pair is skipped, and how long it stays open before a half-open probe.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+
+# Bodies larger than this are truncated while streaming; ld+json blocks past
+# the cut are still kept.  Reading stops entirely after MAX_SCAN_FACTOR times
+# the limit so a runaway page can't hold a worker.
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+MAX_SCAN_FACTOR = 4
+_CHUNK_SIZE = 64 * 1024
+
+
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([a-zA-Z0-9_-]+)""", re.I)
+_LDJSON_OPEN_RE = re.compile(rb"<script[^>]*application/ld\+json[^>]*>", re.I)
+_SCRIPT_OPEN_RE = re.compile(rb"<script", re.I)
+_SCRIPT_CLOSE = b"</script>"
+
+
+def _split_unclosed_script(head: bytes) -> int:
+    """Return the offset of a <script> (or any tag) left open at the end of
+    *head*, so a truncated ld+json block is moved past the cut whole, or
+    ``len(head)``."""
+    opens = list(_SCRIPT_OPEN_RE.finditer(head))
+    if opens and head.find(_SCRIPT_CLOSE, opens[-1].end()) == -1:
+        return opens[-1].start()
+    # A tag cut mid-name ("<scr") wouldn't be recognised on either side
+    lt = head.rfind(b"<")
+    if lt != -1 and head.find(b">", lt) == -1:
+        return lt
+    return len(head)
+
+
+def read_body(chunks, limit: int) -> tuple[bytes, bool]:
+    """Read an iterable of byte chunks into at most about *limit* bytes.
+
+    Returns ``(body, truncated)``.  When the stream is longer than *limit*,
+    the first *limit* bytes are kept (minus any script the cut would split)
+    and the rest of the stream is only scanned for ld+json blocks, which are
+    appended so structured data survives the truncation.
+    """
+    buf = bytearray()
+    it = iter(chunks)
+    for chunk in it:
+        buf += chunk
+        if len(buf) > limit:
+            break
+    else:
+        return bytes(buf), False
+
+    cut = _split_unclosed_script(bytes(buf[:limit]))
+    head = bytes(buf[:cut])
+    pending = bytearray(buf[cut:])
+    scanned = len(buf)
+    del buf
+    blocks: list[bytes] = []
+    kept = 0
+    # Blocks found after the cut may use up to another half of the limit
+    block_budget = limit // 2
+
+    while True:
+        while True:
+            m = _LDJSON_OPEN_RE.search(pending)
+            if not m:
+                # Keep a short tail in case an opening tag straddles chunks
+                del pending[:-256]
+                break
+            end = pending.find(_SCRIPT_CLOSE, m.end())
+            if end == -1:
+                del pending[:m.start()]
+                if len(pending) > block_budget:
+                    pending.clear()
+                break
+            block = bytes(pending[m.start():end + len(_SCRIPT_CLOSE)])
+            if kept + len(block) <= block_budget:
+                blocks.append(block)
+                kept += len(block)
+            del pending[:end + len(_SCRIPT_CLOSE)]
+        if scanned >= limit * MAX_SCAN_FACTOR:
+            break
+        chunk = next(it, None)
+        if chunk is None:
+            break
+        pending += chunk
+        scanned += len(chunk)
+
+    return head + b"\n" + b"\n".join(blocks), True
+
+
+def _read_page(resp, url: str, strategy: str, max_bytes: int) -> Page:
+    """Stream *resp* into a Page, truncating bodies over *max_bytes*."""
+    try:
+        content, truncated = read_body(resp.iter_content(chunk_size=_CHUNK_SIZE), max_bytes)
+    finally:
+        resp.close()
+    if truncated:
+        metrics.incr("fetch.truncated")
+    page = Page(url, resp.status_code, content, resp.headers, strategy)
+    page.truncated = truncated
+    return page
+
+
+class Page:
+    """A fetched response: the raw body bytes plus a lazily decoded text.
+
+    The encoding is resolved once (Content-Type header, then <meta charset>,
+    then UTF-8) and the body is decoded at most once, however many callers
+    ask for ``text``.
+    """
+
+    __slots__ = (
+        "url", "status_code", "content", "headers", "strategy", "kind", "truncated",
+        "_encoding", "_text",
+    )
+
+    def __init__(self, url: str, status_code: int, content: bytes, headers=None, strategy: str = ""):
+        self.url = url
+        self.status_code = status_code
+        self.content = content or b""
+        self.headers = dict(headers or {})
+        self.strategy = strategy
+        self.kind: str | None = None
+        self.truncated = False
+        self._encoding: str | None = None
+        self._text: str | None = None
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            self._encoding = self._resolve_encoding()
+        return self._encoding
+
+    def _resolve_encoding(self) -> str:
+        ctype = next((v for k, v in self.headers.items() if k.lower() == "content-type"), "")
+        candidates = []
+        if "charset=" in ctype.lower():
+            candidates.append(ctype.lower().split("charset=", 1)[1].split(";")[0].strip(" \"'"))
+        m = _CHARSET_RE.search(self.content[:4096])
+        if m:
+            candidates.append(m.group(1).decode("ascii"))
+        for enc in candidates:
+            try:
+                return codecs.lookup(enc).name
+            except LookupError:
+                continue
+        return "utf-8"
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.content.decode(self.encoding, errors="replace")
+        return self._text
+
+    def snippet(self, length: int) -> str:
+        """First *length* characters of the body without decoding all of it."""
+        if self._text is not None:
+            return self._text[:length]
+        return self.content[:length * 4].decode(self.encoding, errors="replace")[:length]
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one (domain, strategy) pair.
+
+    closed    -> every call is allowed; failures are counted.
+    open      -> calls are skipped until ``reset_seconds`` have elapsed.
+    half_open -> a single probe call is allowed; its outcome closes or
+                 re-opens the breaker.  A probe that hasn't reported back
+                 within ``reset_seconds`` (its worker died or hung) is
+                 abandoned, and the next caller probes instead.
+
+    The state lives in the shared state backend, so with a shared backend
+    every worker skips a failing strategy, not just the one that saw it fail.
+    A breaker with no recorded failures has no stored state at all.
+    """
+
+    def __init__(self, key: str, threshold: int, reset_seconds: float, backend: StateBackend = state):
+        self.key = key
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.backend = backend
+
+    @staticmethod
+    def _load(blob: bytes | None) -> dict:
+        if blob is None:
+            return {"state": "closed", "failures": 0, "opened_at": 0.0, "last_error": None}
+        return orjson.loads(blob)
 
-def _has_recipe_data(text: str) -> bool:
-    """Quick check that a response actually contains recipe structured data,
-    not a Cloudflare challenge page masquerading as a 200."""
-    return "recipeIngredient" in text or "recipeInstructions" in text or "<h1" in text
+    def allow(self) -> bool:
+        """Return True if the strategy may be attempted right now."""
+        blob = self.backend.get(self.key)
+        if blob is None or self._load(blob)["state"] == "closed":
+            return True
 
+        def step(blob):
+            st = self._load(blob)
+            if st["state"] == "closed":
+                return blob, True
+            now = time.time()
+            if st["state"] == "open":
+                due = now - st["opened_at"] >= self.reset_seconds
+            else:
+                due = now - st.get("probe_started_at", 0.0) >= self.reset_seconds
+            if due:
+                # Let exactly one probe through; concurrent callers keep skipping
+                st["state"] = "half_open"
+                st["probe_started_at"] = now
+                return orjson.dumps(st), True
+            return blob, False
 
-def fetch_page(url: str) -> requests.Response:
+        return self.backend.update(self.key, step, ttl=_BREAKER_STATE_TTL)
+
+    def record_success(self) -> None:
+        if self.backend.get(self.key) is None:
+            return
+        # Closed with no failures is the same as no state
+        self.backend.delete(self.key)
+
+    def record_failure(self, reason: str) -> None:
+        def step(blob):
+            st = self._load(blob)
+            st["failures"] += 1
+            st["last_error"] = reason
+            if st["state"] == "half_open" or st["failures"] >= self.threshold:
+                st["state"] = "open"
+                st["opened_at"] = time.time()
+            return orjson.dumps(st), None
+
+        self.backend.update(self.key, step, ttl=_BREAKER_STATE_TTL)
+
+    def snapshot(self, blob: bytes | None = None) -> dict:
+        st = self._load(blob if blob is not None else self.backend.get(self.key))
+        retry_in = None
+        if st["state"] == "open":
+            retry_in = max(0.0, self.reset_seconds - (time.time() - st["opened_at"]))
+        return {
+            "state": st["state"],
+            "failures": st["failures"],
+            "last_error": st["last_error"],
+            "retry_in": round(retry_in, 1) if retry_in is not None else None,
+        }
+
+
+# Forget a (domain, strategy) that hasn't failed for a day
+_BREAKER_STATE_TTL = 86400.0
+_BREAKER_PREFIX = "breaker:"
+
+_breakers: dict[tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker(domain: str, strategy: str) -> CircuitBreaker:
+    key = (domain, strategy)
+    with _breakers_lock:
+        br = _breakers.get(key)
+        if br is None:
+            br = _breakers[key] = CircuitBreaker(
+                f"{_BREAKER_PREFIX}{domain}|{strategy}", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+            )
+        return br
+
+
+def breaker_states() -> list[dict]:
+    """Return the state of every breaker with recorded failures, for metrics
+    and debugging (across all workers when the state backend is shared)."""
+    out = []
+    for key, blob in state.scan(_BREAKER_PREFIX):
+        domain, _, strategy = key[len(_BREAKER_PREFIX):].partition("|")
+        out.append({"domain": domain, "strategy": strategy, **_breaker(domain, strategy).snapshot(blob)})
+    return out
+
+
+metrics.register_collector("breakers", breaker_states)
+
+
+def _record_status(breaker: CircuitBreaker, status_code: int) -> None:
+    """Blocked/rate-limited/5xx responses count against the strategy; other
+    statuses (e.g. a genuine 404) mean the strategy itself is working."""
+    if status_code in (403, 407, 429) or status_code >= 500:
+        breaker.record_failure(f"status {status_code}")
+    else:
+        breaker.record_success()
+
+
+def _accept(breaker: CircuitBreaker, page: Page) -> bool:
+    """Return True if *page* should end the cascade, updating *breaker*.
+
+    A 200 only counts when the page classifier says it is a real page (not a
+    challenge or consent wall), so bogus 200s fall through to the next strategy.
+    An unrecognised page is accepted without touching the breaker: it
+    proves nothing either way about the strategy.
+    """
+    if page.status_code != 200:
+        _record_status(breaker, page.status_code)
+        return False
+    page.kind = classify_page(page.content)
+    metrics.incr(f"fetch.page.{page.kind}")
+    if page.kind not in ACCEPTABLE:
+        breaker.record_failure(f"{page.kind} page")
+        return False
+    if page.kind != UNKNOWN:
+        breaker.record_success()
+    return True
+
+
+def fetch_page(url: str, max_bytes: int | None = None) -> Page:
     """Fetch *url*, bypassing Cloudflare with TLS fingerprint impersonation.
 
     Strategy:
     1. curl_cffi with Chrome impersonation (best Cloudflare bypass).
-    2. If that returns a challenge page, try a different impersonation target.
+    2. If that returns a challenge/consent page (see ``app.sniff``), try a
+       different impersonation target.
     3. If ALLRECIPES_PROXY is set, try through the proxy.
     4. Last resort: public CORS proxy.
+
+    Each (domain, strategy) pair sits behind a circuit breaker so a proxy
+    that keeps timing out is skipped instantly instead of costing 25 s.
+
+    Bodies are streamed and capped at *max_bytes* (default MAX_BODY_BYTES).
     """
+    max_bytes = max_bytes or MAX_BODY_BYTES
+    domain = urlparse(url).netloc.lower()
+
+    # The HTTP clients are heavy imports; load them on the first fetch
+    # rather than at startup (both are cached in sys.modules afterwards).
+    from curl_cffi import requests as cf_requests
+    import requests
+
     # --- Primary: curl_cffi with browser impersonation ---
-    last_resp = None
+    last_page = None
     for target in _IMPERSONATE_TARGETS:
+        breaker = _breaker(domain, f"impersonate:{target}")
+        if not breaker.allow():
+            metrics.incr(f"fetch.skipped.impersonate:{target}")
+            continue
         try:
-            resp = cf_requests.get(url, impersonate=target, timeout=25)
-            # curl_cffi returns its own Response; convert key fields so callers
-            # can treat it like a requests.Response
-            if resp.status_code == 200 and _has_recipe_data(resp.text):
-                return resp
-            last_resp = resp
-        except Exception:
+            resp = cf_requests.get(url, impersonate=target, timeout=25, stream=True)
+            page = _read_page(resp, url, f"impersonate:{target}", max_bytes)
+            if _accept(breaker, page):
+                return page
+            last_page = page
+        except Exception as e:
+            breaker.record_failure(type(e).__name__)
             continue
 
     # --- Fallback: private proxy ---
     if ALLRECIPES_PROXY:
-        try:
-            resp = requests.get(
-                url,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-                    "Accept-Language": "en-US,en;q=0.9",
-                },
-                proxies={"http": ALLRECIPES_PROXY, "https": ALLRECIPES_PROXY},
-                timeout=25,
-            )
-            if resp.status_code == 200:
-                return resp
-            last_resp = last_resp or resp
-        except Exception:
-            pass
+        breaker = _breaker(domain, "proxy")
+        if not breaker.allow():
+            metrics.incr("fetch.skipped.proxy")
+        else:
+            try:
+                resp = requests.get(
+                    url,
+                    headers={
+                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+                        "Accept-Language": "en-US,en;q=0.9",
+                    },
+                    proxies={"http": ALLRECIPES_PROXY, "https": ALLRECIPES_PROXY},
+                    timeout=25,
+                    stream=True,
+                )
+                page = _read_page(resp, url, "proxy", max_bytes)
+                if _accept(breaker, page):
+                    return page
+                last_page = last_page or page
+            except Exception as e:
+                breaker.record_failure(type(e).__name__)
 
     # --- Last resort: public CORS proxy ---
-    try:
-        proxy_url = f"https://api.allorigins.win/raw?url={quote(url)}"
-        resp = requests.get(proxy_url, timeout=25)
-        if resp.status_code == 200:
-            return resp
-        last_resp = last_resp or resp
-    except Exception:
-        pass
-
-    if last_resp is not None:
-        return last_resp
+    breaker = _breaker(domain, "allorigins")
+    if not breaker.allow():
+        metrics.incr("fetch.skipped.allorigins")
+    else:
+        try:
+            proxy_url = f"https://api.allorigins.win/raw?url={quote(url)}"
+            resp = requests.get(proxy_url, timeout=25, stream=True)
+            page = _read_page(resp, url, "allorigins", max_bytes)
+            if _accept(breaker, page):
+                return page
+            last_page = last_page or page
+        except Exception as e:
+            breaker.record_failure(type(e).__name__)
+
+    if last_page is not None:
+        return last_page
     raise ConnectionError(f"All fetch methods failed for {url}")
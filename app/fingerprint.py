@@ -0,0 +1,51 @@
+"""Content fingerprints for skipping the parse of unchanged pages.
+
+Re-fetched pages usually differ only in ad slots, nonces and cache-busting
+query strings.  `fingerprint` hashes just the parts the scrapers read --
+every ld+json block plus a window around the main recipe container --
+after stripping that noise, straight from the raw bytes (no DOM).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+# Bytes of markup kept from the start of the main recipe container
+CONTAINER_WINDOW = 32 * 1024
+
+_LDJSON_RE = re.compile(rb"<script[^>]*application/ld\+json[^>]*>(.*?)</script>", re.I | re.S)
+_CONTAINER_RE = re.compile(
+    rb"""class=["'][^"']*(?:wprm-recipe-container|tasty-recipes|mntl-structured-ingredients"""
+    rb"""|recipe-card|recipe-ingredients|ingredients-section)"""
+    rb"""|itemtype=["']https?://schema\.org/Recipe""",
+    re.I,
+)
+# Things that change between two fetches of the same recipe
+_VOLATILE_RE = re.compile(
+    rb"<script\b(?![^>]*ld\+json).*?</script>"  # inline JS: ad config, tracking
+    rb"|<!--.*?-->"
+    rb"|<ins\b.*?</ins>"  # ad slots
+    rb"""|\s(?:nonce|data-nonce|data-[\w-]*(?:token|timestamp))=["'][^"']*["']"""
+    rb"|[?&](?:ver|v|_|nonce|t)=[\w.-]+"  # cache busters on asset URLs
+    rb"""|"(?:nonce|_wpnonce|csrf\w*)"\s*:\s*"[^"]*\"""",
+    re.I | re.S,
+)
+_SPACE_RE = re.compile(rb"\s+")
+
+
+def fingerprint(body: bytes) -> str | None:
+    """A short hash of the recipe-bearing parts of *body*, or None when the
+    page has neither ld+json nor a recognisable recipe container (in which
+    case there's nothing stable enough to compare)."""
+    parts = [m.group(1) for m in _LDJSON_RE.finditer(body)]
+    container = _CONTAINER_RE.search(body)
+    if container:
+        parts.append(body[container.start():container.start() + CONTAINER_WINDOW])
+    if not parts:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(_SPACE_RE.sub(b" ", _VOLATILE_RE.sub(b"", part)).strip())
+        h.update(b"\0")
+    return h.hexdigest()
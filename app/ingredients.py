@@ -0,0 +1,213 @@
+"""Structured ingredient parsing: quantity, unit, item and notes.
+
+A small table-driven tokenizer over ingredient lines that have already been
+through `clean` / `clean_ingredient_decimals` (so "1½" is "1 1/2" and
+"0.333333" is "1/3", not 0.33).  Results are memoised because the same lines ("1 tsp
+salt", "2 large eggs") turn up in recipe after recipe.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import lru_cache
+
+from app.utils import clean, clean_ingredient_decimals
+
+# Vulgar fractions that `clean` leaves alone (it already maps ½ ¼ ¾ ⅓ ⅔)
+_EXTRA_FRACTIONS = str.maketrans({
+    "\u215b": " 1/8",   # ⅛
+    "\u215c": " 3/8",   # ⅜
+    "\u215d": " 5/8",   # ⅝
+    "\u215e": " 7/8",   # ⅞
+    "\u2155": " 1/5",   # ⅕
+    "\u2159": " 1/6",   # ⅙
+    "\u2044": "/",      # ⁄ (fraction slash)
+})
+
+# Canonical unit -> spellings seen in the wild (matched case-insensitively,
+# except the single-letter T/t handled in `_UNIT_CASE_SENSITIVE`).
+_UNITS = {
+    "cup": ("cups", "cup", "c"),
+    "tbsp": ("tablespoons", "tablespoon", "tbsps", "tbsp", "tbs", "tbl"),
+    "tsp": ("teaspoons", "teaspoon", "tsps", "tsp"),
+    "fl oz": ("fluid ounces", "fluid ounce", "fl oz", "fl. oz"),
+    "oz": ("ounces", "ounce", "oz"),
+    "lb": ("pounds", "pound", "lbs", "lb"),
+    "g": ("grams", "gram", "gr", "g"),
+    "kg": ("kilograms", "kilogram", "kgs", "kg"),
+    "mg": ("milligrams", "milligram", "mg"),
+    "ml": ("milliliters", "milliliter", "millilitres", "millilitre", "mls", "ml"),
+    "l": ("liters", "liter", "litres", "litre", "l"),
+    "quart": ("quarts", "quart", "qts", "qt"),
+    "pint": ("pints", "pint", "pts", "pt"),
+    "gallon": ("gallons", "gallon", "gal"),
+    "pinch": ("pinches", "pinch"),
+    "dash": ("dashes", "dash"),
+    "clove": ("cloves", "clove"),
+    "can": ("cans", "can"),
+    "jar": ("jars", "jar"),
+    "package": ("packages", "package", "packets", "packet", "pkgs", "pkg"),
+    "stick": ("sticks", "stick"),
+    "slice": ("slices", "slice"),
+    "piece": ("pieces", "piece"),
+    "bunch": ("bunches", "bunch"),
+    "sprig": ("sprigs", "sprig"),
+    "head": ("heads", "head"),
+    "handful": ("handfuls", "handful"),
+    "inch": ("inches", "inch"),
+}
+_UNIT_CASE_SENSITIVE = {"T": "tbsp", "t": "tsp"}
+
+_UNIT_LOOKUP = {alias: unit for unit, aliases in _UNITS.items() for alias in aliases}
+_UNIT_RE = re.compile(
+    r"(?:"
+    + "|".join(re.escape(a) for a in sorted(_UNIT_LOOKUP, key=len, reverse=True))
+    + r")\.?(?![a-z])",
+    re.I,
+)
+
+_NUM = r"\d+[\s-]+\d+/\d+|\d+/\d+|\d*\.\d+|\d+"
+_QTY_RE = re.compile(
+    rf"^(?P<q1>{_NUM})(?:\s*(?:-|to|or)\s*(?P<q2>{_NUM}))?\s*"
+)
+# "500g flour" -> "500 g flour"
+_GLUED_UNIT_RE = re.compile(r"^(\d+(?:\.\d+)?)(g|kg|mg|ml|l|oz|lbs?)\b", re.I)
+_PAREN_RE = re.compile(r"\s*\(([^)]*)\)")
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedIngredient:
+    """One ingredient line split into its parts.
+
+    ``quantity`` is the (lower bound of the) amount; ``quantity_max`` is set
+    for ranges such as "2-3 cloves".  Both are ``None`` when no amount leads
+    the line ("salt to taste").
+    """
+
+    raw: str
+    quantity: float | None
+    quantity_max: float | None
+    unit: str | None
+    item: str
+    notes: str | None
+
+
+def _to_fraction(token: str) -> Fraction:
+    token = token.strip()
+    parts = re.split(r"[\s-]+", token)
+    if len(parts) == 2:
+        return Fraction(parts[0]) + Fraction(parts[1])
+    return Fraction(token)
+
+
+def _as_float(value: Fraction) -> float:
+    return round(float(value), 4)
+
+
+@lru_cache(maxsize=8192)
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Parse a single ingredient line (memoised)."""
+    raw = clean_ingredient_decimals(clean(line))
+    text = clean(raw.translate(_EXTRA_FRACTIONS))
+
+    notes: list[str] = [n.strip() for n in _PAREN_RE.findall(text) if n.strip()]
+    text = _PAREN_RE.sub("", text).strip()
+    text = _GLUED_UNIT_RE.sub(r"\1 \2", text)
+
+    quantity = quantity_max = None
+    m = _QTY_RE.match(text)
+    if m:
+        try:
+            quantity = _as_float(_to_fraction(m.group("q1")))
+            if m.group("q2"):
+                quantity_max = _as_float(_to_fraction(m.group("q2")))
+            text = text[m.end():]
+        except (ValueError, ZeroDivisionError):
+            quantity = quantity_max = None
+
+    unit = None
+    first = text.split(" ", 1)[0]
+    if first in _UNIT_CASE_SENSITIVE and quantity is not None:
+        unit = _UNIT_CASE_SENSITIVE[first]
+        text = text[len(first):]
+    else:
+        um = _UNIT_RE.match(text)
+        if um:
+            unit = _UNIT_LOOKUP[um.group(0).rstrip(".").lower()]
+            text = text[um.end():].lstrip()
+            if text.lower().startswith("of "):
+                text = text[3:]
+
+    item, _, trailing = text.strip(" ,").partition(",")
+    if trailing.strip():
+        notes.append(trailing.strip())
+
+    return ParsedIngredient(
+        raw=raw,
+        quantity=quantity,
+        quantity_max=quantity_max,
+        unit=unit,
+        item=item.strip(),
+        notes=", ".join(notes) or None,
+    )
+
+
+def parse_ingredients(lines: list[str]) -> list[ParsedIngredient]:
+    return [parse_ingredient(line) for line in lines]
+
+
+# --- scaling ---
+
+# Denominators that read naturally in a recipe, tried in order
+_NICE_DENOMINATORS = (2, 3, 4, 8)
+
+
+def format_quantity(value: float) -> str:
+    """Render *value* as "1 1/2", "2/3", "3" or, failing that, "1.35"."""
+    whole = int(value)
+    frac = value - whole
+    if frac < 0.01:
+        return str(whole)
+    for den in _NICE_DENOMINATORS:
+        num = round(frac * den)
+        if 0 < num < den and abs(frac - num / den) < 0.01:
+            f = Fraction(num, den)
+            return f"{whole} {f}" if whole else str(f)
+    if 1 - frac < 0.01:
+        return str(whole + 1)
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+@lru_cache(maxsize=16384)
+def scale_ingredient(line: str, factor: float) -> tuple[str, ParsedIngredient]:
+    """Scale the leading quantity of *line* by *factor* (memoised).
+
+    Returns the rewritten line, keeping the original unit spelling and any
+    parenthetical such as "(14 oz)", plus the scaled parse.
+    """
+    parsed = parse_ingredient(line)
+    if parsed.quantity is None or factor == 1:
+        return parsed.raw, parsed
+    text = clean(parsed.raw.translate(_EXTRA_FRACTIONS))
+    m = _QTY_RE.match(text)
+    if not m:
+        return parsed.raw, parsed
+    low = parsed.quantity * factor
+    high = parsed.quantity_max * factor if parsed.quantity_max is not None else None
+    amount = format_quantity(low)
+    if high is not None:
+        amount += f"-{format_quantity(high)}"
+    rest = text[m.end():]
+    # Keep "500g" glued the way the source wrote it
+    sep = "" if m.group(0) == m.group(0).rstrip() and rest else " "
+    scaled = ParsedIngredient(
+        raw=f"{amount}{sep}{rest}".strip(),
+        quantity=round(low, 4),
+        quantity_max=round(high, 4) if high is not None else None,
+        unit=parsed.unit,
+        item=parsed.item,
+        notes=parsed.notes,
+    )
+    return scaled.raw, scaled
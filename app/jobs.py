@@ -0,0 +1,390 @@
+"""Asynchronous scrape jobs: submit now, poll (or get called back) later.
+
+A scrape that has to fall back to the proxies can outlast a gateway
+timeout, so `JobQueue` runs the parse off the request in a fixed pool of
+asyncio workers and keeps each job's state in a `JobStore` -- in memory by
+default, or in SQLite when ``JOB_STORE_PATH`` is set so jobs survive a
+restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+import orjson
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Submissions beyond this many waiting jobs are refused
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# SQLite file for job state (unset = in-memory store)
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH")
+JOB_MAX_ENTRIES = int(os.getenv("JOB_MAX_ENTRIES", "10000"))
+# Finished jobs older than this are purged from the SQLite store on startup
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+# A running job not heard from for this long has lost its worker and is
+# run again; running jobs are touched every third of it
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+CALLBACK_TIMEOUT_SECONDS = float(os.getenv("CALLBACK_TIMEOUT_SECONDS", "10"))
+# Allow callbacks to loopback / private / link-local addresses (e.g. in tests)
+CALLBACK_ALLOW_PRIVATE = os.getenv("CALLBACK_ALLOW_PRIVATE", "") not in ("", "0")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobFailed(Exception):
+    """Raised by a job handler to fail the job with an HTTP-style status."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    request: dict
+    callback_url: str | None = None
+    status: str = QUEUED
+    result: object = None
+    error: dict | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MemoryJobStore:
+    """Keeps the most recent ``max_entries`` jobs in process memory."""
+
+    def __init__(self, max_entries: int = JOB_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def claim(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return None
+            job.status = RUNNING
+            job.updated_at = time.time()
+            return job
+
+    def touch(self, job: Job) -> None:
+        job.updated_at = time.time()
+
+    def recoverable(self, queued_before: float, running_before: float) -> list[str]:
+        return []
+
+    def purge(self, older_than: float) -> int:
+        return 0
+
+
+class SqliteJobStore:
+    """Jobs in a SQLite table, one JSON document per row."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, updated_at REAL NOT NULL, doc BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, updated_at, doc) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, job.updated_at, orjson.dumps(job.to_dict())),
+            )
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute("SELECT doc FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**orjson.loads(row[0])) if row else None
+
+    def _put(self, job: Job) -> None:
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, doc = ? WHERE id = ?",
+            (job.status, job.updated_at, orjson.dumps(job.to_dict()), job.id),
+        )
+
+    def claim(self, job_id: str) -> Job | None:
+        """Mark a queued job running and return it; None if another worker
+        (or process) got there first."""
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes can't
+            # both see the job queued
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT doc FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED)
+                ).fetchone()
+                job = Job(**orjson.loads(row[0])) if row else None
+                if job is not None:
+                    job.status = RUNNING
+                    job.updated_at = time.time()
+                    self._put(job)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job
+
+    def touch(self, job: Job) -> None:
+        """Renew a running job's lease."""
+        job.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?", (job.updated_at, job.id, RUNNING)
+            )
+
+    def recoverable(self, queued_before: float, running_before: float) -> list[str]:
+        """Ids of jobs queued before *queued_before*, and of running jobs whose
+        lease ran out before *running_before* (put back to queued)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT doc FROM jobs WHERE (status = ? AND updated_at < ?) OR (status = ? AND updated_at < ?)"
+                    " ORDER BY updated_at",
+                    (QUEUED, queued_before, RUNNING, running_before),
+                ).fetchall()
+                jobs = [Job(**orjson.loads(doc)) for doc, in rows]
+                for job in jobs:
+                    if job.status == RUNNING:
+                        job.status = QUEUED
+                        self._put(job)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [job.id for job in jobs]
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, older_than)
+            )
+        return cur.rowcount
+
+
+def make_store() -> MemoryJobStore | SqliteJobStore:
+    return SqliteJobStore(JOB_STORE_PATH) if JOB_STORE_PATH else MemoryJobStore()
+
+
+class QueueFull(Exception):
+    """Raised by `JobQueue.submit` when no more jobs can be queued."""
+
+
+class JobQueue:
+    """Bounded queue of jobs drained by ``workers`` asyncio tasks.
+
+    *handler(request)* does the work and returns a JSON-serialisable
+    result; raising `JobFailed` (or anything else) fails the job.
+
+    With a shared store several processes may hold the same job id; a
+    worker runs it only if it claims it, and every ``lease`` seconds each
+    process picks up queued jobs nobody has claimed and running jobs whose
+    worker stopped renewing their lease.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict], Awaitable[object]],
+        store: MemoryJobStore | SqliteJobStore | None = None,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_SIZE,
+        lease: float = JOB_LEASE_SECONDS,
+    ):
+        self._handler = handler
+        self.store = store if store is not None else make_store()
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease = lease
+        self._queue: asyncio.Queue[str] | None = None
+        # Ids in this process's queue, so a recovery pass doesn't add them twice
+        self._local: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the workers and pick up jobs a previous run didn't finish."""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.store.purge(time.time() - JOB_RETENTION_SECONDS)
+        self._recover(time.time())
+        self._tasks.append(asyncio.create_task(self._recover_forever()))
+
+    def _recover(self, queued_before: float) -> None:
+        for job_id in self.store.recoverable(queued_before, time.time() - self.lease):
+            if job_id not in self._local:
+                self._enqueue(job_id)
+                metrics.incr("jobs.requeued")
+
+    async def _recover_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease)
+            self._recover(time.time() - self.lease)
+
+    def _enqueue(self, job_id: str) -> None:
+        self._local.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: dict, callback_url: str | None = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        if self._queue.qsize() >= self.max_queued:
+            metrics.incr("jobs.rejected")
+            raise QueueFull(f"{self._queue.qsize()} jobs already queued")
+        job = Job(id=uuid.uuid4().hex, request=request, callback_url=callback_url)
+        self.store.save(job)
+        self._enqueue(job.id)
+        metrics.incr("jobs.submitted")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.store.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._local.discard(job_id)
+            try:
+                job = self.store.claim(job_id)
+                if job is None:
+                    metrics.incr("jobs.claimed_elsewhere")
+                else:
+                    await self._run(job)
+            except Exception:
+                # Keep draining the queue whatever one job did
+                metrics.incr("jobs.worker_errors")
+                logger.exception("Job %s crashed its worker", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            self.store.touch(job)
+
+    async def _run(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            job.result = await self._handler(job.request)
+            job.status = DONE
+        except JobFailed as e:
+            job.status = FAILED
+            job.error = {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            job.status = FAILED
+            job.error = {"status_code": 500, "detail": str(e)}
+        finally:
+            heartbeat.cancel()
+        job.updated_at = time.time()
+        self.store.save(job)
+        metrics.incr(f"jobs.{job.status}")
+        if job.callback_url:
+            await _send_callback(job)
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "store": type(self.store).__name__,
+        }
+
+
+def _is_private(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    return not ip.is_global or ip.is_multicast
+
+
+def check_callback_url(url: str) -> None:
+    """Raise ValueError unless *url* is an absolute http(s) URL with a host
+    that isn't a loopback / private / link-local address literal."""
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+        parts.port  # raises for a malformed port
+    except ValueError:
+        raise ValueError(f"Not a valid callback URL: {url}") from None
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("callback_url must be an http(s) URL with a host")
+    if CALLBACK_ALLOW_PRIVATE:
+        return
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError("callback_url may not point at this host")
+    try:
+        private = _is_private(host)
+    except ValueError:
+        return  # a hostname; resolved and checked again when the callback is sent
+    if private:
+        raise ValueError("callback_url may not point at a private address")
+
+
+async def _resolves_private(host: str) -> bool:
+    """Whether any address *host* resolves to is non-public (so a name
+    can't be used to reach internal services)."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return any(_is_private(info[4][0]) for info in infos)
+
+
+async def _send_callback(job: Job) -> None:
+    """POST the finished job to its callback URL (one attempt, then give up)."""
+    import httpx
+
+    try:
+        check_callback_url(job.callback_url)
+        if not CALLBACK_ALLOW_PRIVATE and await _resolves_private(urlsplit(job.callback_url).hostname):
+            raise ValueError("callback_url resolves to a private address")
+        async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT_SECONDS) as client:
+            resp = await client.post(
+                job.callback_url,
+                content=orjson.dumps(job.to_dict()),
+                headers={"Content-Type": "application/json"},
+            )
+        metrics.incr("jobs.callback.ok" if resp.status_code < 400 else "jobs.callback.rejected")
+    except Exception as e:
+        # Bad URL, DNS or HTTP failure: the job itself is done either way
+        metrics.incr("jobs.callback.failed")
+        logger.warning("Callback for job %s to %s failed: %r", job.id, job.callback_url, e)
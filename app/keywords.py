@@ -0,0 +1,74 @@
+"""Compiled keyword matching for the ingredient/instruction heuristics.
+
+The fallbacks used to run ``any(w in text.lower() for w in (...))`` once per
+keyword tuple per list item.  A `KeywordSet` compiles the tuple into a single
+alternation regex with exactly the same substring semantics, and
+`KeywordClassifier` scores a whole batch of candidate lines against several
+sets in one pass over the joined text.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Iterable
+
+
+class KeywordSet:
+    """Case-insensitive "contains any of these substrings" matcher."""
+
+    __slots__ = ("words", "_re")
+
+    def __init__(self, words: Iterable[str]):
+        self.words = tuple(words)
+        # Longest first so the alternation never stops at a shorter prefix;
+        # the yes/no answer is the same either way.
+        alts = sorted({w.lower() for w in self.words}, key=len, reverse=True)
+        self._re = re.compile("|".join(map(re.escape, alts)))
+
+    def search(self, text: str) -> bool:
+        """Equivalent of ``any(w in text.lower() for w in words)``."""
+        return self._re.search(text.lower()) is not None
+
+    def flags(self, lowered: list[str], joined: str | None = None, starts: list[int] | None = None) -> list[bool]:
+        """Match every already-lowercased line in *lowered* at once."""
+        if joined is None or starts is None:
+            joined, starts = _join(lowered)
+        hits = [False] * len(lowered)
+        pos = 0
+        search = self._re.search
+        while True:
+            m = search(joined, pos)
+            if not m:
+                break
+            i = bisect_right(starts, m.start()) - 1
+            hits[i] = True
+            # One hit per line is enough; resume at the next line
+            if i + 1 >= len(starts):
+                break
+            pos = starts[i + 1]
+        return hits
+
+
+def _join(lowered: list[str]) -> tuple[str, list[int]]:
+    starts = []
+    offset = 0
+    for line in lowered:
+        starts.append(offset)
+        offset += len(line) + 1
+    return "\n".join(lowered), starts
+
+
+class KeywordClassifier:
+    """A named group of keyword sets evaluated together over a batch of lines.
+
+    ``classify(texts)`` returns ``{set_name: [bool per text]}``.
+    """
+
+    def __init__(self, **sets: Iterable[str]):
+        self.sets = {name: KeywordSet(words) for name, words in sets.items()}
+
+    def classify(self, texts: list[str]) -> dict[str, list[bool]]:
+        lowered = [t.lower() for t in texts]
+        joined, starts = _join(lowered)
+        return {name: ks.flags(lowered, joined, starts) for name, ks in self.sets.items()}
@@ -1,104 +1,650 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
-
-from app.fetcher import fetch_page, ALLRECIPES_PROXY
-from app.validation import is_article_not_recipe
-from app.parsers.allrecipes import scrape_allrecipes
-from app.parsers.foodnetwork import scrape_foodnetwork_uk
-from app.parsers.tableofspice import scrape_tableofspice
-from app.parsers.food_com import scrape_food_com
-from app.parsers.recipetineats import scrape_recipetineats
-from app.parsers.gimmesomeoven import scrape_gimmesomeoven
-from app.parsers.saltandlavender import scrape_saltandlavender
-from app.parsers.natashaskitchen import scrape_natashaskitchen
-from app.parsers.thechunkychef import scrape_thechunkychef
-from app.parsers.food52 import scrape_food52
-
-app = FastAPI()
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from dataclasses import fields as dataclass_fields, replace
+from typing import AsyncIterator, Callable
+
+import orjson
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from urllib.parse import urljoin, urlsplit
+
+from app import metrics, profiling
+from app.admission import CLIENT_TIMEOUT_SECONDS, Overloaded, admission
+from app.cache import negative_cache, recipe_cache
+from app.budget import REQUEST_MEMORY_BUDGET, BudgetTimeout, body_limit, inflight
+from app.ingredients import parse_ingredients
+from app.jobs import JobFailed, JobQueue, QueueFull, check_callback_url
+from app.fetcher import Page, fetch_page, breaker_states, ALLRECIPES_PROXY, MAX_BODY_BYTES
+from app.fingerprint import fingerprint
+from app.models import RECIPE_FIELDS, ArticleRejection, Recipe, RecipeCollection
+from app.parsers import SiteSpec, find_site, load_scraper
+from app.scaling import scale_recipe
+from app.sniff import CHALLENGE, CONSENT, NOT_FOUND, RECIPE
+from app.urls import canonicalize, non_recipe_reason
+from app.validation import has_article_title, is_article_not_recipe, is_article_page
+from app.warmup import WARMUP_TOP_N, Refresher, request_log
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    request_log.load()
+    await job_queue.start()
+    warmer = asyncio.create_task(refresher.warm_forever()) if WARMUP_TOP_N > 0 else None
+    yield
+    if warmer is not None:
+        warmer.cancel()
+    await job_queue.stop()
+    request_log.save()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class RecipeRequest(BaseModel):
     url: str
+    # Also return each ingredient split into quantity / unit / item / notes
+    structured: bool = False
+    # Scale ingredient quantities to this many servings
+    servings: float | None = Field(default=None, gt=0)
+    # Only compute (and return) these recipe fields, e.g. ["title", "image_url"]
+    fields: list[str] | None = None
+    # Return every recipe on the page plus the recipe URLs it lists, as
+    # {"recipes": [...], "recipe_urls": [...]}; roundups and collections.
+    # With servings, recipes without a yield come back unscaled, their
+    # indexes listed in "unscaled"
+    all_recipes: bool = False
 
 
-# Map domain substrings to their scraper functions.
-# Food Network needs the raw HTML too, so it's handled separately below.
-_SCRAPERS = {
-    "food.com": scrape_food_com,
-    "thetableofspice.com": scrape_tableofspice,
-    "allrecipes.com": scrape_allrecipes,
-    "recipetineats.com": scrape_recipetineats,
-    "gimmesomeoven.com": scrape_gimmesomeoven,
-    "saltandlavender.com": scrape_saltandlavender,
-    "natashaskitchen.com": scrape_natashaskitchen,
-    "thechunkychef.com": scrape_thechunkychef,
-    "food52.com": scrape_food52,
-}
+class RecipeJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, which handles dataclasses natively."""
 
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
 
-@app.post("/api/parseRecipe")
-async def parse_recipe(data: RecipeRequest):
-    try:
-        url = data.url if data.url.startswith("http") else f"https://{data.url}"
-        domain = urlparse(url).netloc.lower()
-
-        resp = fetch_page(url)
-
-        # If the proxy itself failed, retry without it
-        if resp.status_code != 200 and ALLRECIPES_PROXY:
-            resp = fetch_page(url)
-
-        if resp.status_code != 200:
-            detail = f"Recipe page not found (status {resp.status_code})"
-            try:
-                snippet = resp.text[:200].strip().replace("\n", " ")
-                if snippet:
-                    detail += f" -- {snippet}"
-            except Exception:
-                pass
-            raise HTTPException(status_code=404, detail=detail)
-
-        soup = BeautifulSoup(resp.content, "html.parser")
-
-        # Route to the right scraper
-        if "foodnetwork.co.uk" in domain:
-            recipe_data = scrape_foodnetwork_uk(soup, resp.text)
+
+# Projections that include these get the full article/review check
+_ARTICLE_CHECK_FIELDS = frozenset({"ingredients", "instructions"})
+
+
+# Upstream answers that mean "not now" (blocked, rate limited), not "gone"
+_BLOCKED_STATUSES = frozenset({401, 403, 429})
+
+
+def _fetch_checked(url: str) -> Page:
+    """Fetch *url*, raising HTTPException unless we got a parseable page."""
+    max_bytes = min(MAX_BODY_BYTES, body_limit(REQUEST_MEMORY_BUDGET))
+
+    page = fetch_page(url, max_bytes)
+
+    # If the proxy itself failed, retry without it
+    if page.status_code != 200 and ALLRECIPES_PROXY:
+        page = fetch_page(url, max_bytes)
+
+    if page.status_code != 200:
+        if page.status_code in (404, 410):
+            # Gone for good (and so negative-cached); passed through as is
+            status, detail = page.status_code, f"Recipe page not found (status {page.status_code})"
+        elif page.status_code in _BLOCKED_STATUSES:
+            status, detail = 503, f"Site refused the request (status {page.status_code}); try again later"
         else:
-            scraper = None
-            for key, fn in _SCRAPERS.items():
-                if key in domain:
-                    scraper = fn
-                    break
-            if scraper is None:
-                raise HTTPException(status_code=400, detail=f"Unsupported domain: {domain}")
-            recipe_data = scraper(soup)
-
-        # Article / review detection
-        if is_article_not_recipe(soup, recipe_data):
-            snippet = None
-            try:
-                snippet = resp.text[:500].replace("\n", " ")
-            except Exception:
-                pass
-            result = {
-                "title": "error",
-                "notes": "This appears to be an article or review, not a recipe. Please provide a direct link to a recipe page.",
-                "ingredients": [],
-                "instructions": [],
-                "cooking_time": None,
-                "servings": "servings not specified",
-                "image_url": None,
-                "rating": None,
-            }
+            status, detail = 502, f"Site returned status {page.status_code}"
+        try:
+            snippet = page.snippet(200).strip().replace("\n", " ")
             if snippet:
-                result["debug_html"] = snippet
-            return result
+                detail += f" -- {snippet}"
+        except Exception:
+            pass
+        raise HTTPException(status_code=status, detail=detail)
+
+    # Every strategy may have come back with an interstitial; don't parse it
+    if page.kind == NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Recipe page not found (soft 404)")
+    if page.kind in (CHALLENGE, CONSENT):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Site returned a {page.kind} page instead of the recipe; try again later",
+        )
+    return page
+
+
+def _canonical_url(raw: str) -> str:
+    try:
+        return canonicalize(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _site_for(url: str, collection: bool = False) -> SiteSpec:
+    """The site scraping *url*; unsupported sites and URLs that can't be a
+    recipe page are rejected here, before anything is fetched.
+
+    A *collection* may be any page on the site, listings included.
+    """
+    domain = urlsplit(url).netloc.lower()
+    site = find_site(domain)
+    if site is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported domain: {domain}")
+    reason = None if collection else non_recipe_reason(url, site)
+    if reason is not None:
+        metrics.incr("urls.rejected")
+        raise HTTPException(status_code=400, detail=f"Not a recipe page ({reason}): {url}")
+    return site
+
+
+def _make_soup(page: Page):
+    from bs4 import BeautifulSoup
+
+    # Decoded once by the Page; handing bs4 a str skips its own sniffing
+    return BeautifulSoup(page.text, "html.parser")
+
+
+def _run_scraper(site: SiteSpec, soup, page: Page, fields: frozenset[str] | None) -> Recipe:
+    scraper = load_scraper(site)
+    with profiling.profile(site.domain):
+        if site.needs_html:
+            return scraper(soup, page.text, fields)
+        return scraper(soup, fields)
+
+
+def _check_article(soup, recipe_data: Recipe, page: Page, fields: frozenset[str] | None) -> Recipe:
+    """*recipe_data*, or an `ArticleRejection` if the page isn't a recipe."""
+    if fields is None or _ARTICLE_CHECK_FIELDS <= fields:
+        is_article = is_article_not_recipe(soup, recipe_data)
+    else:
+        is_article = has_article_title(recipe_data.title)
+    return _article_rejection(page) if is_article else recipe_data
+
+
+def _article_rejection(page: Page) -> ArticleRejection:
+    snippet = None
+    try:
+        snippet = page.snippet(500).replace("\n", " ")
+    except Exception:
+        pass
+    return ArticleRejection(debug_html=snippet or None)
+
+
+def _early_article(url: str, page: Page) -> ArticleRejection | None:
+    """An `ArticleRejection` if the raw page is plainly an article, so the
+    DOM build and scraper can be skipped."""
+    if is_article_page(page.content, url, page.kind == RECIPE):
+        metrics.incr("article.early")
+        return _article_rejection(page)
+    return None
+
+
+def _unchanged(url: str, page: Page, fields: frozenset[str] | None) -> tuple[Recipe | None, str | None]:
+    """``(stored recipe, fingerprint)`` -- the recipe is the one cached for
+    *url* if *page* has the same content fingerprint, else None."""
+    fp = fingerprint(page.content)
+    stored = recipe_cache.match_fingerprint(url, fp, fields) if fp is not None else None
+    metrics.incr("fingerprint.skipped" if stored is not None else "fingerprint.parsed")
+    return stored, fp
+
+
+def _scrape(url: str, fields: frozenset[str] | None) -> tuple[Recipe, str | None]:
+    # Route to the right scraper (imported on first use)
+    site = _site_for(url)
+    page = _fetch_checked(url)
+    # Revalidations mostly find the page unchanged; skip the DOM build then
+    stored, fp = _unchanged(url, page, fields)
+    if stored is not None:
+        return stored, fp
+    rejection = _early_article(url, page)
+    if rejection is not None:
+        return rejection, fp
+    soup = _make_soup(page)
+    recipe_data = _run_scraper(site, soup, page, fields)
+    return _check_article(soup, recipe_data, page, fields), fp
+
+
+def scrape_url(url: str, fields: frozenset[str] | None = None) -> Recipe:
+    """Fetch, parse and scrape *url*.  Blocking; runs in the threadpool.
+
+    With *fields*, scrapers skip the extraction and HTML fallbacks for
+    everything else; article detection then only has the title to go on
+    unless ingredients and instructions were requested too.  A page whose
+    content fingerprint matches the cached parse isn't parsed again.
+    """
+    return _scrape(url, fields)[0]
+
+
+def scrape_collection(url: str, fields: frozenset[str] | None = None) -> RecipeCollection:
+    """Every recipe on *url* from one fetch and parse, plus the recipe URLs
+    its ld+json ItemList links to (canonical, for scheduling)."""
+    from app.parsers.base import finalise_recipe
+    from app.parsers.jsonld import extract_itemlist_urls, extract_jsonld_recipes
+
+    site = _site_for(url, collection=True)
+    page = _fetch_checked(url)
+    soup = _make_soup(page)
+    main = _check_article(soup, _run_scraper(site, soup, page, fields), page, fields)
+    nodes = extract_jsonld_recipes(soup, fields)
+    if isinstance(main, ArticleRejection):
+        # A roundup: its Recipe nodes are all there is
+        recipes = [finalise_recipe(r) for r in nodes]
+    else:
+        # The scraper's result (with HTML fallbacks) stands for the first node
+        recipes = [main, *(finalise_recipe(r) for r in nodes[1:])]
+    urls: dict[str, None] = {}
+    for link in extract_itemlist_urls(soup):
+        try:
+            urls[canonicalize(urljoin(page.url or url, link))] = None
+        except ValueError:
+            continue
+    return RecipeCollection(recipes, list(urls))
+
+
+# Failures worth remembering: the page is gone or the site isn't supported.
+# Blocks and upstream errors (502/503) are transient and never cached.
+_NEGATIVE_STATUSES = frozenset({400, 404, 410})
+
+
+def _check_negative(url: str) -> None:
+    """Re-raise a recent permanent failure for *url* without fetching it."""
+    hit = negative_cache.get(url)
+    if hit is not None:
+        raise HTTPException(status_code=hit[0], detail=hit[1])
+
+
+def _remember_failure(url: str, e: HTTPException) -> None:
+    if e.status_code in _NEGATIVE_STATUSES:
+        negative_cache.set(url, e.status_code, str(e.detail))
+
+
+async def _scrape_and_cache(url: str, fields: frozenset[str] | None = None) -> Recipe:
+    # URL-rule rejections are decided without a fetch, so they're never
+    # negative-cached (the same URL may still be fine as a collection)
+    _site_for(url)
+    _check_negative(url)
+    try:
+        # Reserve this request's share of the in-flight memory pool first;
+        # when it's exhausted we wait here rather than risk an OOM kill.
+        async with inflight.reserve(REQUEST_MEMORY_BUDGET):
+            recipe, fp = await run_in_threadpool(_scrape, url, fields)
+    except HTTPException as e:
+        _remember_failure(url, e)
+        raise
+    recipe_cache.set(url, recipe, fields, fp)
+    return recipe
+
+
+async def _scrape_collection(url: str, fields: frozenset[str] | None) -> RecipeCollection:
+    # Not cached: a collection is fetched once and its recipes scheduled
+    _site_for(url, collection=True)
+    _check_negative(url)
+    try:
+        async with inflight.reserve(REQUEST_MEMORY_BUDGET):
+            return await run_in_threadpool(scrape_collection, url, fields)
+    except HTTPException as e:
+        _remember_failure(url, e)
+        raise
+
+
+# Stale cache hits and warm-up re-scrape the whole recipe off the request path
+refresher = Refresher(_scrape_and_cache)
 
-        return recipe_data
 
+def _scrape_fields(data: RecipeRequest) -> frozenset[str] | None:
+    """The fields the scrapers must compute for *data* (None = all)."""
+    if data.fields is None:
+        return None
+    fields = frozenset(data.fields)
+    unknown = fields - RECIPE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    # Title always drives article detection; scaling needs the yield too
+    fields |= {"title"}
+    if data.structured or data.servings:
+        fields |= {"ingredients"}
+    if data.servings:
+        fields |= {"servings"}
+    return fields
+
+
+def _finish(recipe: Recipe, data: RecipeRequest) -> Recipe | dict:
+    """Apply the request's scaling, structured output and projection."""
+    if isinstance(recipe, ArticleRejection):
+        return recipe
+    if data.servings:
+        try:
+            recipe = scale_recipe(recipe, data.servings, structured=data.structured)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    elif data.structured:
+        recipe = replace(recipe, ingredients_parsed=parse_ingredients(recipe.ingredients))
+    if data.fields is not None:
+        return _project(recipe, data)
+    return recipe
+
+
+def _finish_collection(collection: RecipeCollection, data: RecipeRequest) -> dict:
+    """The collection response; recipes that can't be scaled (no yield) are
+    returned unscaled and their indexes listed under ``unscaled``."""
+    recipes, unscaled = [], []
+    for i, recipe in enumerate(collection.recipes):
+        try:
+            recipes.append(_finish(recipe, data))
+        except HTTPException:
+            if not data.servings:
+                raise
+            recipes.append(_finish(recipe, data.model_copy(update={"servings": None})))
+            unscaled.append(i)
+    out = {"recipes": recipes, "recipe_urls": collection.recipe_urls}
+    if unscaled:
+        out["unscaled"] = unscaled
+    return out
+
+
+def _project(recipe: Recipe, data: RecipeRequest) -> dict:
+    """Only the fields the caller asked for."""
+    out = {name: getattr(recipe, name) for name in data.fields}
+    if recipe.ingredients_parsed is not None:
+        out["ingredients_parsed"] = recipe.ingredients_parsed
+    return out
+
+
+@app.post(
+    "/api/parseRecipe",
+    response_model=Recipe | ArticleRejection | RecipeCollection,
+    response_class=RecipeJSONResponse,
+)
+async def parse_recipe(
+    data: RecipeRequest,
+    x_request_timeout: float | None = Header(default=None, gt=0),
+    x_profile: str | None = Header(default=None),
+):
+    profiling.want_profile(x_profile)
+    # Seconds the client will wait for us; cold scrapes that can't finish
+    # inside it are shed rather than started
+    deadline = time.monotonic() + (x_request_timeout or CLIENT_TIMEOUT_SECONDS)
+    # Returning the response directly skips FastAPI's generic encoder;
+    # orjson serialises the slotted dataclass natively.
+    return RecipeJSONResponse(await _parse(data, deadline))
+
+
+async def _parse(data: RecipeRequest, deadline: float | None = None) -> Recipe | dict:
+    """The parseRecipe result for *data*; failures raise HTTPException.
+
+    With a *deadline* (``time.monotonic()``), a cache miss has to get
+    through admission control before it's scraped.
+    """
+    url = _canonical_url(data.url)
+    fields = _scrape_fields(data)
+    gate = admission.slot(deadline) if deadline is not None else nullcontext()
+    try:
+        if data.all_recipes:
+            async with gate:
+                return _finish_collection(await _scrape_collection(url, fields), data)
+        recipe, stale = recipe_cache.lookup(url, fields)
+        if recipe is None:
+            async with gate:
+                recipe = await _scrape_and_cache(url, fields)
+        elif stale:
+            # Serve what we have now; the next request gets the fresh copy
+            refresher.schedule(url)
+
+        result = _finish(recipe, data)
+        # Only recipes that scraped are worth warming
+        if not isinstance(recipe, ArticleRejection):
+            request_log.record(url)
+        return result
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except BudgetTimeout:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy; try again shortly",
+            headers={"Retry-After": "5"},
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Stream fields in the order a Recipe declares them
+_FIELD_ORDER = tuple(f.name for f in dataclass_fields(Recipe) if f.name in RECIPE_FIELDS)
+
+
+def _sse(event: str, payload) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _partial(recipe: Recipe, data: RecipeRequest, seen: dict) -> dict:
+    """Fields of *recipe* that have a value not yet sent (updates *seen*).
+
+    Ingredients and servings are held back when scaling, since only the
+    final result carries the scaled values.
+    """
+    out = {}
+    for name in _FIELD_ORDER:
+        if data.fields is not None and name not in data.fields:
+            continue
+        if data.servings and name in ("ingredients", "servings"):
+            continue
+        value = getattr(recipe, name)
+        if value in (None, "", []) or seen.get(name) == value:
+            continue
+        seen[name] = out[name] = value
+    return out
+
+
+async def _open_stream(
+    data: RecipeRequest, url: str, fields: frozenset[str] | None, deadline: float
+) -> AsyncIterator[bytes]:
+    """Start the parse and return its SSE events: ``fields`` (JSON-LD values
+    first, then whatever the site's HTML fallbacks added), ``verdict``, then
+    ``result`` with the same body /api/parseRecipe would return, or ``error``.
+
+    A cache miss goes through admission control like /api/parseRecipe;
+    `Overloaded` is raised here, before any event, so it can still become
+    a 429/503 response.  The parse runs in its own task and hands events
+    over through a queue, so its slot and memory reservation end when
+    parsing does rather than when a slow client has read the last event.
+    """
+    events: asyncio.Queue[bytes | None] = asyncio.Queue()
+    admitted = asyncio.get_running_loop().create_future()
+    producer = asyncio.create_task(_produce_events(data, url, fields, events.put_nowait, deadline, admitted))
+    try:
+        await admitted
+    except BaseException:
+        producer.cancel()
+        raise
+    return _relay(events, producer)
+
+
+async def _relay(events: asyncio.Queue[bytes | None], producer: asyncio.Task) -> AsyncIterator[bytes]:
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+    finally:
+        # Client gone mid-stream: stop parsing for it
+        producer.cancel()
+
+
+async def _produce_events(
+    data: RecipeRequest,
+    url: str,
+    fields: frozenset[str] | None,
+    emit: Callable[[bytes | None], None],
+    deadline: float,
+    admitted: asyncio.Future,
+) -> None:
+    # Here rather than at module level, which must stay free of bs4
+    from app.parsers.jsonld import extract_jsonld_recipe
+
+    try:
+        recipe, stale = recipe_cache.lookup(url, fields)
+        if recipe is not None:
+            admitted.set_result(None)
+            if stale:
+                refresher.schedule(url)
+            if not isinstance(recipe, ArticleRejection) and (partial := _partial(recipe, data, {})):
+                emit(_sse("fields", partial))
+        else:
+            _check_negative(url)
+            seen: dict = {}
+            async with AsyncExitStack() as stack:
+                try:
+                    await stack.enter_async_context(admission.slot(deadline))
+                except Overloaded as e:
+                    admitted.set_exception(e)
+                    return
+                admitted.set_result(None)
+                await stack.enter_async_context(inflight.reserve(REQUEST_MEMORY_BUDGET))
+                site = _site_for(url)
+                page = await run_in_threadpool(_fetch_checked, url)
+                recipe, fp = await run_in_threadpool(_unchanged, url, page, fields)
+                if recipe is None:
+                    recipe = await run_in_threadpool(_early_article, url, page)
+                if recipe is None:
+                    soup = await run_in_threadpool(_make_soup, page)
+                    # Memoised on the soup, so the scraper below reuses this parse
+                    ld = await run_in_threadpool(extract_jsonld_recipe, soup, fields)
+                    if partial := _partial(ld, data, seen):
+                        emit(_sse("fields", partial))
+                    scraped = await run_in_threadpool(_run_scraper, site, soup, page, fields)
+                    if partial := _partial(scraped, data, seen):
+                        emit(_sse("fields", partial))
+                    recipe = await run_in_threadpool(_check_article, soup, scraped, page, fields)
+                elif not isinstance(recipe, ArticleRejection) and (partial := _partial(recipe, data, seen)):
+                    emit(_sse("fields", partial))
+            recipe_cache.set(url, recipe, fields, fp)
+        emit(_sse("verdict", {"is_article": isinstance(recipe, ArticleRejection)}))
+        emit(_sse("result", _finish(recipe, data)))
+        if not isinstance(recipe, ArticleRejection):
+            request_log.record(url)
+    except BudgetTimeout:
+        emit(_sse("error", {"status_code": 503, "detail": "Server is busy; try again shortly"}))
+    except HTTPException as e:
+        _remember_failure(url, e)
+        emit(_sse("error", {"status_code": e.status_code, "detail": e.detail}))
+    except Exception as e:
+        emit(_sse("error", {"status_code": 500, "detail": str(e)}))
+    finally:
+        if not admitted.done():
+            admitted.set_result(None)  # failed before admission; the error event says why
+        emit(None)
+
+
+@app.post("/api/parseRecipe/stream")
+async def parse_recipe_stream(
+    data: RecipeRequest,
+    x_request_timeout: float | None = Header(default=None, gt=0),
+    x_profile: str | None = Header(default=None),
+):
+    """Server-Sent Events variant of /api/parseRecipe for progressive UIs."""
+    if data.all_recipes:
+        raise HTTPException(status_code=422, detail="all_recipes isn't supported when streaming")
+    profiling.want_profile(x_profile)
+    url = _canonical_url(data.url)
+    fields = _scrape_fields(data)
+    # Rejected before the stream starts, and (being URL-only) not negative-cached
+    _site_for(url)
+    deadline = time.monotonic() + (x_request_timeout or CLIENT_TIMEOUT_SECONDS)
+    try:
+        events = await _open_stream(data, url, fields, deadline)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class JobRequest(RecipeRequest):
+    # POSTed the finished job (same body as GET /api/jobs/{id})
+    callback_url: str | None = None
+
+
+async def _run_job(request: dict) -> object:
+    """Job body: the parseRecipe logic, with the result as plain JSON data."""
+    try:
+        content = await _parse(RecipeRequest(**request))
+    except HTTPException as e:
+        raise JobFailed(e.status_code, str(e.detail))
+    return orjson.loads(orjson.dumps(content))
+
+
+job_queue = JobQueue(_run_job)
+metrics.register_collector("jobs", job_queue.snapshot)
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(data: JobRequest):
+    """Queue a parse and return its id at once; poll GET /api/jobs/{id}."""
+    # Reject bad fields and non-recipe URLs now rather than in the job
+    _scrape_fields(data)
+    _site_for(_canonical_url(data.url), collection=data.all_recipes)
+    if data.callback_url is not None:
+        try:
+            check_callback_url(data.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    try:
+        job = job_queue.submit(data.model_dump(exclude={"callback_url"}), data.callback_url)
+    except QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full; try again shortly",
+            headers={"Retry-After": "10"},
+        )
+    return {"id": job.id, "status": job.status, "location": f"/api/jobs/{job.id}"}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return RecipeJSONResponse(job.to_dict())
+
+
+def _fingerprint_stats() -> dict:
+    skipped, parsed = metrics.value("fingerprint.skipped"), metrics.value("fingerprint.parsed")
+    return {"skipped": skipped, "parsed": parsed, "skip_rate": round(skipped / max(skipped + parsed, 1), 3)}
+
+
+metrics.register_collector("fingerprint", _fingerprint_stats)
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+
+@app.get("/api/debug/breakers")
+async def get_breakers():
+    """Show which (domain, fetch strategy) pairs are currently being skipped."""
+    return {"breakers": breaker_states()}
+
+
+@app.get("/api/debug/profile")
+async def get_profile(format: str = "collapsed", reset: bool = False):
+    """Scraper timings from profiled requests (``X-Profile: 1`` or sampled).
+
+    ``collapsed`` is flamegraph input (``frame;frame <microseconds>`` lines);
+    ``functions`` is per-function calls and total/self milliseconds.
+    """
+    if format == "collapsed":
+        out = PlainTextResponse(profiling.collapsed())
+    elif format == "functions":
+        out = {"functions": profiling.functions()}
+    else:
+        raise HTTPException(status_code=422, detail="format must be 'collapsed' or 'functions'")
+    if reset:
+        profiling.reset()
+    return out
@@ -0,0 +1,37 @@
+"""Lightweight in-process counters exposed through the metrics endpoint."""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Callable
+
+_counters: dict[str, int] = defaultdict(int)
+_collectors: dict[str, Callable[[], object]] = {}
+_lock = threading.Lock()
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Add *value* to the counter called *name*."""
+    with _lock:
+        _counters[name] += value
+
+
+def value(name: str) -> int:
+    """The current value of the counter called *name*."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def register_collector(name: str, fn: Callable[[], object]) -> None:
+    """Register *fn* to report a section of the metrics snapshot under *name*."""
+    _collectors[name] = fn
+
+
+def snapshot() -> dict:
+    """Return all counters plus the output of every registered collector."""
+    with _lock:
+        out: dict[str, object] = {"counters": dict(_counters)}
+    for name, fn in _collectors.items():
+        out[name] = fn()
+    return out
@@ -0,0 +1,61 @@
+"""Typed recipe result shared by every parser and the API."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields as dc_fields
+
+from app.ingredients import ParsedIngredient
+
+ARTICLE_NOTE = (
+    "This appears to be an article or review, not a recipe. "
+    "Please provide a direct link to a recipe page."
+)
+
+
+@dataclass(slots=True)
+class Recipe:
+    """A scraped recipe.  Fields a parser couldn't find stay ``None``/empty
+    until `finalise_recipe` fills in the display defaults."""
+
+    title: str | None = None
+    notes: str | None = None
+    ingredients: list[str] = field(default_factory=list)
+    instructions: list[str] = field(default_factory=list)
+    cooking_time: str | None = None
+    servings: str | None = None
+    image_url: str | None = None
+    rating: float | None = None
+    # Only filled in when the caller asks for structured ingredients
+    ingredients_parsed: list[ParsedIngredient] | None = None
+
+
+# Field names a caller may project with ``fields=[...]``
+RECIPE_FIELDS = frozenset(f.name for f in dc_fields(Recipe)) - {"ingredients_parsed"}
+
+
+def wants(fields: frozenset[str] | None, name: str) -> bool:
+    """True if *name* should be computed; ``fields=None`` means everything."""
+    return fields is None or name in fields
+
+
+@dataclass(slots=True)
+class ArticleRejection(Recipe):
+    """Returned instead of a recipe when the page is an article or review.
+
+    ``debug_html`` carries the start of the page to help diagnose false
+    positives.
+    """
+
+    title: str | None = "error"
+    notes: str | None = ARTICLE_NOTE
+    servings: str | None = "servings not specified"
+    debug_html: str | None = None
+
+
+@dataclass(slots=True)
+class RecipeCollection:
+    """Everything one page yields for an ``all_recipes`` request: each
+    recipe on it, and the recipe URLs its ItemList links to."""
+
+    recipes: list[Recipe] = field(default_factory=list)
+    recipe_urls: list[str] = field(default_factory=list)
@@ -0,0 +1,68 @@
+"""Site scrapers, registered by domain and imported on first use.
+
+Keeping the parser modules (and BeautifulSoup with them) out of the import
+graph until a request for that site arrives keeps cold starts cheap.
+"""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable
+
+
+@dataclass(frozen=True, slots=True)
+class SiteSpec:
+    """Where to find the scraper for URLs whose host contains *domain*.
+
+    ``needs_html`` scrapers are called as ``fn(soup, raw_html, fields)``,
+    the rest as ``fn(soup, fields)``.  ``recipe_path`` is a regex every
+    recipe URL path on the site matches (searched); other paths are turned
+    away before fetching.  None leaves only the generic checks in `app.urls`.
+    """
+
+    domain: str
+    module: str
+    function: str
+    needs_html: bool = False
+    recipe_path: str | None = None
+
+
+# Checked in order; the first domain contained in the host wins
+SITES: tuple[SiteSpec, ...] = (
+    SiteSpec(
+        "foodnetwork.co.uk", "foodnetwork", "scrape_foodnetwork_uk", needs_html=True,
+        recipe_path=r"^/recipes/[\w-]+/?$",
+    ),
+    # /recipe/<slug>-<id>
+    SiteSpec("food.com", "food_com", "scrape_food_com", recipe_path=r"^/recipe/[\w-]+-\d+/?$"),
+    SiteSpec("thetableofspice.com", "tableofspice", "scrape_tableofspice"),
+    # /recipe/<id>/<slug>/, or the newer /<slug>-recipe-<id>
+    SiteSpec(
+        "allrecipes.com", "allrecipes", "scrape_allrecipes",
+        recipe_path=r"^/(?:recipe/\d+|[\w-]+-recipe-\d+)(?:/|$)",
+    ),
+    SiteSpec("recipetineats.com", "recipetineats", "scrape_recipetineats"),
+    SiteSpec("gimmesomeoven.com", "gimmesomeoven", "scrape_gimmesomeoven"),
+    SiteSpec("saltandlavender.com", "saltandlavender", "scrape_saltandlavender"),
+    SiteSpec("natashaskitchen.com", "natashaskitchen", "scrape_natashaskitchen"),
+    SiteSpec("thechunkychef.com", "thechunkychef", "scrape_thechunkychef"),
+    # /recipes/<id>-<slug>
+    SiteSpec("food52.com", "food52", "scrape_food52", recipe_path=r"^/recipes/\d+"),
+)
+
+
+def find_site(domain: str) -> SiteSpec | None:
+    """The registered site for *domain*, or None if it isn't supported."""
+    for spec in SITES:
+        if spec.domain in domain:
+            return spec
+    return None
+
+
+@cache
+def load_scraper(spec: SiteSpec) -> Callable:
+    """Import the scraper module for *spec* (once) and return its function."""
+    module = importlib.import_module(f"{__name__}.{spec.module}")
+    return getattr(module, spec.function)
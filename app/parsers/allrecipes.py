@@ -5,11 +5,49 @@ from __future__ import annotations
 import re
 from bs4 import BeautifulSoup
 
+from app.keywords import KeywordClassifier, KeywordSet
 from app.utils import clean
+from app.images import resolve_image_url
+from app.models import Recipe, wants
 from app.parsers.jsonld import extract_jsonld_recipe
+from app.parsers.index import page_index
 from app.parsers.base import fallback_title, fallback_image, fallback_rating, finalise_recipe
 
 
+_INGREDIENT_KEYWORDS = KeywordClassifier(
+    noise=(
+        "recipe", "photo", "view", "more", "sign", "follow",
+        "advertisement", "navigation", "menu", "search", "subscribe", "newsletter",
+    ),
+    measure=(
+        "cup", "cups", "teaspoon", "tablespoon", "pound", "ounce",
+        "gram", "ml", "tsp", "tbsp", "lb", "oz", "clove", "slice",
+        "piece", "inch", "½", "¼", "¾", "1/2", "1/4", "3/4",
+        "large", "medium", "small", "pinch", "dash",
+    ),
+    food=(
+        "flour", "sugar", "salt", "pepper", "oil", "butter", "milk",
+        "egg", "vanilla", "cinnamon", "bread", "cheese", "onion", "garlic", "water",
+    ),
+)
+
+_INSTRUCTION_KEYWORDS = KeywordClassifier(
+    noise=(
+        "cup", "teaspoon", "tablespoon", "ounce", "pound",
+        "recipe", "photo", "view", "navigation", "menu",
+        "advertisement", "subscribe",
+    ),
+    action=(
+        "heat", "cook", "bake", "mix", "stir", "add", "combine", "place",
+        "pour", "cover", "simmer", "boil", "fry", "saute", "preheat", "spray",
+        "season", "whisk", "blend", "chop", "slice", "dice", "melt", "serve",
+        "remove", "gather", "measure", "soak", "working", "coat",
+    ),
+)
+
+_NUMBER_RE = re.compile(r"[\d¼½¾⅓⅔⅛⅜⅝⅞]")
+
+
 def _fallback_ingredients(soup: BeautifulSoup) -> list[str]:
     """HTML fallback: scan list items for ingredient-like text."""
     selectors = [
@@ -18,31 +56,16 @@ def _fallback_ingredients(soup: BeautifulSoup) -> list[str]:
         ".ingredients-section li",
         "ul li",
     ]
+    idx = page_index(soup)
     for selector in selectors:
-        items = soup.select(selector)
-        found = []
-        for item in items:
-            text = clean(item.get_text())
-            if not text or len(text) < 3:
-                continue
-            if any(w in text.lower() for w in (
-                "recipe", "photo", "view", "more", "sign", "follow",
-                "advertisement", "navigation", "menu", "search", "subscribe", "newsletter",
-            )):
-                continue
-            has_measure = any(w in text.lower() for w in (
-                "cup", "cups", "teaspoon", "tablespoon", "pound", "ounce",
-                "gram", "ml", "tsp", "tbsp", "lb", "oz", "clove", "slice",
-                "piece", "inch", "½", "¼", "¾", "1/2", "1/4", "3/4",
-                "large", "medium", "small", "pinch", "dash",
-            ))
-            has_number = bool(re.search(r"[\d¼½¾⅓⅔⅛⅜⅝⅞]", text))
-            has_food = any(w in text.lower() for w in (
-                "flour", "sugar", "salt", "pepper", "oil", "butter", "milk",
-                "egg", "vanilla", "cinnamon", "bread", "cheese", "onion", "garlic", "water",
-            ))
-            if has_measure or has_number or has_food:
-                found.append(text)
+        texts = [clean(item.get_text()) for item in idx.select(selector)]
+        texts = [t for t in texts if t and len(t) >= 3]
+        flags = _INGREDIENT_KEYWORDS.classify(texts)
+        found = [
+            text
+            for text, noise, measure, food in zip(texts, flags["noise"], flags["measure"], flags["food"])
+            if not noise and (measure or food or _NUMBER_RE.search(text))
+        ]
         if len(found) >= 3:
             return found
     return []
@@ -57,32 +80,32 @@ def _fallback_instructions(soup: BeautifulSoup) -> list[str]:
         ".directions li",
         "ol li",
     ]
-    action_words = (
-        "heat", "cook", "bake", "mix", "stir", "add", "combine", "place",
-        "pour", "cover", "simmer", "boil", "fry", "saute", "preheat", "spray",
-        "season", "whisk", "blend", "chop", "slice", "dice", "melt", "serve",
-        "remove", "gather", "measure", "soak", "working", "coat",
-    )
+    idx = page_index(soup)
     for selector in selectors:
-        items = soup.select(selector)
-        found = []
-        for item in items:
-            text = clean(item.get_text())
-            if not text or len(text) < 10:
-                continue
-            if any(w in text.lower() for w in (
-                "cup", "teaspoon", "tablespoon", "ounce", "pound",
-                "recipe", "photo", "view", "navigation", "menu",
-                "advertisement", "subscribe",
-            )):
-                continue
-            if any(a in text.lower() for a in action_words):
-                found.append(text)
+        texts = [clean(item.get_text()) for item in idx.select(selector)]
+        texts = [t for t in texts if t and len(t) >= 10]
+        flags = _INSTRUCTION_KEYWORDS.classify(texts)
+        found = [
+            text
+            for text, noise, action in zip(texts, flags["noise"], flags["action"])
+            if not noise and action
+        ]
         if len(found) >= 2:
             return found
     return []
 
 
+_DESCRIPTION_SKIP = KeywordSet((
+    "photo", "credit", "advertisement", "subscribe", "newsletter",
+    "follow", "save", "print", "share", "rate", "review", "comment",
+))
+_DESCRIPTION_KEYWORDS = KeywordSet((
+    "recipe", "dish", "delicious", "flavor", "taste", "cook",
+    "make", "best", "perfect", "easy", "simple", "ingredients",
+    "this", "it's", "you'll",
+))
+
+
 def _fallback_description(soup: BeautifulSoup) -> str:
     """AllRecipes-specific description heuristic."""
     selectors = [
@@ -93,24 +116,20 @@ def _fallback_description(soup: BeautifulSoup) -> str:
         ".recipe-description",
         ".recipe-intro p",
     ]
+    idx = page_index(soup)
     for sel in selectors:
-        tag = soup.select_one(sel)
+        tag = idx.select_one(sel)
         if tag:
             return clean(tag.get_text())
 
     # Heuristic: first paragraph that looks like a description
-    for p in soup.find_all("p"):
+    for p in idx.tags("p"):
         text = clean(p.get_text())
         if not text or len(text) <= 50:
             continue
-        skip = ("photo", "credit", "advertisement", "subscribe", "newsletter",
-                "follow", "save", "print", "share", "rate", "review", "comment")
-        if any(s in text.lower() for s in skip):
+        if _DESCRIPTION_SKIP.search(text):
             continue
-        keywords = ("recipe", "dish", "delicious", "flavor", "taste", "cook",
-                    "make", "best", "perfect", "easy", "simple", "ingredients",
-                    "this", "it's", "you'll")
-        if any(k in text.lower() for k in keywords):
+        if _DESCRIPTION_KEYWORDS.search(text):
             return text
     return ""
 
@@ -120,12 +139,13 @@ def _fallback_time_servings(soup: BeautifulSoup) -> tuple[str | None, str | None
     cooking_time = None
     servings = None
 
+    idx = page_index(soup)
     for selector in (
         ".mm-recipes-details__item",
         ".recipe-details-item",
         ".mntl-recipe-details__item",
     ):
-        for item in soup.select(selector):
+        for item in idx.select(selector):
             label_elem = item.find(class_=lambda c: c and "label" in c)
             value_elem = item.find(class_=lambda c: c and "value" in c)
             if not label_elem or not value_elem:
@@ -149,40 +169,41 @@ def _fallback_allrecipes_image(soup: BeautifulSoup) -> str | None:
         ".hero-image img",
         "img[src*='allrecipes']",
     ]
+    idx = page_index(soup)
     for sel in selectors:
-        elem = soup.select_one(sel)
+        elem = idx.select_one(sel)
         if elem:
             src = elem.get("src") or elem.get("data-src")
             if src:
-                if "allrecipes.com" in src and "/filters:" in src:
-                    base = src.split("/filters:")[0]
-                    return base or src
-                return src
+                return resolve_image_url(src)
     return None
 
 
-def scrape_allrecipes(soup: BeautifulSoup) -> dict:
-    ld = extract_jsonld_recipe(soup)
+def scrape_allrecipes(soup: BeautifulSoup, fields: frozenset[str] | None = None) -> Recipe:
+    ld = extract_jsonld_recipe(soup, fields)
 
     # HTML fallbacks for anything JSON-LD missed
-    if not ld["title"] or ld["title"] == "Untitled":
-        ld["title"] = fallback_title(soup)
-    if not ld["notes"]:
-        ld["notes"] = _fallback_description(soup)
-    if not ld["ingredients"]:
-        ld["ingredients"] = _fallback_ingredients(soup)
-    if not ld["instructions"]:
-        ld["instructions"] = _fallback_instructions(soup)
-
-    ct, sv = _fallback_time_servings(soup)
-    if not ld["cooking_time"]:
-        ld["cooking_time"] = ct
-    if not ld["servings"]:
-        ld["servings"] = sv
-
-    if not ld["image_url"]:
-        ld["image_url"] = fallback_image(soup) or _fallback_allrecipes_image(soup)
-    if ld["rating"] is None:
-        ld["rating"] = fallback_rating(soup)
+    if wants(fields, "title") and (not ld.title or ld.title == "Untitled"):
+        ld.title = fallback_title(soup)
+    if wants(fields, "notes") and not ld.notes:
+        ld.notes = _fallback_description(soup)
+    if wants(fields, "ingredients") and not ld.ingredients:
+        ld.ingredients = _fallback_ingredients(soup)
+    if wants(fields, "instructions") and not ld.instructions:
+        ld.instructions = _fallback_instructions(soup)
+
+    need_ct = wants(fields, "cooking_time") and not ld.cooking_time
+    need_sv = wants(fields, "servings") and not ld.servings
+    if need_ct or need_sv:
+        ct, sv = _fallback_time_servings(soup)
+        if need_ct:
+            ld.cooking_time = ct
+        if need_sv:
+            ld.servings = sv
+
+    if wants(fields, "image_url") and not ld.image_url:
+        ld.image_url = fallback_image(soup) or _fallback_allrecipes_image(soup)
+    if wants(fields, "rating") and ld.rating is None:
+        ld.rating = fallback_rating(soup)
 
     return finalise_recipe(ld)
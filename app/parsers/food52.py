@@ -4,21 +4,22 @@ from __future__ import annotations
 
 from bs4 import BeautifulSoup
 
+from app.models import Recipe, wants
 from app.parsers.jsonld import extract_jsonld_recipe
 from app.parsers.base import fallback_title, fallback_image, fallback_description, finalise_recipe
 
 
-def scrape_food52(soup: BeautifulSoup) -> dict:
-    ld = extract_jsonld_recipe(soup)
+def scrape_food52(soup: BeautifulSoup, fields: frozenset[str] | None = None) -> Recipe:
+    ld = extract_jsonld_recipe(soup, fields)
 
-    if not ld["image_url"]:
-        ld["image_url"] = fallback_image(soup)
+    if wants(fields, "image_url") and not ld.image_url:
+        ld.image_url = fallback_image(soup)
 
-    if not ld["title"]:
-        ld["title"] = fallback_title(soup)
+    if wants(fields, "title") and not ld.title:
+        ld.title = fallback_title(soup)
 
-    if not ld["notes"]:
-        ld["notes"] = fallback_description(soup, [
+    if wants(fields, "notes") and not ld.notes:
+        ld.notes = fallback_description(soup, [
             ".recipe__description p",
             ".recipe__description",
             'meta[property="og:description"]',
@@ -5,60 +5,76 @@ from __future__ import annotations
 import re
 from bs4 import BeautifulSoup
 
+from app.keywords import KeywordClassifier
 from app.utils import clean
+from app.images import resolve_image_url
+from app.models import Recipe, wants
 from app.parsers.jsonld import extract_jsonld_recipe
+from app.parsers.index import page_index
 from app.parsers.base import fallback_title, fallback_image, finalise_recipe
 
 
 def _fallback_description(soup: BeautifulSoup) -> str:
     """Food.com often wraps the submitter description in quotes."""
-    for p in soup.find_all("p"):
+    for p in page_index(soup).tags("p"):
         text = clean(p.get_text())
         if text and text.startswith('"') and text.endswith('"') and len(text) > 20:
             return text.strip('"')
     return ""
 
 
+_INGREDIENT_KEYWORDS = KeywordClassifier(
+    noise=("recipe", "photo", "view", "more", "sign", "follow", "advertisement"),
+    measure=(
+        "cup", "cups", "teaspoon", "tablespoon", "pound", "ounce",
+        "gram", "ml", "tsp", "tbsp", "lb", "oz", "clove", "slice",
+        "piece", "inch", "½", "¼", "¾", "1/2", "1/4", "3/4",
+        "can", "package", "frozen", "fresh",
+    ),
+)
+
+_INSTRUCTION_KEYWORDS = KeywordClassifier(
+    noise=("cup", "teaspoon", "tablespoon", "ounce", "pound", "recipe", "photo", "view"),
+    action=(
+        "heat", "cook", "bake", "mix", "stir", "add", "combine", "place",
+        "pour", "cover", "simmer", "boil", "fry", "saute", "preheat", "spray", "season",
+    ),
+)
+
+
+def _li_texts(soup: BeautifulSoup, min_len: int) -> list[tuple]:
+    """(li, cleaned text) pairs for every <li> with at least *min_len* chars."""
+    pairs = [(li, clean(li.get_text())) for li in page_index(soup).tags("li")]
+    return [(li, text) for li, text in pairs if text and len(text) >= min_len]
+
+
+# Food.com links ingredient names to /about/<ingredient>-<id> pages
+_ABOUT_LINK_RE = re.compile(r"/about/[\w-]+")
+
+
 def _fallback_ingredients(soup: BeautifulSoup) -> list[str]:
+    pairs = [(li, text) for li, text in _li_texts(soup, 3) if not li.find_parent(("nav", "header", "footer"))]
+    texts = [text for _, text in pairs]
+    flags = _INGREDIENT_KEYWORDS.classify(texts)
+    actions = _INSTRUCTION_KEYWORDS.classify(texts)["action"]
     found = []
-    for li in soup.select("li"):
-        text = clean(li.get_text())
-        if not text or len(text) < 3:
-            continue
-        if any(w in text.lower() for w in (
-            "recipe", "photo", "view", "more", "sign", "follow", "advertisement",
-        )):
+    for (li, text), noise, measure, action in zip(pairs, flags["noise"], flags["measure"], actions):
+        # Steps mention numbers too ("bake 40 minutes"), but rarely a measure
+        if noise or (action and not measure):
             continue
-        has_measure = any(w in text.lower() for w in (
-            "cup", "cups", "teaspoon", "tablespoon", "pound", "ounce",
-            "gram", "ml", "tsp", "tbsp", "lb", "oz", "clove", "slice",
-            "piece", "inch", "½", "¼", "¾", "1/2", "1/4", "3/4",
-            "can", "package", "frozen", "fresh",
-        ))
-        has_number = bool(re.search(r"\d", text))
-        has_food_link = li.find("a", href=lambda x: x and "/about/" in x)
-        if has_measure or has_number or has_food_link:
+        if measure or re.search(r"\d", text) or li.find("a", href=_ABOUT_LINK_RE):
             found.append(text)
     return found if len(found) >= 3 else []
 
 
 def _fallback_instructions(soup: BeautifulSoup) -> list[str]:
-    action_words = (
-        "heat", "cook", "bake", "mix", "stir", "add", "combine", "place",
-        "pour", "cover", "simmer", "boil", "fry", "saute", "preheat", "spray", "season",
-    )
-    found = []
-    for li in soup.select("li"):
-        text = clean(li.get_text())
-        if not text or len(text) < 10:
-            continue
-        if any(w in text.lower() for w in (
-            "cup", "teaspoon", "tablespoon", "ounce", "pound", "recipe", "photo", "view",
-        )):
-            continue
-        if any(a in text.lower() for a in action_words):
-            found.append(text)
-    return found
+    pairs = _li_texts(soup, 10)
+    flags = _INSTRUCTION_KEYWORDS.classify([text for _, text in pairs])
+    return [
+        text
+        for (_, text), noise, action in zip(pairs, flags["noise"], flags["action"])
+        if not noise and action
+    ]
 
 
 def _fallback_time_servings(soup: BeautifulSoup) -> tuple[str | None, str | None]:
@@ -86,12 +102,9 @@ def _fallback_food_com_image(soup: BeautifulSoup) -> str | None:
     if main_img:
         src = main_img.get("src")
         if src and "sndimg.com" in src:
-            if "w_960" in src:
-                return src.replace("w_960", "w_1200")
-            if "w_744" in src:
-                return src.replace("w_744", "w_1200")
-            return src
+            return resolve_image_url(src)
 
+    idx = page_index(soup)
     for sel in (
         "img[src*='sndimg.com']",
         "img[src*='recipe']",
@@ -99,33 +112,36 @@ def _fallback_food_com_image(soup: BeautifulSoup) -> str | None:
         ".recipe-image img",
         "img[alt*='photo']",
     ):
-        elem = soup.select_one(sel)
+        elem = idx.select_one(sel)
         if elem:
             src = elem.get("src") or elem.get("data-src")
             if src and ("sndimg.com" in src or "food.com" in src):
-                return src
+                return resolve_image_url(src)
     return None
 
 
-def scrape_food_com(soup: BeautifulSoup) -> dict:
-    ld = extract_jsonld_recipe(soup)
-
-    if not ld["title"]:
-        ld["title"] = fallback_title(soup)
-    if not ld["notes"]:
-        ld["notes"] = _fallback_description(soup)
-    if not ld["ingredients"]:
-        ld["ingredients"] = _fallback_ingredients(soup)
-    if not ld["instructions"]:
-        ld["instructions"] = _fallback_instructions(soup)
-
-    ct, sv = _fallback_time_servings(soup)
-    if not ld["cooking_time"]:
-        ld["cooking_time"] = ct
-    if not ld["servings"]:
-        ld["servings"] = sv
-
-    if not ld["image_url"]:
-        ld["image_url"] = fallback_image(soup) or _fallback_food_com_image(soup)
+def scrape_food_com(soup: BeautifulSoup, fields: frozenset[str] | None = None) -> Recipe:
+    ld = extract_jsonld_recipe(soup, fields)
+
+    if wants(fields, "title") and not ld.title:
+        ld.title = fallback_title(soup)
+    if wants(fields, "notes") and not ld.notes:
+        ld.notes = _fallback_description(soup)
+    if wants(fields, "ingredients") and not ld.ingredients:
+        ld.ingredients = _fallback_ingredients(soup)
+    if wants(fields, "instructions") and not ld.instructions:
+        ld.instructions = _fallback_instructions(soup)
+
+    need_ct = wants(fields, "cooking_time") and not ld.cooking_time
+    need_sv = wants(fields, "servings") and not ld.servings
+    if need_ct or need_sv:
+        ct, sv = _fallback_time_servings(soup)
+        if need_ct:
+            ld.cooking_time = ct
+        if need_sv:
+            ld.servings = sv
+
+    if wants(fields, "image_url") and not ld.image_url:
+        ld.image_url = fallback_image(soup) or _fallback_food_com_image(soup)
 
     return finalise_recipe(ld)
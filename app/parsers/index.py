@@ -0,0 +1,164 @@
+"""One-pass index over a parsed page, shared by all HTML fallbacks.
+
+Fallback helpers used to run a fresh full-document ``find``/``select`` for
+every selector they tried.  `page_index` walks the soup once and records
+meta tags, elements by tag name, class token and itemprop; `PageIndex.select`
+then answers the simple selectors the parsers use from those tables and only
+hands anything more exotic to soupsieve.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+
+from bs4 import BeautifulSoup, Tag
+
+# tag, tag.class, .class or tag[class*='x'] -- optionally "ANCESTOR DESCENDANT"
+_SIMPLE_RE = re.compile(
+    r"""^(?P<tag>[a-z][a-z0-9]*)?
+        (?:\.(?P<cls>[\w-]+)|\[class\*=['"](?P<sub>[^'"\s]+)['"]\])?$""",
+    re.X,
+)
+
+
+class _Simple:
+    """A parsed simple selector (tag name and/or one class condition)."""
+
+    __slots__ = ("tag", "cls", "sub")
+
+    def __init__(self, tag: str | None, cls: str | None, sub: str | None):
+        self.tag = tag
+        self.cls = cls
+        self.sub = sub
+
+    def matches(self, el: Tag) -> bool:
+        if self.tag and el.name != self.tag:
+            return False
+        if self.cls or self.sub:
+            classes = el.get("class") or ()
+            if self.cls and self.cls not in classes:
+                return False
+            if self.sub and not any(self.sub in c for c in classes):
+                return False
+        return True
+
+
+def _parse_simple(part: str) -> _Simple | None:
+    m = _SIMPLE_RE.match(part)
+    if not m or not any(m.groups()):
+        return None
+    return _Simple(m.group("tag"), m.group("cls"), m.group("sub"))
+
+
+class PageIndex:
+    """Lookup tables built from a single walk over a soup."""
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self.meta_property: dict[str, Tag] = {}
+        self.meta_name: dict[str, Tag] = {}
+        self.by_tag: dict[str, list[Tag]] = defaultdict(list)
+        self.by_class: dict[str, list[Tag]] = defaultdict(list)
+        self.by_itemprop: dict[str, list[Tag]] = defaultdict(list)
+        self._pos: dict[int, int] = {}
+        self._selector_cache: dict[str, list[Tag] | None] = {}
+        self._build()
+
+    def _build(self) -> None:
+        # Explicit stack (children pushed reversed) keeps document order
+        # without recursion on deeply nested markup.
+        stack = [c for c in reversed(self.soup.contents) if isinstance(c, Tag)]
+        n = 0
+        while stack:
+            el = stack.pop()
+            self._pos[id(el)] = n
+            n += 1
+            name = el.name
+            self.by_tag[name].append(el)
+            attrs = el.attrs
+            for cls in attrs.get("class") or ():
+                self.by_class[cls].append(el)
+            prop = attrs.get("itemprop")
+            if prop:
+                self.by_itemprop[prop].append(el)
+            if name == "meta":
+                if "property" in attrs:
+                    self.meta_property.setdefault(attrs["property"], el)
+                if "name" in attrs:
+                    self.meta_name.setdefault(attrs["name"], el)
+            stack.extend(c for c in reversed(el.contents) if isinstance(c, Tag))
+
+    # --- lookups ---
+
+    def tags(self, name: str) -> list[Tag]:
+        """Every *name* element in document order."""
+        return self.by_tag.get(name, [])
+
+    def first(self, name: str) -> Tag | None:
+        found = self.by_tag.get(name)
+        return found[0] if found else None
+
+    def meta(self, *, property: str | None = None, name: str | None = None) -> str | None:
+        """The ``content`` of the first matching <meta>, like ``soup.find("meta", ...)``."""
+        tag = self.meta_property.get(property) if property else self.meta_name.get(name)
+        return tag.get("content") if tag is not None else None
+
+    def itemprop(self, prop: str) -> Tag | None:
+        found = self.by_itemprop.get(prop)
+        return found[0] if found else None
+
+    def _candidates(self, simple: _Simple) -> list[Tag]:
+        if simple.cls:
+            pool = self.by_class.get(simple.cls, [])
+        elif simple.sub:
+            seen: dict[int, Tag] = {}
+            for cls, els in self.by_class.items():
+                if simple.sub in cls:
+                    for el in els:
+                        seen[id(el)] = el
+            pool = sorted(seen.values(), key=lambda el: self._pos[id(el)])
+        else:
+            pool = self.by_tag.get(simple.tag, [])
+        return [el for el in pool if simple.matches(el)]
+
+    def _select_indexed(self, selector: str) -> list[Tag] | None:
+        parts = selector.split()
+        if not 1 <= len(parts) <= 2:
+            return None
+        simples = [_parse_simple(p) for p in parts]
+        if any(s is None for s in simples):
+            return None
+        found = self._candidates(simples[-1])
+        if len(simples) == 2:
+            outer = simples[0]
+            found = [el for el in found if any(outer.matches(p) for p in el.parents if isinstance(p, Tag))]
+        return found
+
+    def select(self, selector: str) -> list[Tag]:
+        """Equivalent of ``soup.select(selector)``, served from the index when
+        the selector is simple enough."""
+        if selector not in self._selector_cache:
+            self._selector_cache[selector] = self._select_indexed(selector)
+        found = self._selector_cache[selector]
+        if found is None:
+            return self.soup.select(selector)
+        return found
+
+    def select_one(self, selector: str) -> Tag | None:
+        if selector not in self._selector_cache:
+            self._selector_cache[selector] = self._select_indexed(selector)
+        found = self._selector_cache[selector]
+        if found is None:
+            return self.soup.select_one(selector)
+        return found[0] if found else None
+
+
+def page_index(soup: BeautifulSoup) -> PageIndex:
+    """Return the (cached) index for *soup*, building it on first use."""
+    # Go through __dict__: attribute access on a Tag falls back to find()
+    idx = soup.__dict__.get("_page_index")
+    if idx is None:
+        idx = PageIndex(soup)
+        soup.__dict__["_page_index"] = idx
+    return idx
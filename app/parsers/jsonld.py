@@ -1,20 +1,39 @@
 """Generic JSON-LD Recipe extractor.
 
 Most recipe sites embed structured data in <script type="application/ld+json">
-blocks.  This module provides a single function that extracts a normalised
-recipe dict from any page that follows the schema.org/Recipe spec.
+blocks.  `extract_jsonld_recipe` extracts a normalised `Recipe` from any page
+that follows the schema.org/Recipe spec; `extract_jsonld_recipes` returns
+every Recipe on the page and `extract_itemlist_urls` the recipes a
+collection page links to.
 """
 
 from __future__ import annotations
 
+import html
 import json
+import re
+from dataclasses import replace
+
+import orjson
 from bs4 import BeautifulSoup
 
+from app.images import pick_image
+from app.models import Recipe, wants
+from app.parsers.index import page_index
 from app.utils import clean, clean_ingredient_decimals, iso_duration_to_short, to_float
 
 
+# '"@type": "Recipe"' or '"@type": ["Recipe", ...]', any case
+_RECIPE_TYPE_RE = re.compile(r'"@type"\s*:\s*(?:\[[^\]]*)?"recipe"', re.I)
+_ITEMLIST_TYPE_RE = re.compile(r'"@type"\s*:\s*(?:\[[^\]]*)?"itemlist"', re.I)
+
+
 def _html_str_to_steps(html_str: str) -> list[str]:
     """Extract step texts from an HTML string (used by recipeInstructions)."""
+    if "<" not in html_str:
+        # Plain text (the common case): no markup to walk, just entities
+        whole = clean(html.unescape(html_str))
+        return [whole] if whole else []
     soup = BeautifulSoup(html_str, "html.parser")
     steps = [clean(li.get_text()) for li in soup.find_all("li") if clean(li.get_text())]
     if steps:
@@ -51,114 +70,164 @@ def _extract_instructions(inst) -> list[str]:
     return steps
 
 
-def _extract_image(img) -> str | None:
-    """Normalise the image field (string, list, or ImageObject).
+def empty_recipe() -> Recipe:
+    """Return a Recipe with all fields set to their empty defaults."""
+    return Recipe()
 
-    When given a list of URLs, pick the last one — sites typically list
-    thumbnails first and the full-size image last.
-    """
-    if isinstance(img, str):
-        return img
-    if isinstance(img, list) and img:
-        # Pick the last (usually largest) image URL
-        last = img[-1]
-        if isinstance(last, str):
-            return last
-        if isinstance(last, dict):
-            return last.get("url")
-    if isinstance(img, dict):
-        return img.get("url")
-    return None
-
-
-def empty_recipe() -> dict:
-    """Return a recipe dict with all fields set to their empty defaults."""
-    return {
-        "title": None,
-        "notes": None,
-        "ingredients": [],
-        "instructions": [],
-        "cooking_time": None,
-        "servings": None,
-        "image_url": None,
-        "rating": None,
-    }
-
-
-def extract_jsonld_recipe(soup: BeautifulSoup) -> dict:
+
+def extract_jsonld_recipe(soup: BeautifulSoup, fields: frozenset[str] | None = None) -> Recipe:
     """Parse every JSON-LD block in *soup* and return the first Recipe found.
 
-    Returns a recipe dict (see `empty_recipe`) with whatever fields were
+    Returns a `Recipe` (see `empty_recipe`) with whatever fields were
     present in the structured data.  Fields that were absent remain ``None``
-    (or empty list).
+    (or empty list).  When *fields* is given, only those fields are filled.
+
+    The result is memoised on the soup (per *fields*), so the streaming
+    endpoint and the site scraper share one parse; callers get their own
+    copy to fill in.
     """
-    out = empty_recipe()
+    # Go through __dict__: attribute access on a Tag falls back to find()
+    memo = soup.__dict__.setdefault("_jsonld_recipes", {})
+    found = memo.get(fields)
+    if found is None:
+        found = memo[fields] = _extract(soup, fields)
+    return replace(found, ingredients=list(found.ingredients), instructions=list(found.instructions))
 
-    for script in soup.find_all("script", type="application/ld+json"):
-        txt = script.string or script.get_text()
-        if not txt:
+
+def _decode(txt: str):
+    """orjson first; the stdlib copes with the raw control characters some
+    sites leave inside strings (``strict=False``)."""
+    try:
+        return orjson.loads(txt)
+    except orjson.JSONDecodeError:
+        return json.loads(txt, strict=False)
+
+
+def _ld_blocks(soup: BeautifulSoup, type_re: re.Pattern):
+    """Yield the text of each ld+json block that declares a *type_re* @type.
+
+    Blocks that don't (breadcrumbs, site and organisation graphs) are
+    skipped without being decoded.
+    """
+    for script in page_index(soup).tags("script"):
+        if script.get("type") != "application/ld+json":
             continue
+        # orjson only accepts an exact str, not bs4's NavigableString
+        txt = str(script.string or script.get_text())
+        if txt and type_re.search(txt):
+            yield txt
+
+
+def _top_level_nodes(data):
+    """The nodes a Recipe may be: the document, its @graph, or list items.
+
+    Nested values (``review``, ``comment``, ``author`` ...) are never walked.
+    """
+    if isinstance(data, dict):
+        yield data
+        graph = data.get("@graph")
+        if isinstance(graph, list):
+            yield from graph
+    elif isinstance(data, list):
+        yield from data
+
+
+def _is_type(node, name: str) -> bool:
+    t = node.get("@type")
+    types = [t] if isinstance(t, str) else (t or [])
+    return any(str(x).lower() == name for x in types)
+
+
+def _typed_nodes(soup: BeautifulSoup, type_re: re.Pattern, name: str):
+    """Yield every top-level ld+json node whose @type includes *name*."""
+    for txt in _ld_blocks(soup, type_re):
         try:
-            data = json.loads(txt, strict=False)
-        except (json.JSONDecodeError, ValueError):
+            data = _decode(txt)
+        except ValueError:
             continue
+        for node in _top_level_nodes(data):
+            if isinstance(node, dict) and _is_type(node, name):
+                yield node
+
 
-        candidates: list[dict] = []
-        if isinstance(data, dict):
-            candidates.append(data)
-            if "@graph" in data and isinstance(data["@graph"], list):
-                candidates.extend(data["@graph"])
-        elif isinstance(data, list):
-            candidates.extend(data)
-
-        for node in candidates:
-            if not isinstance(node, dict):
-                continue
-            t = node.get("@type")
-            types = [t] if isinstance(t, str) else (t or [])
-            if not any(str(x).lower() == "recipe" for x in types):
-                continue
-
-            # --- populate fields from the first Recipe node ---
-            out["title"] = out["title"] or clean(node.get("name"))
-            out["notes"] = out["notes"] or clean(node.get("description"))
-
-            out["image_url"] = out["image_url"] or _extract_image(node.get("image"))
-
-            ings = node.get("recipeIngredient") or node.get("ingredients")
-            if ings and not out["ingredients"]:
-                if isinstance(ings, list):
-                    out["ingredients"] = [
-                        clean_ingredient_decimals(clean(i))
-                        for i in ings
-                        if clean(i)
-                    ]
-                else:
-                    val = clean_ingredient_decimals(clean(str(ings)))
-                    if val:
-                        out["ingredients"] = [val]
-
-            inst = node.get("recipeInstructions")
-            if inst and not out["instructions"]:
-                out["instructions"] = _extract_instructions(inst)
-
-            total = node.get("totalTime") or node.get("cookTime") or node.get("prepTime")
-            if total and not out["cooking_time"]:
-                out["cooking_time"] = iso_duration_to_short(clean(total))
-
-            ry = node.get("recipeYield")
-            if ry and not out["servings"]:
-                if isinstance(ry, list):
-                    # Pick the most descriptive entry (e.g. "4 servings" over "4")
-                    candidates = [clean(str(x)) for x in ry if clean(str(x))]
-                    out["servings"] = max(candidates, key=len) if candidates else None
-                else:
-                    out["servings"] = clean(str(ry))
-
-            agg = node.get("aggregateRating")
-            if isinstance(agg, dict) and out["rating"] is None:
-                out["rating"] = to_float(agg.get("ratingValue"))
-
-            return out  # first Recipe node is enough
+def _extract(soup: BeautifulSoup, fields: frozenset[str] | None) -> Recipe:
+    # The first Recipe node is enough
+    for node in _typed_nodes(soup, _RECIPE_TYPE_RE, "recipe"):
+        return _from_node(node, fields)
+    return empty_recipe()
+
+
+def _from_node(node: dict, fields: frozenset[str] | None) -> Recipe:
+    """A `Recipe` from one schema.org Recipe node."""
+    out = empty_recipe()
+
+    if wants(fields, "title"):
+        out.title = clean(node.get("name"))
+    if wants(fields, "notes"):
+        out.notes = clean(node.get("description"))
+
+    if wants(fields, "image_url"):
+        out.image_url = pick_image(node.get("image"))
+
+    ings = None
+    if wants(fields, "ingredients"):
+        ings = node.get("recipeIngredient") or node.get("ingredients")
+    if ings:
+        if isinstance(ings, list):
+            out.ingredients = [
+                clean_ingredient_decimals(clean(i))
+                for i in ings
+                if clean(i)
+            ]
+        else:
+            val = clean_ingredient_decimals(clean(str(ings)))
+            if val:
+                out.ingredients = [val]
+
+    inst = node.get("recipeInstructions") if wants(fields, "instructions") else None
+    if inst:
+        out.instructions = _extract_instructions(inst)
+
+    total = None
+    if wants(fields, "cooking_time"):
+        total = node.get("totalTime") or node.get("cookTime") or node.get("prepTime")
+    if total:
+        out.cooking_time = iso_duration_to_short(clean(total))
+
+    ry = node.get("recipeYield") if wants(fields, "servings") else None
+    if ry:
+        if isinstance(ry, list):
+            # Pick the most descriptive entry (e.g. "4 servings" over "4")
+            candidates = [clean(str(x)) for x in ry if clean(str(x))]
+            out.servings = max(candidates, key=len) if candidates else None
+        else:
+            out.servings = clean(str(ry))
+
+    agg = node.get("aggregateRating")
+    if isinstance(agg, dict) and wants(fields, "rating"):
+        out.rating = to_float(agg.get("ratingValue"))
 
     return out
+
+
+def extract_jsonld_recipes(soup: BeautifulSoup, fields: frozenset[str] | None = None) -> list[Recipe]:
+    """Every Recipe node in *soup*, in page order (roundups, collections,
+    sub-recipes for sauces ...).  The first is what `extract_jsonld_recipe`
+    returns."""
+    return [_from_node(node, fields) for node in _typed_nodes(soup, _RECIPE_TYPE_RE, "recipe")]
+
+
+def extract_itemlist_urls(soup: BeautifulSoup) -> list[str]:
+    """The URLs an ld+json ItemList links to (a collection's recipes), in
+    list order and without duplicates.  May be relative."""
+    urls: dict[str, None] = {}
+    for node in _typed_nodes(soup, _ITEMLIST_TYPE_RE, "itemlist"):
+        elements = node.get("itemListElement")
+        for el in elements if isinstance(elements, list) else [elements]:
+            # "url", a ListItem's "url", or its "item" (a URL or a node)
+            if isinstance(el, dict):
+                item = el.get("item")
+                el = el.get("url") or (item.get("url") or item.get("@id") if isinstance(item, dict) else item)
+            if isinstance(el, str) and el.strip():
+                urls[el.strip()] = None
+    return list(urls)
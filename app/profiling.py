@@ -0,0 +1,162 @@
+"""Opt-in per-function profiling of the scrapers.
+
+A request is profiled when it sends ``X-Profile: 1`` or falls in the
+PROFILE_SAMPLE_RATE fraction of requests.  While its scraper runs, a
+``sys.setprofile`` hook times every call into ``app/parsers/*`` and
+``app/utils.py`` (time spent in bs4 and other libraries counts towards the
+caller), and the self time of each call stack is added up process-wide.
+
+`collapsed` exports those totals in the collapsed-stack format that
+flamegraph.pl / speedscope / inferno read (one ``frame;frame;frame
+<microseconds>`` per line); `functions` gives per-function totals.  When a
+request isn't profiled the only cost is one context-variable lookup.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from app import metrics
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Distinct call stacks kept; further new stacks are folded into their root
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "10000"))
+
+_APP_DIR = Path(__file__).resolve().parent
+_PARSERS_DIR = str(_APP_DIR / "parsers") + os.sep
+_UTILS_FILE = str(_APP_DIR / "utils.py")
+
+_GENERATOR_FLAGS = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+_profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+_lock = threading.Lock()
+_stacks: dict[str, float] = defaultdict(float)
+# name -> [calls, total seconds, self seconds]
+_functions: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+# code object -> frame name, or None if it isn't profiled
+_names: dict = {}
+
+
+def want_profile(header: str | None) -> bool:
+    """Decide (and remember for this request's context) whether to profile."""
+    on = header is not None and header.lower() in ("1", "true", "yes")
+    if not on and PROFILE_SAMPLE_RATE > 0:
+        on = random.random() < PROFILE_SAMPLE_RATE
+    if on:
+        _profiling.set(True)
+    return on
+
+
+def _frame_name(code) -> str | None:
+    name = _names.get(code, False)
+    if name is False:
+        path = code.co_filename
+        if path.startswith(_PARSERS_DIR):
+            name = f"parsers.{Path(path).stem}.{code.co_qualname}"
+        elif path == _UTILS_FILE:
+            name = f"utils.{code.co_qualname}"
+        else:
+            name = None
+        _names[code] = name
+    return name
+
+
+class _Recorder:
+    """The ``sys.setprofile`` hook for one profiled scrape on one thread.
+
+    Every resumption of a generator is a call/return pair to the hook; its
+    time is recorded each time, but only the first entry counts as a call.
+    """
+
+    def __init__(self, root: str):
+        # [frame, name, started_at, child_seconds, first_entry]
+        self.stack: list[list] = []
+        # Generator frames already entered once
+        self._entered: set = set()
+        self.root = root
+        self.stacks: dict[str, float] = defaultdict(float)
+        self.functions: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def __call__(self, frame, event, arg):
+        if event == "call":
+            name = _frame_name(frame.f_code)
+            if name is not None:
+                first = True
+                if frame.f_code.co_flags & _GENERATOR_FLAGS:
+                    first = frame not in self._entered
+                    self._entered.add(frame)
+                self.stack.append([frame, name, time.perf_counter(), 0.0, first])
+        elif event == "return" and self.stack and self.stack[-1][0] is frame:
+            _, name, started, child, first = self.stack.pop()
+            total = time.perf_counter() - started
+            path = ";".join([self.root, *(entry[1] for entry in self.stack), name])
+            self.stacks[path] += total - child
+            fn = self.functions[name]
+            fn[0] += first
+            fn[1] += total
+            fn[2] += total - child
+            if self.stack:
+                self.stack[-1][3] += total
+
+    def merge(self) -> None:
+        with _lock:
+            for path, seconds in self.stacks.items():
+                if path not in _stacks and len(_stacks) >= PROFILE_MAX_STACKS:
+                    path = self.root
+                _stacks[path] += seconds
+            for name, (calls, total, own) in self.functions.items():
+                fn = _functions[name]
+                fn[0] += calls
+                fn[1] += total
+                fn[2] += own
+
+
+@contextmanager
+def profile(root: str):
+    """Profile the block if this request opted in; *root* names the base
+    frame of every recorded stack (e.g. the site's domain)."""
+    if not _profiling.get():
+        yield
+        return
+    metrics.incr("profile.sessions")
+    recorder = _Recorder(root)
+    previous = sys.getprofile()
+    sys.setprofile(recorder)
+    try:
+        yield
+    finally:
+        sys.setprofile(previous)
+        recorder.merge()
+
+
+def collapsed() -> str:
+    """Recorded stacks as ``frame;frame <microseconds>`` lines."""
+    with _lock:
+        items = sorted(_stacks.items())
+    return "".join(f"{path} {round(seconds * 1e6)}\n" for path, seconds in items if seconds > 0)
+
+
+def functions() -> list[dict]:
+    """Per-function call counts and total/self milliseconds, slowest first."""
+    with _lock:
+        items = [(name, *values) for name, values in _functions.items()]
+    return [
+        {"function": name, "calls": calls, "total_ms": round(total * 1e3, 3), "self_ms": round(own * 1e3, 3)}
+        for name, calls, total, own in sorted(items, key=lambda item: -item[3])
+    ]
+
+
+def reset() -> None:
+    with _lock:
+        _stacks.clear()
+        _functions.clear()
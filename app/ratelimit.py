@@ -0,0 +1,61 @@
+"""Per-domain politeness for background fetches (refreshes, cache warming)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import orjson
+
+from app import metrics
+from app.state import StateBackend, state
+
+# Minimum gap between two background fetches to the same domain
+DOMAIN_MIN_INTERVAL_SECONDS = float(os.getenv("DOMAIN_MIN_INTERVAL_SECONDS", "2"))
+
+_PREFIX = "ratelimit:"
+
+
+class DomainRateLimiter:
+    """Spaces out requests per domain by at least ``min_interval`` seconds.
+
+    Callers reserve the next free slot for their domain and sleep until it
+    comes round, so concurrent callers queue up in order rather than race.
+    Slots are kept in the state backend, so with a shared backend the
+    interval holds across all workers rather than per worker.
+    """
+
+    def __init__(self, min_interval: float = DOMAIN_MIN_INTERVAL_SECONDS, backend: StateBackend = state):
+        self.min_interval = min_interval
+        self.backend = backend
+
+    def reserve(self, domain: str) -> float:
+        """Claim the next slot for *domain*; returns seconds to wait for it."""
+        def step(blob):
+            now = time.time()
+            slot = max(now, orjson.loads(blob) if blob is not None else 0.0)
+            return orjson.dumps(slot + self.min_interval), slot - now
+
+        # Outlives any realistic queue of reserved slots; only bounds leftovers
+        return self.backend.update(f"{_PREFIX}{domain}", step, ttl=86400)
+
+    async def acquire(self, domain: str) -> None:
+        wait = self.reserve(domain)
+        if wait > 0:
+            metrics.incr("ratelimit.waits")
+            await asyncio.sleep(wait)
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        queued = {}
+        for key, blob in self.backend.scan(_PREFIX):
+            # The stored value is the slot after the last reserved one
+            last_slot = orjson.loads(blob) - self.min_interval
+            if last_slot > now:
+                queued[key[len(_PREFIX):]] = round(last_slot - now, 2)
+        return {"min_interval": self.min_interval, "queued_seconds": queued}
+
+
+domain_limiter = DomainRateLimiter()
+metrics.register_collector("ratelimit", domain_limiter.snapshot)
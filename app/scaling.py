@@ -0,0 +1,33 @@
+"""Server-side servings scaling of an already-parsed recipe."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+from app.ingredients import scale_ingredient
+from app.models import Recipe
+from app.utils import to_float
+
+
+def servings_count(servings: str | None) -> float | None:
+    """The number of servings a yield string declares ("4 servings" -> 4)."""
+    value = to_float(servings)
+    return value if value and value > 0 else None
+
+
+def scale_recipe(recipe: Recipe, target: float, structured: bool = False) -> Recipe:
+    """Return a copy of *recipe* with ingredient quantities scaled to *target*
+    servings.  Raises ``ValueError`` if the recipe doesn't declare its yield.
+    """
+    base = servings_count(recipe.servings)
+    if base is None:
+        raise ValueError("Recipe does not declare its servings, so it can't be scaled")
+    factor = target / base
+    scaled = [scale_ingredient(line, factor) for line in recipe.ingredients]
+    label = f"{target:g} servings"
+    return replace(
+        recipe,
+        ingredients=[line for line, _ in scaled],
+        servings=label,
+        ingredients_parsed=[parsed for _, parsed in scaled] if structured else recipe.ingredients_parsed,
+    )
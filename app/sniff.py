@@ -0,0 +1,72 @@
+"""Cheap classification of fetched pages from the first few KB of raw bytes.
+
+Used by the fetch cascade to tell a real recipe page apart from bot
+challenges, consent walls and soft 404s before any DOM parsing happens.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+
+# How much of the body to inspect.  Challenge pages are tiny and recipe
+# sites put their ld+json in <head>, so the first chunk is enough.
+SNIFF_BYTES = int(os.getenv("SNIFF_BYTES", str(256 * 1024)))
+
+RECIPE = "recipe"
+ARTICLE = "article"
+CHALLENGE = "challenge"
+CONSENT = "consent"
+NOT_FOUND = "not_found"
+UNKNOWN = "unknown"
+
+# Kinds a fetch strategy can stop on; anything else means "try the next one".
+# An UNKNOWN page is still a real response, just not one we recognise.
+ACCEPTABLE = frozenset({RECIPE, ARTICLE, NOT_FOUND, UNKNOWN})
+
+# Bot-protection interstitials (Cloudflare, Akamai, PerimeterX, DataDome,
+# Imperva, Sucuri, DDoS-Guard).  Matched against the lowercased head.
+_CHALLENGE_RE = re.compile(
+    rb"cf-browser-verification|cf_chl_"
+    rb"|<title>just a moment\.\.\.</title>|<title>attention required! \| cloudflare</title>"
+    rb"|cf-error-details|checking your browser before accessing|enable javascript and cookies to continue"
+    rb"|px-captcha|_pxcaptcha|captcha-delivery\.com|geo\.captcha-delivery"
+    rb"|_incapsula_resource|sucuri website firewall|ddos-guard"
+    rb"|<title>access denied</title>|errors\.edgesuite\.net"
+)
+
+_RECIPE_RE = re.compile(
+    rb'recipeingredient|recipeinstructions|schema\.org/recipe'
+    rb'|"@type"\s*:\s*"recipe"|"@type"\s*:\s*\[[^\]]*"recipe"'
+)
+
+# Consent-only walls: the page is nothing but a cookie/GDPR gate.
+_CONSENT_RE = re.compile(
+    rb"consent\.yahoo\.com|consent\.google\.com|<title>before you continue"
+    rb"|guce\.advertising\.com|<form[^>]+action=\"[^\"]*consent"
+)
+
+_NOT_FOUND_RE = re.compile(
+    rb"<title>[^<]*(?:404|page not found|not found|page unavailable|no longer available)[^<]*</title>"
+    rb"|<h1[^>]*>\s*(?:404|page not found|oops)"
+)
+
+_ARTICLE_RE = re.compile(rb"<h1[\s>]|property=\"og:type\"\s+content=\"article\"")
+
+
+def classify_page(body: bytes, limit: int = SNIFF_BYTES) -> str:
+    """Return one of the page-kind constants for the first *limit* bytes of *body*."""
+    head = body[:limit].lower()
+    # Recipe markers win: challenge pages never carry recipe data, while real
+    # pages sometimes embed bot-protection scripts.
+    if _RECIPE_RE.search(head):
+        return RECIPE
+    if _CHALLENGE_RE.search(head):
+        return CHALLENGE
+    if _CONSENT_RE.search(head):
+        return CONSENT
+    if _NOT_FOUND_RE.search(head):
+        return NOT_FOUND
+    if _ARTICLE_RE.search(head):
+        return ARTICLE
+    return UNKNOWN
@@ -0,0 +1,195 @@
+"""Key/value state shared by every worker process.
+
+The recipe cache, negative cache, circuit breakers and per-domain rate
+limiter all keep their state through a `StateBackend`.  With the default
+in-memory backend each worker has its own copy (the historical behaviour);
+pointing ``STATE_BACKEND`` at a SQLite file makes all workers on the host
+share one.  Values are bytes and every read-modify-write goes through
+`update`, which is the only atomic primitive a backend has to provide -- a
+Redis backend can implement it with WATCH/MULTI or a Lua script.
+
+    STATE_BACKEND=memory                    (default)
+    STATE_BACKEND=sqlite:////var/run/recipes/state.db   (absolute path)
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Protocol, TypeVar
+
+T = TypeVar("T")
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+# Expired entries are swept after this many writes
+_SWEEP_EVERY = 1000
+
+
+class StateBackend(Protocol):
+    def get(self, key: str) -> bytes | None:
+        """The value stored at *key*, or None if absent or expired."""
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store *value*, expiring after *ttl* seconds (None = never)."""
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def update(
+        self,
+        key: str,
+        fn: Callable[[bytes | None], tuple[bytes | None, T]],
+        ttl: float | None = None,
+    ) -> T:
+        """Atomically replace the value at *key*.
+
+        *fn* gets the current value (None if absent) and returns
+        ``(new_value, result)``; a ``new_value`` of None deletes the key.
+        `update` returns *result*.
+        """
+
+    def scan(self, prefix: str) -> list[tuple[str, bytes]]:
+        """Every live ``(key, value)`` whose key starts with *prefix*."""
+
+
+class MemoryBackend:
+    """Process-local dict; what every worker had before shared state."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, bytes]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key: str, now: float) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def _store(self, key: str, value: bytes, ttl: float | None, now: float) -> None:
+        self._data[key] = (now + ttl if ttl is not None else None, value)
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            expired = [k for k, (exp, _) in self._data.items() if exp is not None and exp <= now]
+            for k in expired:
+                del self._data[k]
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._live(key, time.time())
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl, time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key, fn, ttl=None):
+        with self._lock:
+            now = time.time()
+            new, result = fn(self._live(key, now))
+            if new is None:
+                self._data.pop(key, None)
+            else:
+                self._store(key, new, ttl, now)
+            return result
+
+    def scan(self, prefix: str) -> list[tuple[str, bytes]]:
+        with self._lock:
+            now = time.time()
+            keys = [k for k in self._data if k.startswith(prefix)]
+            return [(k, v) for k in keys if (v := self._live(k, now)) is not None]
+
+
+class SqliteBackend:
+    """A SQLite file in WAL mode, shared by every process that opens it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key: str, now: float) -> bytes | None:
+        row = self._conn.execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, key: str, value: bytes, ttl: float | None, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, now + ttl if ttl is not None else None),
+        )
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            self._conn.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._live(key, time.time())
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._write(key, value, ttl, time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def update(self, key, fn, ttl=None):
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes can't
+            # both read the old value and then overwrite each other.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                new, result = fn(self._live(key, now))
+                if new is None:
+                    self._conn.execute("DELETE FROM state WHERE key = ?", (key,))
+                else:
+                    self._write(key, new, ttl, now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def scan(self, prefix: str) -> list[tuple[str, bytes]]:
+        # A key range rather than LIKE, which is case-insensitive in SQLite
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM state WHERE key >= ? AND key < ? "
+                "AND (expires_at IS NULL OR expires_at > ?) ORDER BY key",
+                (prefix, prefix + "\uffff", time.time()),
+            ).fetchall()
+        return [(k, v) for k, v in rows]
+
+
+def make_backend(spec: str = STATE_BACKEND) -> StateBackend:
+    """Build the backend described by a ``STATE_BACKEND`` value."""
+    if spec in ("", "memory"):
+        return MemoryBackend()
+    if spec.startswith("sqlite:///"):
+        return SqliteBackend(spec[len("sqlite:///"):])
+    raise ValueError(f"Unsupported STATE_BACKEND: {spec!r}")
+
+
+def is_shared(backend: StateBackend) -> bool:
+    return not isinstance(backend, MemoryBackend)
+
+
+state = make_backend()
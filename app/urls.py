@@ -0,0 +1,74 @@
+"""URL canonicalisation and cheap "is this a recipe page?" checks.
+
+Both run before any network I/O: canonical URLs make tracking-tagged links
+share one cache entry, and listing, search and archive pages are turned
+away without fetching them.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.parsers import SiteSpec
+
+# Query parameters that only identify the campaign or click, never the page
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "epik", "ncid",
+})
+_TRACKING_PREFIXES = ("utm_",)
+
+# Pages no site serves a recipe on
+_NON_RECIPE_PATH_RE = re.compile(
+    r"/(?:category|categories|tag|tags|author|search|page/\d+|wp-content|wp-admin|feed|about|contact|privacy)(?:/|$)",
+    re.I,
+)
+_SEARCH_PARAMS = frozenset({"s", "q", "query"})
+_SCHEME_RE = re.compile(r"https?://", re.I)
+
+
+def canonicalize(url: str) -> str:
+    """*url* with a scheme, lowercased host, no default port, no fragment
+    and no tracking parameters.  Raises ValueError if it has no host."""
+    url = url.strip()
+    if not _SCHEME_RE.match(url):
+        url = f"https://{url.removeprefix('//')}"
+    parts = urlsplit(url)
+    host = (parts.hostname or "").rstrip(".")
+    if not host:
+        raise ValueError(f"Not a URL: {url}")
+    scheme = parts.scheme.lower()
+    netloc = host
+    if parts.port is not None and parts.port != {"http": 80, "https": 443}[scheme]:
+        netloc = f"{host}:{parts.port}"
+    pairs = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [
+        (k, v) for k, v in pairs
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    # Only re-encode the query when something was dropped from it
+    query = parts.query if len(kept) == len(pairs) else urlencode(kept)
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+@cache
+def _recipe_path_re(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def non_recipe_reason(url: str, site: SiteSpec) -> str | None:
+    """Why *url* (canonical) can't be a recipe page on *site*, or None if
+    it might be one."""
+    parts = urlsplit(url)
+    path = parts.path
+    if any(k in _SEARCH_PARAMS for k, _ in parse_qsl(parts.query)):
+        return "search results"
+    if path.strip("/") == "":
+        return "home page"
+    if _NON_RECIPE_PATH_RE.search(path):
+        return "listing or archive page"
+    if site.recipe_path is not None and not _recipe_path_re(site.recipe_path).search(path):
+        return f"not a recipe URL for {site.domain}"
+    return None
@@ -18,6 +18,8 @@ _UNICODE_MAP = str.maketrans({
     "\u2153": "1/3",         # ⅓ → 1/3
     "\u2154": "2/3",         # ⅔ → 2/3
 })
+# "1½" is one and a half, not "11/2"
+_GLUED_FRACTION_RE = re.compile(r"(\d)(?=[\u00bd\u00bc\u00be\u2153\u2154])")
 
 
 def clean(s):
@@ -25,7 +27,7 @@ def clean(s):
     if not s:
         return ""
     s = html.unescape(s)
-    s = s.translate(_UNICODE_MAP)
+    s = _GLUED_FRACTION_RE.sub(r"\1 ", s).translate(_UNICODE_MAP)
     return re.sub(r"\s+", " ", s).strip()
 
 
@@ -65,6 +67,12 @@ def to_float(txt) -> float | None:
         return None
 
 
+# Long decimals this close to n/2, n/3, n/4 or n/8 are written as that
+# fraction ("0.333333" -> "1/3") instead of being rounded ("0.33")
+_SNAP_DENOMINATORS = (2, 3, 4, 8)
+_SNAP_TOLERANCE = 0.005
+
+
 def clean_ingredient_decimals(ingredient: str) -> str:
     """Round long decimals and convert common decimals to fractions."""
     if not ingredient:
@@ -77,6 +85,11 @@ def clean_ingredient_decimals(ingredient: str) -> str:
         decimal_part = match.group(2)
         try:
             number = float(f"{whole}.{decimal_part}")
+            frac = number - int(number)
+            for den in _SNAP_DENOMINATORS:
+                num = round(frac * den)
+                if 0 < num < den and abs(frac - num / den) < _SNAP_TOLERANCE:
+                    return f"{int(number)} {num}/{den}" if int(number) else f"{num}/{den}"
             rounded = round(number, 2)
             if rounded == int(rounded):
                 return str(int(rounded))
@@ -107,21 +120,18 @@ def clean_ingredient_decimals(ingredient: str) -> str:
     return cleaned
 
 
+# Days and time parts are optional; "P0DT0H35M" and "PT35M" are both 35 minutes
+_ISO_DURATION_RE = re.compile(r"P(?:(\d+)D)?T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", re.I)
+
+
 def iso_duration_to_short(s: str | None) -> str | None:
     """Convert an ISO 8601 duration like 'PT1H30M' to '1 HR 30 MINS'."""
     if not s:
         return None
-    m = re.fullmatch(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", s.strip(), re.I)
-    if not m:
-        m = re.fullmatch(
-            r"P(?:(\d+)D)?T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", s.strip(), re.I
-        )
+    m = _ISO_DURATION_RE.fullmatch(s.strip())
     if not m:
         return s
-    if m.lastindex == 4:
-        d, h, mnt, sec = m.groups()
-    else:
-        d, h, mnt, sec = None, m.group(1), m.group(2), m.group(3)
+    d, h, mnt, sec = m.groups()
     total_min = 0
     if d:
         total_min += int(d) * 24 * 60
@@ -2,37 +2,101 @@
 
 from __future__ import annotations
 
-from bs4 import BeautifulSoup
+import re
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
+from app.keywords import KeywordSet
+from app.models import Recipe
 
-def is_article_not_recipe(soup: BeautifulSoup, recipe_data: dict) -> bool:
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+_ARTICLE_TITLE_INDICATORS = KeywordSet((
+    "i tried", "we tried", "tested", "review", "compared", "ranking",
+    "best of", "top ", "most popular", "taste test", "which is better",
+    "vs", "versus", "battle", "showdown", "ultimate guide",
+))
+
+_ARTICLE_INGREDIENT_MARKERS = KeywordSet((
+    "average rating:", "stars", "by ", "recipe by", "sandwich by",
+    "classic", "legendary", "make lunch", "dinners", "meals",
+))
+
+
+# ld+json types of pages that are about food rather than a recipe
+_ARTICLE_LD_TYPES = frozenset({
+    b"article", b"newsarticle", b"reportagenewsarticle", b"blogposting", b"review",
+    b"itemlist", b"collectionpage", b"searchresultspage", b"faqpage",
+})
+_LD_TYPE_RE = re.compile(rb'"@type"\s*:\s*(\[[^\]]*\]|"[^"]*")')
+_QUOTED_RE = re.compile(rb'"([^"]*)"')
+_OG_TYPE_RE = re.compile(
+    rb"""<meta[^>]+(?:property=["']og:type["'][^>]+content=["']([^"']*)"""
+    rb"""|content=["']([^"']*)["'][^>]+property=["']og:type)""",
+    re.I,
+)
+_TITLE_RE = re.compile(rb"<title[^>]*>([^<]*)</title>", re.I)
+# Recipe card markup that scrapers' HTML fallbacks read without ld+json.
+# Plain substring tests: far quicker than a regex alternation on big pages.
+_RECIPE_CARD_MARKERS = (
+    b"wprm-recipe", b"tasty-recipes", b"mntl-structured-ingredients", b"recipe-ingredients", b"ingredients-section",
+)
+# Recipe slugs often start "best-", so that isn't an article signal
+_ARTICLE_PATH_RE = re.compile(
+    r"/(?:articles?|gallery|galleries|news|stories|story|reviews?|[\w-]+-vs-[\w-]+|[\w-]+-taste-test)(?:/|$)",
+    re.I,
+)
+
+
+def is_article_page(body: bytes, url: str, has_recipe_markup: bool) -> bool:
+    """Return True if the raw page is clearly an article, before any parsing.
+
+    Only pages with no recipe markup at all (no Recipe ld+json or microdata,
+    no recipe card) are judged here, and only on structured evidence: an
+    article-like ld+json ``@type``, or ``og:type`` article (which plenty of
+    recipe blogs set too) backed by an article-style URL or an article
+    headline in ``<title>``.  The URL and title never decide on their own.
+    False means "undecided"; `is_article_not_recipe` still runs on the
+    scraped recipe.
+    """
+    if has_recipe_markup or any(marker in body for marker in _RECIPE_CARD_MARKERS):
+        return False
+    types = {
+        t.lower()
+        for m in _LD_TYPE_RE.finditer(body)
+        for t in _QUOTED_RE.findall(m.group(1))
+    }
+    if b"recipe" in types:
+        return False
+    if types & _ARTICLE_LD_TYPES:
+        return True
+    og = _OG_TYPE_RE.search(body)
+    if not og or (og.group(1) or og.group(2) or b"").lower() != b"article":
+        return False
+    if _ARTICLE_PATH_RE.search(urlsplit(url).path):
+        return True
+    title = _TITLE_RE.search(body)
+    return bool(title) and has_article_title(title.group(1).decode("utf-8", "replace"))
+
+
+def has_article_title(title: str | None) -> bool:
+    """Return True if *title* reads like an article or review headline."""
+    return _ARTICLE_TITLE_INDICATORS.search(title or "")
+
+
+def is_article_not_recipe(soup: BeautifulSoup, recipe_data: Recipe) -> bool:
     """Return True if the page looks like an article/review rather than a recipe."""
-    title = recipe_data.get("title", "").lower()
-
-    article_indicators = (
-        "i tried", "we tried", "tested", "review", "compared", "ranking",
-        "best of", "top ", "most popular", "taste test", "which is better",
-        "vs", "versus", "battle", "showdown", "ultimate guide",
-    )
-    if any(ind in title for ind in article_indicators):
+    if has_article_title(recipe_data.title):
         return True
 
-    ingredients = recipe_data.get("ingredients", [])
-    article_ingredient_markers = (
-        "average rating:", "stars", "by ", "recipe by", "sandwich by",
-        "classic", "legendary", "make lunch", "dinners", "meals",
-    )
-    article_like = 0
-    for ing in ingredients:
-        low = ing.lower()
-        if any(m in low for m in article_ingredient_markers):
-            article_like += 1
-        if len(ing) > 100:
-            article_like += 1
+    ingredients = recipe_data.ingredients
+    markers = _ARTICLE_INGREDIENT_MARKERS.flags([ing.lower() for ing in ingredients])
+    article_like = sum(markers) + sum(1 for ing in ingredients if len(ing) > 100)
     if ingredients and article_like / len(ingredients) > 0.5:
         return True
 
-    if not recipe_data.get("instructions"):
+    if not recipe_data.instructions:
         return True
 
     return False
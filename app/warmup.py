@@ -0,0 +1,175 @@
+"""Background refresh of stale cache entries and warming of popular URLs.
+
+`request_log` counts how often each URL is asked for (optionally persisted
+across restarts); `Refresher` re-scrapes URLs off the request path, one at
+a time per URL and spaced out per domain by the rate limiter.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+from collections import Counter
+from typing import Awaitable, Callable
+from urllib.parse import urlparse
+
+from app import metrics
+from app.cache import recipe_cache
+from app.ratelimit import DomainRateLimiter, domain_limiter
+
+# Warm this many of the most requested URLs on startup (0 disables warming)
+WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", "0"))
+# Re-warm every this many seconds after startup (0 = startup only)
+WARMUP_INTERVAL_SECONDS = float(os.getenv("WARMUP_INTERVAL_SECONDS", "0"))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+# JSON file the request counts are loaded from / saved to (unset = memory only)
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH")
+REQUEST_LOG_MAX_URLS = int(os.getenv("REQUEST_LOG_MAX_URLS", "10000"))
+
+
+class RequestLog:
+    """Bounded request counter; the least requested URLs are dropped first.
+
+    Every worker process keeps its own counts, so `save` merges rather
+    than overwrites: under an exclusive lock it adds the requests seen
+    since this worker's last save to the file's counts and atomically
+    replaces the file.
+    """
+
+    def __init__(self, max_urls: int = REQUEST_LOG_MAX_URLS, path: str | None = REQUEST_LOG_PATH):
+        self.max_urls = max_urls
+        self.path = path
+        self._counts: Counter[str] = Counter()
+        # Requests recorded since the last save, not yet in the file
+        self._unsaved: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, url: str) -> None:
+        with self._lock:
+            self._counts[url] += 1
+            self._unsaved[url] += 1
+            if len(self._counts) > self.max_urls:
+                self._counts = Counter(dict(self._counts.most_common(self.max_urls // 2)))
+            if len(self._unsaved) > self.max_urls:
+                self._unsaved = Counter(dict(self._unsaved.most_common(self.max_urls // 2)))
+
+    def top(self, n: int) -> list[str]:
+        with self._lock:
+            return [url for url, _ in self._counts.most_common(n)]
+
+    def _read(self) -> Counter[str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return Counter({str(k): int(v) for k, v in json.load(f).items()})
+        except FileNotFoundError:
+            return Counter()
+
+    def load(self) -> None:
+        if not self.path:
+            return
+        try:
+            counts = self._read()
+        except (OSError, ValueError):
+            metrics.incr("request_log.load_failed")
+            return
+        with self._lock:
+            self._counts.update(counts)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, Counter()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            # Serialises the read-merge-replace across worker processes
+            with open(f"{self.path}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    counts = self._read()
+                except ValueError:
+                    metrics.incr("request_log.load_failed")
+                    counts = Counter()
+                counts.update(unsaved)
+                counts = Counter(dict(counts.most_common(self.max_urls)))
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(counts, f)
+                os.replace(tmp, self.path)
+        except OSError:
+            metrics.incr("request_log.save_failed")
+            with self._lock:
+                self._unsaved.update(unsaved)  # try again next save
+            return
+        with self._lock:
+            # Pick up what the other workers have saved meanwhile
+            counts.update(self._unsaved)
+            self._counts = counts
+
+    def snapshot(self) -> dict:
+        return {"urls": len(self._counts), "max_urls": self.max_urls}
+
+
+class Refresher:
+    """Runs *refresh(url)* in the background, at most once per URL at a time."""
+
+    def __init__(
+        self,
+        refresh: Callable[[str], Awaitable[object]],
+        limiter: DomainRateLimiter = domain_limiter,
+    ):
+        self._refresh = refresh
+        self._limiter = limiter
+        self._pending: set[str] = set()
+        # Strong references so running tasks aren't garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    def schedule(self, url: str) -> bool:
+        """Start refreshing *url* unless that's already under way."""
+        if url in self._pending:
+            return False
+        self._pending.add(url)
+        task = asyncio.create_task(self._run(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, url: str) -> None:
+        try:
+            await self._limiter.acquire(urlparse(url).netloc.lower())
+            await self._refresh(url)
+            metrics.incr("refresh.ok")
+        except Exception:
+            # The stale entry stays in place; the next stale hit tries again
+            metrics.incr("refresh.failed")
+        finally:
+            self._pending.discard(url)
+
+    async def warm(self, top_n: int, concurrency: int = WARMUP_CONCURRENCY) -> int:
+        """Refresh the *top_n* most requested URLs that aren't fresh in cache."""
+        urls = [u for u in request_log.top(top_n) if not recipe_cache.is_fresh(u) and u not in self._pending]
+        self._pending.update(urls)
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(url: str) -> None:
+            async with sem:
+                await self._run(url)
+
+        await asyncio.gather(*(one(u) for u in urls))
+        metrics.incr("warmup.urls", len(urls))
+        return len(urls)
+
+    async def warm_forever(self, top_n: int = WARMUP_TOP_N, interval: float = WARMUP_INTERVAL_SECONDS) -> None:
+        """Warm once, then every *interval* seconds if that's non-zero."""
+        while True:
+            await self.warm(top_n)
+            request_log.save()
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+
+request_log = RequestLog()
+metrics.register_collector("request_log", request_log.snapshot)
@@ -0,0 +1,2 @@
+# Present so a bare `pytest` puts the repo root on sys.path and tests can
+# import the app package.
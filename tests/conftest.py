@@ -0,0 +1,46 @@
+"""Fixtures shared by the tests."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+# Loosen every time budget on slow machines, e.g. GOLDEN_BUDGET_SCALE=3
+BUDGET_SCALE = float(os.getenv("GOLDEN_BUDGET_SCALE", "1"))
+
+
+class Budget:
+    """Wall-clock timing for the speed tests: the best of several runs, to
+    ride out scheduler noise."""
+
+    def best(self, fn, runs: int = 5, setup=None) -> float:
+        """Best of *runs* calls of *fn* in milliseconds.  With *setup*, each
+        run times ``fn(setup())`` and the setup itself isn't counted."""
+        best = float("inf")
+        for _ in range(runs):
+            arg = setup() if setup is not None else None
+            started = time.perf_counter()
+            fn(arg) if setup is not None else fn()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
+
+    def check(self, took: float, ms: float) -> float:
+        """Assert *took* ms is within *ms* times GOLDEN_BUDGET_SCALE, for
+        timings measured some other way."""
+        assert took <= ms * BUDGET_SCALE, f"took {took:.2f} ms, budget {ms * BUDGET_SCALE:.2f} ms"
+        return took
+
+    def __call__(self, fn, ms: float, runs: int = 5, setup=None) -> float:
+        """Assert `best` is within the *ms* budget and return it."""
+        return self.check(self.best(fn, runs, setup), ms)
+
+
+@pytest.fixture
+def within_budget():
+    """``within_budget(fn, ms, runs=5)`` asserts the best of *runs* calls of
+    *fn* fits in *ms*; ``within_budget.best(fn, runs)`` only measures (say
+    the baseline a faster path is held to); ``within_budget.check(took, ms)``
+    holds a timing measured elsewhere to the same scaled budget."""
+    return Budget()
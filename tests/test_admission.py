@@ -0,0 +1,106 @@
+"""Admission control: queue limit, deadline shedding, Retry-After, FIFO."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+
+
+def _hold(controller: AdmissionController, deadline: float, log: list, name: str, release: asyncio.Event):
+    async def run():
+        async with controller.slot(deadline):
+            log.append(name)
+            await release.wait()
+    return asyncio.create_task(run())
+
+
+def test_full_queue_is_a_429_with_retry_after():
+    async def run():
+        controller = AdmissionController(max_concurrent=2, max_queued=2, estimate=4)
+        release, log = asyncio.Event(), []
+        far = time.monotonic() + 600
+        tasks = [_hold(controller, far, log, n, release) for n in range(4)]
+        await asyncio.sleep(0)
+        assert (controller.active, len(controller._waiters)) == (2, 2)
+        with pytest.raises(Overloaded) as e:
+            async with controller.slot(far):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return e.value, controller
+
+    e, controller = asyncio.run(run())
+    assert e.status_code == 429
+    # Two waiters ahead, two slots, 4 s a scrape: (2 + 1) / 2 * 4 = 6
+    assert e.retry_after == 6
+    assert controller.active == 0 and not controller._waiters
+
+
+def test_request_that_cannot_finish_in_time_is_a_503():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queued=10, estimate=2)
+        release, log = asyncio.Event(), []
+        holder = _hold(controller, time.monotonic() + 600, log, "holder", release)
+        await asyncio.sleep(0)
+        # Needs 2 s of waiting plus 2 s of scraping, but has only 3 s
+        with pytest.raises(Overloaded) as e:
+            async with controller.slot(time.monotonic() + 3):
+                pass
+        release.set()
+        await holder
+        return e.value
+
+    e = asyncio.run(run())
+    assert e.status_code == 503 and e.retry_after == 2
+
+
+def test_queued_request_expires_at_its_deadline():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queued=10, estimate=0.01)
+        release, log = asyncio.Event(), []
+        holder = _hold(controller, time.monotonic() + 600, log, "holder", release)
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with pytest.raises(Overloaded) as e:
+            async with controller.slot(time.monotonic() + 0.2):
+                pass
+        waited = time.monotonic() - started
+        assert not controller._waiters
+        release.set()
+        await holder
+        return e.value, waited, controller
+
+    e, waited, controller = asyncio.run(run())
+    assert e.status_code == 503 and e.retry_after >= 1
+    assert 0.1 < waited < 1
+    assert controller.active == 0
+
+
+def test_slots_are_handed_over_in_arrival_order():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queued=10, estimate=0.01)
+        far = time.monotonic() + 600
+        log = []
+        releases = {n: asyncio.Event() for n in [0, 1, 2, 3, "late"]}
+        tasks = []
+        for n in [0, 1, 2, 3]:
+            tasks.append(_hold(controller, far, log, n, releases[n]))
+            await asyncio.sleep(0)
+        releases[0].set()
+        await asyncio.sleep(0)
+        # 0 has handed its slot to 1, which hasn't resumed yet: a newcomer
+        # arriving now must not take the slot ahead of the queue
+        assert controller.active == 1
+        tasks.append(_hold(controller, far, log, "late", releases["late"]))
+        for event in releases.values():
+            event.set()
+        await asyncio.gather(*tasks)
+        return log, controller
+
+    log, controller = asyncio.run(run())
+    assert log == [0, 1, 2, 3, "late"]
+    assert controller.active == 0
@@ -0,0 +1,167 @@
+"""parseRecipe endpoint behaviour with the fetch replaced by fixture pages."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdmissionController
+from app.budget import inflight
+from app.fetcher import Page
+from app.sniff import classify_page
+from app.warmup import RequestLog
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Answer every fetch with the given fixture page; returns the URLs fetched."""
+    fetched = []
+
+    def use(case: str):
+        body = (FIXTURES / f"{case}.html").read_bytes()
+
+        def fetch(url):
+            fetched.append(url)
+            page = Page(url, 200, body, {"Content-Type": "text/html; charset=utf-8"})
+            page.kind = classify_page(body)
+            return page
+
+        monkeypatch.setattr(main, "_fetch_checked", fetch)
+        return fetched
+
+    return use
+
+
+def test_url_rejection_is_not_negative_cached_for_collections(client, serve):
+    url = "https://food52.com/collections/taco-night"
+    fetched = serve("food52/collection")
+
+    resp = client.post("/api/parseRecipe", json={"url": url})
+    assert resp.status_code == 400 and "Not a recipe page" in resp.json()["detail"]
+    assert fetched == []
+
+    resp = client.post("/api/parseRecipe", json={"url": url, "all_recipes": True})
+    assert resp.status_code == 200
+    assert [r["title"] for r in resp.json()["recipes"]] == ["Carnitas Tacos", "Salsa Verde"]
+    assert fetched == [url]
+
+
+def test_collection_scaling_skips_recipes_without_a_yield(client, serve):
+    url = "https://food52.com/collections/taco-night-scaled"
+    serve("food52/collection")
+
+    resp = client.post("/api/parseRecipe", json={"url": url, "all_recipes": True, "servings": 4})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [r["title"] for r in body["recipes"]] == ["Carnitas Tacos", "Salsa Verde"]
+    assert body["recipes"][0]["servings"] != body["recipes"][1]["servings"]
+    assert body["unscaled"] == [1]
+
+
+def test_servings_are_scaled_from_the_cached_parse(client, serve):
+    url = "https://www.saltandlavender.com/creamy-tuscan-chicken-scaled/"
+    fetched = serve("saltandlavender/recipe")
+
+    plain = client.post("/api/parseRecipe", json={"url": url}).json()
+    doubled = client.post("/api/parseRecipe", json={"url": url, "servings": 8}).json()
+    assert fetched == [url]
+    assert plain["servings"] == "4 servings" and doubled["servings"] == "8 servings"
+    assert doubled["ingredients"] != plain["ingredients"]
+
+
+def test_stream_releases_its_budget_before_the_client_reads(serve):
+    url = "https://www.saltandlavender.com/creamy-tuscan-chicken-streamed/"
+    serve("saltandlavender/recipe")
+    data = main.RecipeRequest(url=url)
+
+    async def run():
+        events = await main._open_stream(data, url, None, time.monotonic() + 30)
+        first = await events.__anext__()
+        # The client has read one event and stalls; the parse still finishes
+        for _ in range(500):
+            if inflight.in_use == 0:
+                break
+            await asyncio.sleep(0.01)
+        held = inflight.in_use
+        rest = [event async for event in events]
+        return first, held, rest
+
+    first, held, rest = asyncio.run(run())
+    assert first.startswith(b"event: fields")
+    assert held == 0
+    assert rest[-1].startswith(b"event: result") and b"Creamy Tuscan Chicken" in rest[-1]
+
+
+def test_only_successful_scrapes_are_logged(client, serve, monkeypatch):
+    log = RequestLog(path=None)
+    monkeypatch.setattr(main, "request_log", log)
+    recipe = "https://www.saltandlavender.com/creamy-tuscan-chicken-logged/"
+    serve("saltandlavender/recipe")
+    assert client.post("/api/parseRecipe", json={"url": recipe}).status_code == 200
+    assert client.post("/api/parseRecipe/stream", json={"url": recipe}).status_code == 200
+
+    # A URL-rule 400, and a fetch that's blocked
+    assert client.post("/api/parseRecipe", json={"url": "https://food52.com/collections/x"}).status_code == 400
+    blocked = "https://www.saltandlavender.com/blocked-logged/"
+
+    def fetch(url):
+        raise main.HTTPException(status_code=403, detail="blocked")
+
+    monkeypatch.setattr(main, "_fetch_checked", fetch)
+    assert client.post("/api/parseRecipe", json={"url": blocked}).status_code == 403
+    assert client.post("/api/parseRecipe/stream", json={"url": blocked}).status_code == 200  # error event
+
+    assert log._counts == {recipe: 2}
+
+
+@pytest.mark.parametrize("status, expected, cached", [
+    (404, 404, True), (410, 410, True), (403, 503, False), (429, 503, False), (503, 502, False), (500, 502, False),
+])
+def test_only_gone_pages_are_negative_cached(client, monkeypatch, status, expected, cached):
+    url = f"https://www.saltandlavender.com/upstream-{status}/"
+    fetched = []
+
+    def fetch_page(u, max_bytes=None):
+        fetched.append(u)
+        page = Page(u, status, b"<html><title>Error</title></html>", {"Content-Type": "text/html"})
+        page.kind = classify_page(page.content)
+        return page
+
+    monkeypatch.setattr(main, "fetch_page", fetch_page)
+    monkeypatch.setattr(main, "ALLRECIPES_PROXY", None)
+    for _ in range(2):
+        assert client.post("/api/parseRecipe", json={"url": url}).status_code == expected
+    assert len(fetched) == (1 if cached else 2)
+
+
+def test_cold_streams_go_through_admission(client, serve, monkeypatch):
+    busy = AdmissionController(max_concurrent=1, max_queued=0, estimate=3)
+    busy.active = 1  # every slot taken, no room to queue
+    monkeypatch.setattr(main, "admission", busy)
+    fetched = serve("saltandlavender/recipe")
+    warm = "https://www.saltandlavender.com/creamy-tuscan-chicken-admitted/"
+    main.recipe_cache.set(warm, main.Recipe(title="Creamy Tuscan Chicken"))
+
+    cold = client.post("/api/parseRecipe/stream", json={"url": warm.replace("admitted", "shed")})
+    assert cold.status_code == 429 and cold.headers["Retry-After"] == "3"
+    assert fetched == []
+
+    hit = client.post("/api/parseRecipe/stream", json={"url": warm})
+    assert hit.status_code == 200 and b"event: result" in hit.content
+
+    busy.active = 0
+    cold = client.post("/api/parseRecipe/stream", json={"url": warm.replace("admitted", "let-in")})
+    assert cold.status_code == 200 and b"Creamy Tuscan Chicken" in cold.content
+    assert busy.active == 0 and len(fetched) == 1
@@ -0,0 +1,76 @@
+"""Accuracy of the raw-bytes article check against the full one.
+
+`is_article_page` may only short-cut `is_article_not_recipe`: over every
+fixture, and under URLs that look like articles or like recipe slugs, it
+must never call a page an article that the full check keeps as a recipe.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parsers import SITES, load_scraper
+from app.sniff import RECIPE, classify_page
+from app.validation import is_article_not_recipe, is_article_page
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CASES = sorted(p.relative_to(FIXTURES).with_suffix("").as_posix() for p in FIXTURES.glob("*/*.html"))
+
+# Paths that trip URL heuristics in both directions
+PATHS = (
+    "/recipe/10813/best-chocolate-chip-cookies/",
+    "/recipe/best-banana-bread-2886",
+    "/news/what-we-cooked-this-month/",
+    "/gallery/taco-night/",
+    "/butter-vs-oil-taste-test/",
+)
+
+
+def _checks(case: str, path: str | None = None) -> tuple[bool, bool]:
+    """``(early, full)`` verdicts for the fixture *case*."""
+    module = case.split("/")[0]
+    site = next(spec for spec in SITES if spec.module == module)
+    body = (FIXTURES / f"{case}.html").read_bytes()
+    html = body.decode("utf-8")
+    url = (FIXTURES / f"{case}.url").read_text().strip()
+    if path is not None:
+        url = f"https://{site.domain}{path}"
+    soup = BeautifulSoup(html, "html.parser")
+    scraper = load_scraper(site)
+    recipe = scraper(soup, html, None) if site.needs_html else scraper(soup, None)
+    early = is_article_page(body, url, classify_page(body) == RECIPE)
+    return early, is_article_not_recipe(soup, recipe)
+
+
+@pytest.mark.parametrize("path", (None, *PATHS))
+@pytest.mark.parametrize("case", CASES)
+def test_early_check_never_contradicts_full_check(case, path):
+    early, full = _checks(case, path)
+    assert not early or full, f"{case} at {path}: early says article, full check says recipe"
+
+
+def test_early_check_accuracy():
+    verdicts = [_checks(case) for case in CASES]
+    articles = sum(full for _, full in verdicts)
+    caught = sum(early and full for early, full in verdicts)
+    false_positives = sum(early and not full for early, full in verdicts)
+    assert false_positives == 0
+    # recipetineats/article (NewsArticle ld+json) must be caught early; the
+    # review page carries Recipe markup and is left to the full check
+    assert caught >= 1 and articles >= 2, (caught, articles)
+
+
+@pytest.mark.parametrize("head, path, expected", [
+    ('<meta property="og:type" content="article">', "/recipe/best-banana-bread-2886", False),
+    ('<meta property="og:type" content="article">', "/news/kitchen-diary/", True),
+    ('<meta property="og:type" content="article"><title>I tried 5 famous brownies</title>', "/brownies/", True),
+    ('<title>I tried 5 famous brownies</title>', "/news/brownies/", False),
+    ('<script type="application/ld+json">{"@type": "BlogPosting"}</script>', "/brownies/", True),
+    ('<script type="application/ld+json">{"@type": ["Recipe", "BlogPosting"]}</script>', "/news/x/", False),
+])
+def test_url_and_title_need_structured_evidence(head, path, expected):
+    body = f"<html><head>{head}</head><body><p>Words.</p></body></html>".encode()
+    assert is_article_page(body, f"https://example.com{path}", False) is expected
@@ -0,0 +1,158 @@
+"""Body truncation, the in-flight byte pool, and an RSS stress test."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.budget import BudgetTimeout, ByteBudget, body_limit
+from app.fetcher import MAX_SCAN_FACTOR, read_body
+
+ROOT = Path(__file__).parent.parent
+MB = 1024 * 1024
+
+_LD = b'<script type="application/ld+json">{"@type": "Recipe", "name": "Big"}</script>'
+
+
+def _chunks(body: bytes, size: int = 64 * 1024):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+def test_short_body_is_untouched():
+    body = b"<html>" + b"x" * 1000 + b"</html>"
+    assert read_body(_chunks(body, 100), 2000) == (body, False)
+
+
+def test_truncation_keeps_ld_json_past_the_cut():
+    filler = b"<p>" + b"comment " * 100 + b"</p>\n"
+    body = b"<html><body>" + filler * 200 + _LD + filler * 200 + b"</body></html>"
+    out, truncated = read_body(_chunks(body, 4096), 50_000)
+    assert truncated
+    assert out.startswith(b"<html><body><p>")
+    assert out.endswith(_LD)
+    assert len(out) < 50_000 + len(_LD) + 2
+
+
+def test_cut_never_splits_a_script():
+    body = b"<html>" + b"a" * 990 + b'<script type="application/ld+json">{"@type": "Recipe"}</script>' + b"b" * 5000
+    out, truncated = read_body(_chunks(body, 256), 1000)
+    assert truncated
+    head, _, tail = out.partition(b"\n")
+    assert b"<script" not in head
+    assert tail.startswith(b'<script type="application/ld+json">') and tail.endswith(b"</script>")
+
+
+def test_scan_stops_after_the_factor():
+    limit = 10_000
+    late = b"x" * (limit * (MAX_SCAN_FACTOR + 1)) + _LD
+    out, truncated = read_body(_chunks(b"<html>" + late, 1024), limit)
+    assert truncated and _LD not in out
+
+
+def test_body_limit_follows_the_budget():
+    assert body_limit(32 * MB) < 32 * MB
+    assert body_limit(64 * MB) == 2 * body_limit(32 * MB)
+
+
+def test_budget_applies_backpressure():
+    async def run():
+        pool = ByteBudget(10)
+        order = []
+
+        async def job(name, nbytes, hold):
+            async with pool.reserve(nbytes, timeout=5):
+                order.append((name, pool.in_use))
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(job("a", 6, 0.05), job("b", 6, 0), job("c", 4, 0))
+        return order, pool.in_use
+
+    order, in_use = asyncio.run(run())
+    # b waits for a; c fits beside a at once
+    assert order == [("a", 6), ("c", 10), ("b", 6)]
+    assert in_use == 0
+
+
+def test_budget_times_out():
+    async def run():
+        pool = ByteBudget(10)
+        async with pool.reserve(10):
+            with pytest.raises(BudgetTimeout):
+                async with pool.reserve(1, timeout=0.05):
+                    pass
+        return pool.snapshot()
+
+    assert asyncio.run(run()) == {"capacity": 10, "in_use": 0, "waiting": 0}
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({"MAX_CONCURRENT_SCRAPES": "16", "MAX_INFLIGHT_BYTES": str(256 * MB), "REQUEST_MEMORY_BUDGET": str(32 * MB)}, 8),
+    ({"MAX_CONCURRENT_SCRAPES": "4", "MAX_INFLIGHT_BYTES": str(256 * MB), "REQUEST_MEMORY_BUDGET": str(32 * MB)}, 4),
+    ({"MAX_CONCURRENT_SCRAPES": "16", "MAX_INFLIGHT_BYTES": str(16 * MB), "REQUEST_MEMORY_BUDGET": str(32 * MB)}, 1),
+])
+def test_admission_never_admits_more_than_the_pool_holds(env, expected):
+    out = subprocess.run(
+        [sys.executable, "-c", "from app.admission import admission; print(admission.max_concurrent)"],
+        cwd=ROOT, env={**os.environ, **env}, capture_output=True, text=True, check=True, timeout=60,
+    ).stdout
+    assert int(out) == expected
+
+
+# Fetches and parses PAGES synthetic 3 MB pages, all at once, through the
+# same body cap and byte pool the endpoint uses; prints peak RSS growth (KB).
+_STRESS = r"""
+import asyncio, resource
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup
+from app.budget import REQUEST_MEMORY_BUDGET, body_limit, inflight
+from app.fetcher import Page, read_body
+
+PAGES = 12
+COMMENT = b'<li class="comment"><p>' + b"Loved it! " * 40 + b"</p></li>\n"
+LD = b'<script type="application/ld+json">{"@type": "Recipe", "name": "Big"}</script>'
+
+def chunks():
+    yield b"<html><head><title>Big</title></head><body><ol>"
+    block = COMMENT * (64 * 1024 // len(COMMENT))
+    for _ in range(3 * 1024 * 1024 // len(block)):
+        yield block
+    yield b"</ol>" + LD + b"</body></html>"
+
+def parse():
+    body, truncated = read_body(chunks(), body_limit(REQUEST_MEMORY_BUDGET))
+    assert truncated and LD in body
+    return len(BeautifulSoup(Page("https://example.com/", 200, body).text, "html.parser").find_all("li"))
+
+async def one():
+    async with inflight.reserve(REQUEST_MEMORY_BUDGET):
+        return await asyncio.to_thread(parse)
+
+async def main():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(PAGES))
+    await asyncio.gather(*(one() for _ in range(PAGES)))
+
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+asyncio.run(main())
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base)
+"""
+
+
+def _rss_growth_mb(inflight_bytes: int) -> float:
+    env = {**os.environ, "REQUEST_MEMORY_BUDGET": str(8 * MB), "MAX_INFLIGHT_BYTES": str(inflight_bytes)}
+    out = subprocess.run(
+        [sys.executable, "-c", _STRESS], cwd=ROOT, env=env, capture_output=True, text=True, check=True, timeout=120,
+    ).stdout
+    return int(out.strip()) / 1024
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss is in KB on Linux only")
+def test_rss_stays_bounded_under_load():
+    bounded = _rss_growth_mb(8 * MB)  # one parse at a time
+    unbounded = _rss_growth_mb(1024 * MB)  # all twelve at once
+    assert bounded < 48, f"peak RSS grew {bounded:.0f} MB with the byte pool"
+    assert bounded < unbounded / 2, f"{bounded:.0f} MB bounded vs {unbounded:.0f} MB unbounded"
@@ -0,0 +1,101 @@
+"""Crawler politeness and worker pool, with the network replaced by stubs."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app import crawl, main
+from app.models import ArticleRejection, Recipe
+from app.ratelimit import DomainRateLimiter
+from app.state import MemoryBackend
+
+DOMAIN = "www.recipetineats.com"
+
+_INDEX = b"""<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>https://www.recipetineats.com/post-sitemap1.xml</loc></sitemap>
+<sitemap><loc>https://www.recipetineats.com/post-sitemap2.xml</loc></sitemap>
+</sitemapindex>"""
+
+
+def _urlset(n: int) -> bytes:
+    locs = "".join(f"<url><loc>https://www.recipetineats.com/recipe-{n}-{i}/</loc></url>" for i in range(3))
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'.encode()
+
+
+def test_sitemap_fetches_go_through_the_rate_limiter(monkeypatch, tmp_path):
+    bodies = {
+        f"https://{DOMAIN}/robots.txt": f"User-agent: *\nSitemap: https://{DOMAIN}/sitemap_index.xml\n".encode(),
+        f"https://{DOMAIN}/sitemap_index.xml": _INDEX,
+        f"https://{DOMAIN}/post-sitemap1.xml": _urlset(1),
+        f"https://{DOMAIN}/post-sitemap2.xml": _urlset(2),
+    }
+    fetched_at = []
+
+    def stream(url):
+        fetched_at.append(time.monotonic())
+        yield bodies[url]
+
+    monkeypatch.setattr(crawl, "_stream", stream)
+    store = crawl.CrawlStore(str(tmp_path / "crawl.db"))
+    limiter = DomainRateLimiter(min_interval=0.05, backend=MemoryBackend())
+
+    assert crawl.discover(DOMAIN, store, limiter=limiter) == 6
+    assert len(fetched_at) == 4
+    gaps = [b - a for a, b in zip(fetched_at, fetched_at[1:])]
+    assert min(gaps) >= 0.045
+
+
+def test_workers_drain_the_queue_with_bounded_concurrency(monkeypatch, tmp_path):
+    store = crawl.CrawlStore(str(tmp_path / "crawl.db"))
+    urls = [f"https://{DOMAIN}/recipe-{i}/" for i in range(1200)]
+    store.add_urls(DOMAIN, urls)
+    running = peak = 0
+
+    def scrape(url):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.0005)
+        running -= 1
+        if url.endswith("-7/"):
+            raise ValueError("boom")
+        return {"title": url}
+
+    monkeypatch.setattr(main, "scrape_url", scrape)
+    limiter = DomainRateLimiter(min_interval=0, backend=MemoryBackend())
+    stats = crawl.Throughput()
+
+    async def run():
+        await crawl.crawl_domain(DOMAIN, store, limiter, stats, concurrency=4, limit=None)
+        return len(asyncio.all_tasks())
+
+    assert asyncio.run(run()) == 1
+    assert peak <= 4
+    assert stats.done[DOMAIN] == 1199 and stats.failed[DOMAIN] == 1
+    assert store.counts(DOMAIN) == {"done": 1199, "failed": 1}
+
+
+def test_limit_caps_one_run(tmp_path):
+    store = crawl.CrawlStore(str(tmp_path / "crawl.db"))
+    store.add_urls(DOMAIN, [f"https://{DOMAIN}/recipe-{i}/" for i in range(1200)])
+    assert list(store.iter_pending(DOMAIN, 700)) == [f"https://{DOMAIN}/recipe-{i}/" for i in range(700)]
+    assert len(store.pending(DOMAIN)) == 1200
+
+
+def test_articles_are_not_stored_as_recipes(monkeypatch, tmp_path):
+    store = crawl.CrawlStore(str(tmp_path / "crawl.db"))
+    recipe, article = f"https://{DOMAIN}/apple-pie/", f"https://{DOMAIN}/best-pies-ranked/"
+    store.add_urls(DOMAIN, [recipe, article])
+    results = {recipe: Recipe(title="Apple Pie"), article: ArticleRejection(debug_html="<html>")}
+    monkeypatch.setattr(main, "scrape_url", results.__getitem__)
+    stats = crawl.Throughput()
+
+    asyncio.run(crawl.crawl_domain(DOMAIN, store, DomainRateLimiter(0, MemoryBackend()), stats, 2, None))
+
+    assert store.counts(DOMAIN) == {"done": 1, "failed": 1}
+    rows = store._conn.execute("SELECT url, status, error FROM urls ORDER BY url").fetchall()
+    assert rows == [(recipe, "done", None), (article, "failed", "article")]
+    assert [u for u, in store._conn.execute("SELECT url FROM recipes")] == [recipe]
+    assert (stats.done[DOMAIN], stats.skipped[DOMAIN], stats.failed[DOMAIN]) == (1, 1, 0)
+    assert "1 articles skipped" in stats.report()
@@ -0,0 +1,74 @@
+"""Field projection: thumbnail-only scrapes skip the expensive fallbacks,
+give the same values, and are cached as partial results."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.cache import RecipeCache
+from app.models import Recipe
+from app.parsers import SITES, load_scraper
+
+FIXTURES = Path(__file__).parent / "fixtures"
+THUMBNAIL = frozenset({"title", "image_url", "rating"})
+# A long comment thread the <li>/<p> fallbacks have to wade through
+_COMMENTS = "<ol class='comments'>" + "".join(
+    f"<li><p>Comment {n}: I added 2 cups extra and baked it 10 minutes longer.</p></li>" for n in range(1500)
+) + "</ol>"
+
+
+def _scraper(case: str, fields, comments: bool = False):
+    """``(scrape(soup), make_soup)`` for the fixture page *case*."""
+    site = next(spec for spec in SITES if spec.module == case.split("/")[0])
+    scraper = load_scraper(site)
+    html = (FIXTURES / f"{case}.html").read_text(encoding="utf-8")
+    if comments:
+        html = html.replace("</body>", f"{_COMMENTS}</body>")
+
+    def scrape(soup) -> Recipe:
+        return scraper(soup, html, fields) if site.needs_html else scraper(soup, fields)
+
+    return scrape, lambda: BeautifulSoup(html, "html.parser")
+
+
+def _scrape(case: str, fields, comments: bool = False) -> Recipe:
+    scrape, make_soup = _scraper(case, fields, comments)
+    return scrape(make_soup())
+
+
+@pytest.mark.parametrize("case", sorted(p.relative_to(FIXTURES).with_suffix("").as_posix() for p in FIXTURES.glob("*/*.html")))
+def test_projection_gives_the_same_values(case: str):
+    full = _scrape(case, None)
+    thumb = _scrape(case, THUMBNAIL)
+    for name in THUMBNAIL:
+        assert getattr(thumb, name) == getattr(full, name), name
+
+
+@pytest.mark.parametrize("case", ["allrecipes/generic_lists", "food_com/fallback"])
+def test_thumbnail_skips_the_list_fallbacks(case: str, within_budget):
+    full = _scrape(case, None, comments=True)
+    thumb = _scrape(case, THUMBNAIL, comments=True)
+    assert full.ingredients and not thumb.ingredients and not thumb.instructions
+    # Scraper time only; the soup is built outside the timing
+    scrape_full, make_soup = _scraper(case, None, comments=True)
+    scrape_thumb, _ = _scraper(case, THUMBNAIL, comments=True)
+    full_ms = within_budget.best(scrape_full, runs=3, setup=make_soup)
+    within_budget(scrape_thumb, full_ms / 3, runs=3, setup=make_soup)
+
+
+def test_partial_results_in_the_cache():
+    cache = RecipeCache()
+    key = "https://example.com/stew/"
+    cache.set(key, Recipe(title="Stew", image_url="https://example.com/s.jpg"), THUMBNAIL)
+    assert cache.lookup(key, frozenset({"title", "image_url"}))[0].title == "Stew"
+    assert cache.lookup(key, frozenset({"title", "ingredients"}))[0] is None
+    assert cache.lookup(key)[0] is None
+
+    full = Recipe(title="Stew", ingredients=["1 onion"], instructions=["Cook."])
+    cache.set(key, full)
+    cache.set(key, Recipe(title="Partial"), THUMBNAIL)  # never replaces the full entry
+    assert cache.lookup(key, THUMBNAIL)[0] is full
+    assert cache.lookup(key)[0] is full
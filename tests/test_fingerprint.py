@@ -0,0 +1,123 @@
+"""Content fingerprints: stable across re-fetch noise, sensitive to the
+recipe, and a match skips the DOM build."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app import main
+from app.fetcher import Page
+from app.fingerprint import fingerprint
+from app.sniff import classify_page
+
+INGREDIENTS = ["2 chicken breasts", "1 cup heavy cream", "2 cups spinach"]
+STEPS = ["Sear the chicken until golden.", "Add the cream and simmer."]
+
+
+def _page(
+    ingredients=INGREDIENTS,
+    steps=STEPS,
+    nonce="a1b2c3",
+    ver="3.2",
+    ad="slot-1",
+    stamp="1700000000",
+    comment="cached 12:00:01",
+    tracker="ga-1",
+) -> bytes:
+    ld = {
+        "@context": "https://schema.org",
+        "@type": "Recipe",
+        "name": "Creamy Tuscan Chicken",
+        "recipeIngredient": ingredients,
+        "recipeInstructions": [{"@type": "HowToStep", "text": s} for s in steps],
+        "recipeYield": "4",
+    }
+    items = "".join(f'<li class="wprm-recipe-ingredient">{i}</li>' for i in ingredients)
+    instructions = "".join(f'<li class="wprm-recipe-instruction">{s}</li>' for s in steps)
+    return f"""<!DOCTYPE html><html><head><title>Creamy Tuscan Chicken</title>
+<script type="application/ld+json">{json.dumps(ld)}</script>
+<script nonce="{nonce}">var wpData = {{"_wpnonce": "{nonce}", "tracker": "{tracker}"}};</script>
+<link rel="stylesheet" href="/wp-content/plugins/wprm/style.css?ver={ver}">
+</head><body><!-- {comment} -->
+<div class="wprm-recipe-container" data-recipe-timestamp="{stamp}">
+<img src="/wp-content/uploads/chicken.jpg?v={ver}" data-nonce="{nonce}">
+<ins class="adsbygoogle" data-ad-slot="{ad}"><iframe src="https://ads.example.net/{ad}"></iframe></ins>
+<ul>{items}</ul><ol>{instructions}</ol>
+</div></body></html>""".encode()
+
+
+BASE = fingerprint(_page())
+
+
+def test_recipe_page_has_a_fingerprint():
+    assert BASE is not None
+    assert fingerprint(b"<html><body><p>No recipe here</p></body></html>") is None
+
+
+@pytest.mark.parametrize("noise", [
+    {"nonce": "zz9y8x"},
+    {"ver": "3.3"},
+    {"ad": "slot-77"},
+    {"stamp": "1700009999"},
+    {"comment": "cached 12:05:43"},
+    {"tracker": "ga-2"},
+    {"nonce": "q", "ver": "4.0", "ad": "slot-2", "stamp": "1", "comment": "x", "tracker": "y"},
+])
+def test_noise_keeps_the_fingerprint(noise):
+    assert fingerprint(_page(**noise)) == BASE
+
+
+def test_reindented_markup_keeps_the_fingerprint():
+    assert fingerprint(_page().replace(b"\n", b"\n\t  \r\n")) == BASE
+
+
+@pytest.mark.parametrize("change", [
+    {"ingredients": ["2 chicken thighs", *INGREDIENTS[1:]]},
+    {"ingredients": INGREDIENTS[:-1]},
+    {"steps": ["Sear the chicken until browned.", STEPS[1]]},
+    {"steps": [*STEPS, "Serve over pasta."]},
+])
+def test_recipe_changes_change_the_fingerprint(change):
+    assert fingerprint(_page(**change)) != BASE
+
+
+def test_container_only_change_changes_the_fingerprint():
+    # The HTML list is what the fallbacks read, even when ld+json is unchanged
+    body = _page().replace(b"2 cups spinach</li>", b"3 cups kale</li>")
+    assert fingerprint(body) != BASE
+
+
+def test_fingerprint_match_skips_the_dom_build(monkeypatch):
+    url = "https://www.saltandlavender.com/creamy-tuscan-chicken-fingerprinted/"
+    body = _page()
+
+    def fetch(u):
+        page = Page(u, 200, body, {"Content-Type": "text/html; charset=utf-8"})
+        page.kind = classify_page(body)
+        return page
+
+    soups = []
+    make_soup = main._make_soup
+
+    def counting_make_soup(page):
+        soups.append(page.url)
+        return make_soup(page)
+
+    monkeypatch.setattr(main, "_fetch_checked", fetch)
+    monkeypatch.setattr(main, "_make_soup", counting_make_soup)
+
+    recipe, fp = main._scrape(url, None)
+    assert len(soups) == 1 and fp == BASE
+    main.recipe_cache.set(url, recipe, None, fp)
+
+    body = _page(nonce="new", ver="9.9", ad="slot-9", stamp="2", comment="later")
+    again, fp_again = main._scrape(url, None)
+    assert again is recipe and fp_again == BASE
+    assert len(soups) == 1
+
+    body = _page(ingredients=["2 chicken thighs", *INGREDIENTS[1:]])
+    changed, _ = main._scrape(url, None)
+    assert len(soups) == 2
+    assert changed.ingredients[0] == "2 chicken thighs"
@@ -0,0 +1,102 @@
+"""Golden-file regression and speed tests for the site scrapers.
+
+Every ``fixtures/<module>/<case>.html`` page is run through the scraper in
+``app/parsers/<module>.py`` the way the API runs it (soup, scraper, article
+check), and the result is compared with ``golden/<module>/<case>.json``.
+``<case>.url`` beside each page holds the URL it would be fetched from.
+Each run must also fit the fixture's time budget from ``budgets.json``.
+
+    python -m pytest tests/                    # check
+    UPDATE_GOLDEN=1 python -m pytest tests/    # rewrite the expected JSON
+
+Set GOLDEN_BUDGET_SCALE (e.g. 3) on slow machines to loosen every budget.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import orjson
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parsers import SITES, find_site, load_scraper
+from app.parsers.jsonld import extract_itemlist_urls, extract_jsonld_recipes
+from app.sniff import RECIPE, classify_page
+from app.validation import is_article_not_recipe, is_article_page
+
+HERE = Path(__file__).parent
+FIXTURES = HERE / "fixtures"
+GOLDEN = HERE / "golden"
+UPDATE = os.getenv("UPDATE_GOLDEN", "") not in ("", "0")
+
+BUDGETS = orjson.loads((HERE / "budgets.json").read_bytes())
+CASES = sorted(p.relative_to(FIXTURES).with_suffix("").as_posix() for p in FIXTURES.glob("*/*.html"))
+
+
+def _site(module: str):
+    return next(spec for spec in SITES if spec.module == module)
+
+
+def _url(case: str) -> str:
+    return (FIXTURES / f"{case}.url").read_text(encoding="utf-8").strip()
+
+
+def _scrape(site, html: str):
+    """What the API pipeline does after the fetch: soup, scraper, article check."""
+    soup = BeautifulSoup(html, "html.parser")
+    scraper = load_scraper(site)
+    recipe = scraper(soup, html, None) if site.needs_html else scraper(soup, None)
+    return soup, recipe, is_article_not_recipe(soup, recipe)
+
+
+def _result(url: str, site, html: str) -> dict:
+    soup, recipe, is_article = _scrape(site, html)
+    body = html.encode()
+    return {
+        "recipe": dataclasses.asdict(recipe),
+        "is_article": is_article,
+        "early_article": is_article_page(body, url, classify_page(body) == RECIPE),
+        "all_recipe_titles": [r.title for r in extract_jsonld_recipes(soup)],
+        "itemlist_urls": extract_itemlist_urls(soup),
+    }
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_golden(case: str):
+    module = case.split("/")[0]
+    site = _site(module)
+    html = (FIXTURES / f"{case}.html").read_text(encoding="utf-8")
+    url = _url(case)
+    assert find_site(urlsplit(url).hostname) is site
+    result = _result(url, site, html)
+    expected_path = GOLDEN / f"{case}.json"
+
+    if UPDATE:
+        expected_path.parent.mkdir(parents=True, exist_ok=True)
+        expected_path.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2) + b"\n")
+    elif not expected_path.exists():
+        pytest.fail(f"No golden output for {case}; run with UPDATE_GOLDEN=1 and review the diff")
+    else:
+        assert result == orjson.loads(expected_path.read_bytes())
+
+    # The raw-bytes article check may only short-cut what the full check says
+    if result["early_article"]:
+        assert result["is_article"]
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_budget(case: str, within_budget):
+    site = _site(case.split("/")[0])
+    html = (FIXTURES / f"{case}.html").read_text(encoding="utf-8")
+    _scrape(site, html)  # warm up: scraper import, regex and selector caches
+    within_budget(lambda: _scrape(site, html), BUDGETS.get(case, BUDGETS["default"]), runs=3)
+
+
+def test_every_scraper_has_a_fixture():
+    covered = {case.split("/")[0] for case in CASES}
+    missing = sorted({spec.module for spec in SITES} - covered)
+    assert not missing, f"No fixtures for: {', '.join(missing)}"
@@ -0,0 +1,74 @@
+"""Structured parsing of single ingredient lines."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.ingredients import parse_ingredient, scale_ingredient
+from app.utils import clean_ingredient_decimals
+
+
+@pytest.mark.parametrize("line, quantity, quantity_max, unit, item, notes", [
+    # Mixed numbers and plain fractions
+    ("1 1/2 cups flour", 1.5, None, "cup", "flour", None),
+    ("1-1/2 cups flour", 1.5, None, "cup", "flour", None),
+    ("2 1/4 tsp yeast", 2.25, None, "tsp", "yeast", None),
+    ("3/4 cup milk", 0.75, None, "cup", "milk", None),
+    # Unicode fractions, alone and glued to a whole number
+    ("½ cup milk", 0.5, None, "cup", "milk", None),
+    ("1½ cups sugar", 1.5, None, "cup", "sugar", None),
+    ("2¾ cups stock", 2.75, None, "cup", "stock", None),
+    ("⅛ tsp nutmeg", 0.125, None, "tsp", "nutmeg", None),
+    ("1⅛ lb beef", 1.125, None, "lb", "beef", None),
+    # Decimals, including recipe-plugin ones with too many digits
+    ("1.5 kg beef", 1.5, None, "kg", "beef", None),
+    ("0.333333 cup honey", 0.3333, None, "cup", "honey", None),
+    ("2.6666667 tbsp butter", 2.6667, None, "tbsp", "butter", None),
+    # Ranges
+    ("2-3 cloves garlic, minced", 2.0, 3.0, "clove", "garlic", "minced"),
+    ("2 to 3 tbsp olive oil", 2.0, 3.0, "tbsp", "olive oil", None),
+    ("1 or 2 chillies", 1.0, 2.0, None, "chillies", None),
+    ("1/2-3/4 cup water", 0.5, 0.75, "cup", "water", None),
+    # Parenthetical sizes become notes
+    ("1 (14 oz) can diced tomatoes", 1.0, None, "can", "diced tomatoes", "14 oz"),
+    ("1 (14.5 ounce) can tomatoes, drained", 1.0, None, "can", "tomatoes", "14.5 ounce, drained"),
+    ("2 chicken breasts (about 1 lb)", 2.0, None, None, "chicken breasts", "about 1 lb"),
+    # Units: glued, abbreviated, case-sensitive T/t, "of"
+    ("500g flour", 500.0, None, "g", "flour", None),
+    ("2 lbs. chicken thighs", 2.0, None, "lb", "chicken thighs", None),
+    ("1 T sugar", 1.0, None, "tbsp", "sugar", None),
+    ("1 t salt", 1.0, None, "tsp", "salt", None),
+    ("1 cup of rice", 1.0, None, "cup", "rice", None),
+    ("3 large eggs", 3.0, None, None, "large eggs", None),
+    # No quantity at all
+    ("salt to taste", None, None, None, "salt to taste", None),
+    ("Fresh parsley, for garnish", None, None, None, "Fresh parsley", "for garnish"),
+    ("Tea towel", None, None, None, "Tea towel", None),
+])
+def test_parse_ingredient(line, quantity, quantity_max, unit, item, notes):
+    parsed = parse_ingredient(line)
+    assert (parsed.quantity, parsed.quantity_max, parsed.unit, parsed.item, parsed.notes) == (
+        quantity, quantity_max, unit, item, notes,
+    )
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("0.333333 cup", "1/3 cup"),
+    ("0.6666667 cup", "2/3 cup"),
+    ("1.3333 cups", "1 1/3 cups"),
+    ("2.33333 cups", "2 1/3 cups"),
+    ("0.125 tsp", "1/8 tsp"),
+    ("1.125 lb", "1 1/8 lb"),
+    ("1.5000 cup", "1 1/2 cup"),
+    ("2.000 eggs", "2 eggs"),
+    ("1.166667 cup", "1.17 cup"),  # sixths aren't snapped
+    ("0.5 cup", "1/2 cup"),
+    ("0.33 cup", "0.33 cup"),  # short decimals are left as written
+])
+def test_long_decimals_snap_to_common_fractions(raw, expected):
+    assert clean_ingredient_decimals(raw) == expected
+
+
+def test_thirds_scale_back_to_whole_numbers():
+    assert scale_ingredient("0.333333 cup sugar", 3.0)[0] == "1 cup sugar"
+    assert scale_ingredient("0.6666667 cup milk", 1.5)[0] == "1 cup milk"
@@ -0,0 +1,191 @@
+"""Job queue robustness: bad callback URLs, crashing jobs, and jobs shared
+by several processes through one SQLite store."""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import orjson
+import pytest
+
+from app import jobs
+from app.jobs import JobQueue, MemoryJobStore, SqliteJobStore, check_callback_url
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com/hook",
+    "http://hooks.example.com:8080/jobs?token=1",
+    "http://93.184.215.14/hook",
+])
+def test_callback_url_accepted(url):
+    check_callback_url(url)
+
+
+@pytest.mark.parametrize("url", [
+    "http://[::1",
+    "ftp://example.com/hook",
+    "file:///etc/passwd",
+    "https:///no-host",
+    "example.com/hook",
+    "http://example.com:99999/",
+    "http://localhost:8000/hook",
+    "http://127.0.0.1/hook",
+    "http://[::1]/hook",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::ffff:192.168.1.1]/hook",
+])
+def test_callback_url_rejected(url):
+    with pytest.raises(ValueError):
+        check_callback_url(url)
+
+
+def test_bad_callback_does_not_stop_the_queue(monkeypatch, caplog):
+    monkeypatch.setattr(jobs, "CALLBACK_ALLOW_PRIVATE", False)
+
+    async def handler(request):
+        if request.get("explode"):
+            raise RuntimeError("boom")
+        return {"ok": request["n"]}
+
+    async def run():
+        queue = JobQueue(handler, store=MemoryJobStore(), workers=1)
+        await queue.start()
+        try:
+            # A URL that can't even be parsed, submitted straight to the queue
+            bad = queue.submit({"n": 0}, callback_url="http://[::1")
+            crashed = queue.submit({"explode": True})
+            good = [queue.submit({"n": n}) for n in range(1, 4)]
+            await asyncio.wait_for(queue._queue.join(), 5)
+        finally:
+            await queue.stop()
+        return queue, bad, crashed, good
+
+    queue, bad, crashed, good = asyncio.run(run())
+    assert queue.get(bad.id).status == jobs.DONE
+    assert queue.get(crashed.id).status == jobs.FAILED
+    assert [queue.get(job.id).result for job in good] == [{"ok": 1}, {"ok": 2}, {"ok": 3}]
+    assert [(r.name, r.levelname) for r in caplog.records] == [("app.jobs", "WARNING")]
+    assert bad.id in caplog.records[0].getMessage()
+
+
+def test_worker_survives_store_errors(caplog):
+    class FlakyStore(MemoryJobStore):
+        def claim(self, job_id):
+            if self._jobs[job_id].request.get("corrupt"):
+                raise ValueError("unreadable row")
+            return super().claim(job_id)
+
+    async def handler(request):
+        return request["n"]
+
+    async def run():
+        queue = JobQueue(handler, store=FlakyStore(), workers=1)
+        await queue.start()
+        try:
+            queue.submit({"corrupt": True, "n": 0})
+            later = queue.submit({"n": 1})
+            await asyncio.wait_for(queue._queue.join(), 5)
+        finally:
+            await queue.stop()
+        return queue.store._jobs[later.id]
+
+    assert asyncio.run(run()).status == jobs.DONE
+    (record,) = caplog.records
+    assert record.levelname == "ERROR" and record.exc_info and "crashed its worker" in record.getMessage()
+
+
+_WORKER = r"""
+import asyncio, sys, time, orjson
+from app.jobs import JobQueue, SqliteJobStore
+
+async def main():
+    ran = []
+
+    async def handler(request):
+        ran.append(request["n"])
+        await asyncio.sleep(0.01)
+        return request["n"]
+
+    queue = JobQueue(handler, store=SqliteJobStore(sys.argv[1]), workers=2)
+    time.sleep(max(0.0, float(sys.argv[2]) - time.time()))
+    await queue.start()
+    await asyncio.wait_for(queue._queue.join(), 30)
+    await queue.stop()
+    print(orjson.dumps(ran).decode())
+
+asyncio.run(main())
+"""
+
+
+def test_each_job_runs_once_across_processes(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SqliteJobStore(path)
+    for n in range(40):
+        store.save(jobs.Job(id=f"job{n}", request={"n": n}))
+    start_at = str(time.time() + 1.0)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _WORKER, path, start_at], cwd=ROOT, stdout=subprocess.PIPE)
+        for _ in range(4)
+    ]
+    ran = []
+    for proc in procs:
+        out, _ = proc.communicate(timeout=60)
+        assert proc.returncode == 0
+        ran.extend(orjson.loads(out))
+    assert sorted(ran) == list(range(40))
+    assert {store.get(f"job{n}").status for n in range(40)} == {jobs.DONE}
+
+
+def test_only_expired_running_jobs_are_recovered(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SqliteJobStore(path)
+    now = time.time()
+    store.save(jobs.Job(id="abandoned", request={"n": 1}, status=jobs.RUNNING, updated_at=now - 120))
+    store.save(jobs.Job(id="alive", request={"n": 2}, status=jobs.RUNNING, updated_at=now))
+
+    async def handler(request):
+        return request["n"]
+
+    async def run():
+        queue = JobQueue(handler, store=SqliteJobStore(path), workers=1, lease=60)
+        await queue.start()
+        try:
+            await asyncio.wait_for(queue._queue.join(), 5)
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
+    assert store.get("abandoned").status == jobs.DONE and store.get("abandoned").result == 1
+    assert store.get("alive").status == jobs.RUNNING
+
+
+def test_running_jobs_keep_their_lease(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    other = SqliteJobStore(path)
+
+    async def handler(request):
+        await asyncio.sleep(1.0)
+        return "slow"
+
+    async def run():
+        queue = JobQueue(handler, store=SqliteJobStore(path), workers=1, lease=0.3)
+        await queue.start()
+        try:
+            job = queue.submit({})
+            await asyncio.sleep(0.7)  # over twice the lease
+            stolen = other.recoverable(time.time(), time.time() - 0.3)
+            await asyncio.wait_for(queue._queue.join(), 5)
+        finally:
+            await queue.stop()
+        return job, stolen
+
+    job, stolen = asyncio.run(run())
+    assert stolen == []
+    assert other.get(job.id).result == "slow"
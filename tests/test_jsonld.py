@@ -0,0 +1,104 @@
+"""JSON-LD extraction on review-heavy pages: same answer as decoding
+everything, within a time budget."""
+
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parsers.jsonld import _extract, _from_node, _top_level_nodes, extract_jsonld_recipe
+
+_rng = random.Random(41)
+REVIEWS = [
+    {
+        "@type": "Review",
+        "author": {"@type": "Person", "name": f"cook{n}"},
+        "reviewBody": "Great recipe, would make again! " * _rng.randint(5, 40),
+        "reviewRating": {"@type": "Rating", "ratingValue": _rng.randint(1, 5)},
+        "itemReviewed": {"@type": "Recipe", "name": "Not this one"},
+    }
+    for n in range(400)
+]
+RECIPE = {
+    "@type": ["Recipe", "NewsArticle"],
+    "name": "Apple Pie &amp; Cream",
+    "description": "Flaky and tart.",
+    "image": ["https://example.com/wp-content/uploads/pie-300x200.jpg", "https://example.com/wp-content/uploads/pie.jpg"],
+    "recipeIngredient": [f"{n + 1} cups sliced apples" for n in range(15)],
+    "recipeInstructions": [{"@type": "HowToStep", "text": f"Step {n} &amp; stir."} for n in range(12)]
+    + [{"@type": "HowToStep", "text": "<p>Bake until golden.</p>"}],
+    "recipeYield": ["8", "8 slices"],
+    "totalTime": "PT1H15M",
+    "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.6", "ratingCount": "400"},
+    "review": REVIEWS,
+}
+
+
+def _script(data, raw: str | None = None) -> str:
+    return f'<script type="application/ld+json">{raw if raw is not None else json.dumps(data)}</script>'
+
+
+def _page(*blocks: str) -> str:
+    return f"<html><head>{''.join(blocks)}</head><body>{'<p>Comment.</p>' * 2000}</body></html>"
+
+
+SITE_GRAPH = _script({"@context": "https://schema.org", "@graph": [
+    {"@type": "WebSite", "name": "Pies"},
+    {"@type": "BreadcrumbList", "itemListElement": [{"@type": "ListItem", "position": 1, "name": "Recipes"}]},
+    {"@type": "Organization", "name": "Pies Ltd"},
+]})
+PEOPLE = _script({"@type": "Person", "name": "A recipe lover", "review": REVIEWS})
+
+PAGES = {
+    "separate-blocks": _page(SITE_GRAPH, PEOPLE, _script(RECIPE)),
+    "in-graph": _page(_script({"@context": "https://schema.org", "@graph": [{"@type": "WebPage"}, RECIPE]}), PEOPLE),
+    "top-level-list": _page(_script([{"@type": "Organization"}, RECIPE])),
+    # Raw newlines/tabs inside strings: orjson rejects them, json strict=False doesn't
+    "control-chars": _page(SITE_GRAPH, _script(None, json.dumps(RECIPE).replace("Flaky and tart.", "Flaky\tand\ntart."))),
+}
+
+
+def _reference(html: str):
+    """Decode every ld+json block in full and take the first top-level Recipe."""
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string, strict=False)
+        except ValueError:
+            continue
+        for node in _top_level_nodes(data):
+            types = node.get("@type") if isinstance(node, dict) else None
+            types = [types] if isinstance(types, str) else (types or [])
+            if any(t.lower() == "recipe" for t in types):
+                return _from_node(node, None)
+    return None
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_matches_full_decoding(name: str):
+    html = PAGES[name]
+    recipe = extract_jsonld_recipe(BeautifulSoup(html, "html.parser"))
+    assert recipe == _reference(html)
+    assert recipe.title == "Apple Pie & Cream"
+    assert recipe.ingredients[0] == "1 cups sliced apples" and len(recipe.ingredients) == 15
+    assert recipe.instructions[0] == "Step 0 & stir." and recipe.instructions[-1] == "Bake until golden."
+    assert recipe.servings == "8 slices" and recipe.rating == 4.6
+    assert recipe.image_url == "https://example.com/wp-content/uploads/pie.jpg"
+
+
+def test_nested_recipes_are_not_taken():
+    # Only a Review's itemReviewed is a Recipe: there's no recipe on the page
+    html = _page(SITE_GRAPH, PEOPLE)
+    assert extract_jsonld_recipe(BeautifulSoup(html, "html.parser")).title is None
+
+
+@pytest.mark.parametrize("name", ["separate-blocks", "in-graph"])
+def test_review_heavy_budget(name: str, within_budget):
+    html = PAGES[name]
+    assert len(html) > 400_000
+    soup = BeautifulSoup(html, "html.parser")
+    _extract(soup, None)  # builds the page index the scrapers share
+    within_budget(lambda: _extract(soup, None), 10)
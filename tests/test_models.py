@@ -0,0 +1,66 @@
+"""The Recipe schema and its orjson serialisation."""
+
+from __future__ import annotations
+
+import dataclasses
+import sys
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.ingredients import parse_ingredients
+from app.main import RecipeJSONResponse
+from app.models import ArticleRejection, Recipe
+
+INGREDIENTS = [
+    "2 1/4 cups all-purpose flour", "1 tsp baking soda", "1 tsp salt", "1 cup butter, softened",
+    "3/4 cup granulated sugar", "3/4 cup packed brown sugar", "1 tsp vanilla extract", "2 large eggs",
+    "2 cups (12 oz) semi-sweet chocolate chips", "1 cup chopped nuts",
+]
+
+
+def _recipe(structured: bool = False) -> Recipe:
+    return Recipe(
+        title="Original Chocolate Chip Cookies",
+        notes="The classic — crisp edges, chewy centres.",
+        ingredients=list(INGREDIENTS),
+        instructions=[f"Step {n}: do the next thing carefully and in order." for n in range(1, 9)],
+        cooking_time="1 HR",
+        servings="60 cookies",
+        image_url="https://example.com/cookies.jpg",
+        rating=4.7,
+        ingredients_parsed=parse_ingredients(INGREDIENTS) if structured else None,
+    )
+
+
+def test_recipes_are_slotted():
+    recipe = _recipe()
+    assert not hasattr(recipe, "__dict__")
+    assert sys.getsizeof(recipe) < 128
+
+
+def test_orjson_matches_the_generic_encoder():
+    for recipe in (_recipe(), _recipe(structured=True), ArticleRejection(debug_html="<html>")):
+        fast = RecipeJSONResponse(recipe).body
+        generic = JSONResponse(jsonable_encoder(dataclasses.asdict(recipe))).body
+        assert orjson.loads(fast) == orjson.loads(generic)
+
+
+def test_article_rejection_schema():
+    body = orjson.loads(RecipeJSONResponse(ArticleRejection(debug_html="<h1>Top 10</h1>")).body)
+    assert body["title"] == "error"
+    assert body["debug_html"] == "<h1>Top 10</h1>"
+    assert set(body) == {f.name for f in dataclasses.fields(ArticleRejection)}
+
+
+def _repeat(fn, calls: int = 200):
+    return lambda: [fn() for _ in range(calls)]
+
+
+def test_serialisation_throughput(within_budget):
+    """The orjson response renders a structured recipe several times faster
+    than FastAPI's jsonable_encoder + JSONResponse path."""
+    recipe = _recipe(structured=True)
+    generic = within_budget.best(_repeat(lambda: JSONResponse(jsonable_encoder(recipe))), runs=3)
+    within_budget(_repeat(lambda: RecipeJSONResponse(recipe)), generic / 3, runs=3)
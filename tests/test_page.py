@@ -0,0 +1,70 @@
+"""`Page`: encoding resolved once, body decoded at most once."""
+
+from __future__ import annotations
+
+import tracemalloc
+
+import pytest
+
+from app.fetcher import Page
+
+MB = 1024 * 1024
+
+
+def _big_page(size: int = 4 * MB, charset: str = "utf-8") -> bytes:
+    head = f'<html><head><meta charset="{charset}"><title>Crème brûlée</title></head><body>'.encode(charset)
+    para = "<p>Caramelised sugar over a vanilla custard – café style.</p>\n".encode(charset)
+    return head + para * (size // len(para)) + b"</body></html>"
+
+
+@pytest.mark.parametrize("headers, body, expected", [
+    ({"Content-Type": "text/html; charset=ISO-8859-1"}, b"<html>", "iso8859-1"),
+    ({"content-type": 'text/html; charset="windows-1252"'}, b"<html>", "cp1252"),
+    ({}, b'<html><head><meta charset="Shift_JIS">', "shift_jis"),
+    ({}, b'<meta http-equiv="Content-Type" content="text/html; charset=euc-kr">', "euc_kr"),
+    ({"Content-Type": "text/html; charset=bogus"}, b'<meta charset="latin-1">', "iso8859-1"),
+    ({"Content-Type": "text/html"}, b"<html>", "utf-8"),
+])
+def test_encoding(headers, body, expected):
+    assert Page("https://example.com/", 200, body, headers).encoding == expected
+
+
+def test_text_is_decoded_once():
+    page = Page("https://example.com/", 200, _big_page(charset="cp1252"))
+    assert page.encoding == "cp1252"
+    text = page.text
+    assert "café" in text
+    assert page.text is text
+    assert page.snippet(5) == text[:5]
+
+
+def test_snippet_decodes_only_a_prefix():
+    page = Page("https://example.com/", 200, _big_page())
+    tracemalloc.start()
+    try:
+        snippet = page.snippet(200)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert snippet.startswith("<html>") and len(snippet) == 200
+    assert page._text is None
+    assert peak < 64 * 1024
+
+
+def test_large_page_cpu_and_memory(within_budget):
+    """Every consumer of a 4 MB page shares one decode: repeated access is
+    free and holds a single copy of the text."""
+    body = _big_page()
+    first = within_budget.best(lambda page: page.text, runs=1, setup=lambda: Page("https://example.com/", 200, body))
+    page = Page("https://example.com/", 200, body)
+    page.text
+    within_budget(lambda: [page.text for _ in range(20)], first, runs=1)
+
+    tracemalloc.start()
+    try:
+        texts = [page.text for _ in range(20)]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert all(t is texts[0] for t in texts)
+    assert peak < 64 * 1024  # no further copies of the ~4 MB text
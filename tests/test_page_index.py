@@ -0,0 +1,109 @@
+"""`PageIndex` answers the parsers' selectors exactly as soupsieve does."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parsers.index import PageIndex
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGES = sorted(FIXTURES.glob("*/*.html"))
+
+# Selectors the parsers use, plus ones that must fall through to soupsieve
+SELECTORS = (
+    "li", "p", "h1", "ul li", "ol li", "div.entry-content", ".entry-content p",
+    ".recipe-ingredients li", ".ingredients-section li", ".directions li", ".recipe-instructions li",
+    ".mntl-structured-ingredients__list-item", ".mntl-sc-block-group--OL li",
+    ".recipe-summary p", ".recipe-description", "p.article-subheading", ".recipe-rating .rating-value",
+    "[class*='rating'] [class*='value']", "[class*='time']", "span[class*='p-name']",
+    "h1[class*='p-name']", "img[class*='u-photo']", "span[class*='dt-duration']", "span[class*='p-yield']",
+    ".mm-recipes-details__item", "img.primary-image", ".recipe-image img",
+    # not indexable
+    ".entry-content p:first-of-type", "img[src*='recipe']", "div[data-module='RecipeSummary'] p",
+)
+
+_TAGS = ("div", "ul", "ol", "li", "p", "span", "section", "img", "h1")
+_CLASSES = (
+    "recipe-ingredients", "directions", "rating-box", "x-value", "entry-content", "recipe-summary",
+    "p-name head", "mntl-structured-ingredients__list-item", "total-time", "p-yield", "",
+)
+
+
+def _random_html(rng: random.Random, depth: int = 0) -> str:
+    if depth > 3:
+        return "text"
+    out = []
+    for _ in range(rng.randint(1, 4)):
+        tag, cls = rng.choice(_TAGS), rng.choice(_CLASSES)
+        attrs = f' class="{cls}"' if cls else ""
+        if rng.random() < 0.2:
+            attrs += f' itemprop="{rng.choice(("ratingValue", "name", "image"))}"'
+        out.append(f"<{tag}{attrs}>{_random_html(rng, depth + 1)}</{tag}>")
+    return "".join(out)
+
+
+def _assert_parity(soup: BeautifulSoup) -> None:
+    index = PageIndex(soup)
+    for selector in SELECTORS:
+        assert index.select(selector) == soup.select(selector), selector
+        assert index.select_one(selector) is soup.select_one(selector), selector
+    for prop in ("ratingValue", "name", "image"):
+        assert index.itemprop(prop) is soup.find(attrs={"itemprop": prop}), prop
+    for tag in _TAGS:
+        assert index.tags(tag) == soup.find_all(tag), tag
+
+
+def test_parity_on_random_documents():
+    rng = random.Random(31)
+    for _ in range(100):
+        _assert_parity(BeautifulSoup(_random_html(rng), "html.parser"))
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_parity_on_fixtures(page: Path):
+    soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+    _assert_parity(soup)
+    index = PageIndex(soup)
+    for attr in ("og:image", "og:description", "og:type"):
+        found = soup.find("meta", property=attr)
+        assert index.meta(property=attr) == (found.get("content") if found else None)
+    found = soup.find("meta", attrs={"name": "twitter:image"})
+    assert index.meta(name="twitter:image") == (found.get("content") if found else None)
+
+
+def _fallback_heavy_page() -> BeautifulSoup:
+    """A long page of comments around an HTML-only recipe card."""
+    comments = "".join(
+        f'<li class="comment"><div class="comment-body"><p>Comment {n}: made it twice, '
+        f'loved it.</p><span class="comment-time">{n} days ago</span></div></li>'
+        for n in range(1500)
+    )
+    card = (
+        '<div class="recipe-summary"><p>Summary</p></div>'
+        '<ul class="recipe-ingredients">' + "".join(f"<li>{n} cups flour</li>" for n in range(12)) + "</ul>"
+        '<ol class="directions">' + "".join(f"<li>Mix step {n}.</li>" for n in range(8)) + "</ol>"
+    )
+    return BeautifulSoup(f"<html><body>{card}<ol class='comments'>{comments}</ol></body></html>", "html.parser")
+
+
+def test_index_beats_repeated_selects(within_budget):
+    """Building the index once and serving every parser selector from it is
+    faster than running each selector through soupsieve."""
+    soup = _fallback_heavy_page()
+    indexable = SELECTORS[:-3]
+
+    def with_index():
+        index = PageIndex(soup)
+        for selector in indexable:
+            index.select(selector)
+
+    def with_soupsieve():
+        for selector in indexable:
+            soup.select(selector)
+
+    within_budget(with_index, 250, runs=3)
+    within_budget(with_index, within_budget.best(with_soupsieve, runs=1) / 2, runs=3)
@@ -0,0 +1,108 @@
+"""Scraper profiling: the recorded call tree, and no cost when it's off."""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from app import profiling
+
+HERE = Path(__file__).parent
+NAME = f"parsers.{Path(__file__).stem}"
+
+
+def inner():
+    time.sleep(0.01)
+
+
+def numbers():
+    for n in range(128):
+        yield n
+
+
+def outer():
+    inner()
+    inner()
+    total = sum(n * 2 for n in numbers())
+    return total
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    """Treat this file as a parser module, with clean process-wide totals."""
+    monkeypatch.setattr(profiling, "_PARSERS_DIR", str(HERE) + os.sep)
+    monkeypatch.setattr(profiling, "_names", {})
+    profiling.reset()
+    yield
+    profiling.reset()
+
+
+def _run_profiled(fn):
+    def run():
+        profiling.want_profile("1")
+        with profiling.profile("example.com"):
+            return fn()
+
+    return contextvars.copy_context().run(run)
+
+
+def test_collapsed_stacks_follow_the_call_tree(profiled):
+    assert _run_profiled(outer) == sum(range(128)) * 2
+
+    stacks = {}
+    for line in profiling.collapsed().splitlines():
+        path, _, micros = line.rpartition(" ")
+        stacks[path] = int(micros)
+    root = f"example.com;{NAME}.outer"
+    assert set(stacks) == {
+        root,
+        f"{root};{NAME}.inner",
+        f"{root};{NAME}.outer.<locals>.<genexpr>",
+        f"{root};{NAME}.outer.<locals>.<genexpr>;{NAME}.numbers",
+    }
+    # Both sleeps land on inner's stack, not on outer's self time
+    assert stacks[f"{root};{NAME}.inner"] >= 20_000
+    assert stacks[root] < stacks[f"{root};{NAME}.inner"]
+
+    calls = {fn["function"]: fn["calls"] for fn in profiling.functions()}
+    # Generators are resumed 129 times but called once
+    assert calls == {
+        f"{NAME}.outer": 1,
+        f"{NAME}.inner": 2,
+        f"{NAME}.outer.<locals>.<genexpr>": 1,
+        f"{NAME}.numbers": 1,
+    }
+    assert profiling.functions()[0]["function"] == f"{NAME}.inner"
+
+
+def test_repeated_runs_add_up(profiled):
+    _run_profiled(outer)
+    _run_profiled(outer)
+    calls = {fn["function"]: fn["calls"] for fn in profiling.functions()}
+    assert calls[f"{NAME}.inner"] == 4 and calls[f"{NAME}.numbers"] == 2
+
+
+def test_unprofiled_requests_pay_next_to_nothing(profiled, within_budget):
+    def bare():
+        for _ in range(10_000):
+            outer_fast()
+
+    def gated():
+        for _ in range(10_000):
+            with profiling.profile("example.com"):
+                outer_fast()
+
+    def outer_fast():
+        return sum(range(10))
+
+    with profiling.profile("example.com"):
+        assert sys.getprofile() is None
+    baseline = min(within_budget(bare, 1000) for _ in range(3))
+    # Under 10 µs a scrape, next to scrapes that take milliseconds
+    within_budget(gated, baseline + 100)
+    assert profiling.collapsed() == "" and profiling.functions() == []
@@ -0,0 +1,72 @@
+"""Request counts: merged across workers on save, never lost or doubled."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.warmup import RequestLog
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_save_merges_with_other_workers(tmp_path):
+    path = str(tmp_path / "requests.json")
+    a, b = RequestLog(path=path), RequestLog(path=path)
+    for _ in range(3):
+        a.record("https://a.example/1")
+    b.record("https://a.example/1")
+    b.record("https://b.example/2")
+    a.save()
+    b.save()
+    a.record("https://b.example/2")
+    a.save()
+    a.save()  # nothing new: a no-op for the file
+
+    assert json.loads(Path(path).read_text()) == {"https://a.example/1": 4, "https://b.example/2": 2}
+    # a's view now includes what b saved
+    assert a.top(2) == ["https://a.example/1", "https://b.example/2"]
+
+    fresh = RequestLog(path=path)
+    fresh.load()
+    fresh.record("https://b.example/2")
+    fresh.save()
+    assert json.loads(Path(path).read_text()) == {"https://a.example/1": 4, "https://b.example/2": 3}
+
+
+def test_a_corrupt_file_is_replaced(tmp_path):
+    path = tmp_path / "requests.json"
+    path.write_text("{not json")
+    log = RequestLog(path=str(path))
+    log.load()
+    log.record("https://a.example/1")
+    log.save()
+    assert json.loads(path.read_text()) == {"https://a.example/1": 1}
+
+
+_WORKER = r"""
+import sys
+from app.warmup import RequestLog
+
+log = RequestLog(path=sys.argv[1])
+for i in range(200):
+    log.record(f"https://example.com/{i % 7}")
+    if i % 10 == 0:
+        log.save()
+log.save()
+"""
+
+
+def test_concurrent_worker_processes_lose_no_counts(tmp_path):
+    path = str(tmp_path / "requests.json")
+    workers = [
+        subprocess.Popen([sys.executable, "-c", _WORKER, path], cwd=ROOT) for _ in range(4)
+    ]
+    for w in workers:
+        assert w.wait(timeout=60) == 0
+    counts = json.loads(Path(path).read_text())
+    assert sum(counts.values()) == 4 * 200
+    assert len(counts) == 7
+    assert not list(tmp_path.glob("*.tmp"))
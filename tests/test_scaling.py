@@ -0,0 +1,60 @@
+"""Servings scaling of cached recipes: results and throughput."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.cache import RecipeCache
+from app.main import RecipeRequest, _finish
+from app.models import Recipe
+from app.scaling import scale_recipe, servings_count
+
+LINES = [
+    "2 1/4 cups all-purpose flour", "1 tsp baking soda", "1 (14 oz) can tomatoes", "3-4 cloves garlic, minced",
+    "½ cup milk", "1 1/2 lb beef", "2 eggs", "Salt to taste", "200 g butter", "1/3 cup sugar",
+    "2 tbsp oil", "1 onion, diced", "3 carrots", "1 cup stock", "4 oz cheese",
+]
+
+
+def _recipe(servings: str | None = "4 servings") -> Recipe:
+    return Recipe(title="Stew", ingredients=list(LINES), instructions=["Cook."], servings=servings)
+
+
+@pytest.mark.parametrize("servings, expected", [
+    ("4 servings", 4), ("Serves 6", 6), ("8", 8), ("6-8", 6), ("servings not specified", None), (None, None),
+])
+def test_servings_count(servings, expected):
+    assert servings_count(servings) == expected
+
+
+def test_scale_recipe():
+    scaled = scale_recipe(_recipe(), 6)
+    assert scaled.servings == "6 servings"
+    assert scaled.ingredients == [
+        "3 3/8 cups all-purpose flour", "1 1/2 tsp baking soda", "1 1/2 (14 oz) can tomatoes",
+        "4 1/2-6 cloves garlic, minced", "3/4 cup milk", "2 1/4 lb beef", "3 eggs", "Salt to taste",
+        "300 g butter", "1/2 cup sugar", "3 tbsp oil", "1 1/2 onion, diced", "4 1/2 carrots",
+        "1 1/2 cup stock", "6 oz cheese",
+    ]
+    structured = scale_recipe(_recipe(), 2, structured=True)
+    assert len(structured.ingredients_parsed) == len(LINES)
+
+
+def test_scaling_needs_a_yield():
+    with pytest.raises(ValueError):
+        scale_recipe(_recipe(servings=None), 2)
+
+
+def test_scaled_cache_hits_per_second(within_budget):
+    """A cache hit scaled to new servings is cheap enough to serve thousands
+    of times a second per worker: 1,000 of them within 200 ms."""
+    cache = RecipeCache()
+    cache.set("https://example.com/stew/", _recipe())
+    request = RecipeRequest(url="https://example.com/stew/", servings=8)
+
+    def hits():
+        for _ in range(1000):
+            recipe, _ = cache.lookup("https://example.com/stew/")
+            _finish(recipe, request)
+
+    within_budget(hits, 200, runs=3)
@@ -0,0 +1,167 @@
+"""Shared state across worker processes: one SQLite file, several processes.
+
+Each test starts its workers together and checks that what they did
+through the `SqliteBackend` adds up -- no lost updates, one breaker probe,
+no two fetches in the same rate-limit slot, and cache entries (positive and
+negative) one worker writes are read by the others until they expire.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import orjson
+
+from app.fetcher import CircuitBreaker
+from app.ratelimit import DomainRateLimiter
+from app.state import SqliteBackend
+
+ROOT = Path(__file__).parent.parent
+WORKERS = 4
+
+_PRELUDE = """
+import sys, time, orjson
+from app.fetcher import CircuitBreaker
+from app.ratelimit import DomainRateLimiter
+from app.state import SqliteBackend
+backend = SqliteBackend(sys.argv[1])
+time.sleep(max(0.0, float(sys.argv[2]) - time.time()))
+"""
+
+
+def _run_workers(path: Path, body: str, workers: int = WORKERS) -> list:
+    """Run *body* in *workers* processes at once; each prints one JSON value."""
+    code = _PRELUDE + textwrap.dedent(body)
+    start_at = str(time.time() + 1.0)  # past every worker's startup
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code, str(path), start_at], cwd=ROOT, stdout=subprocess.PIPE)
+        for _ in range(workers)
+    ]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate(timeout=60)
+        assert proc.returncode == 0
+        results.append(orjson.loads(out))
+    return results
+
+
+def test_failure_counts_are_atomic(tmp_path):
+    path = tmp_path / "state.db"
+    _run_workers(path, """
+        breaker = CircuitBreaker("breaker:x|a", threshold=10**9, reset_seconds=60, backend=backend)
+        for _ in range(50):
+            breaker.record_failure("status 503")
+        print("null")
+    """)
+    breaker = CircuitBreaker("breaker:x|a", threshold=10**9, reset_seconds=60, backend=SqliteBackend(str(path)))
+    assert breaker.snapshot()["failures"] == WORKERS * 50
+
+
+def test_one_probe_per_reset_period(tmp_path):
+    path = tmp_path / "state.db"
+    backend = SqliteBackend(str(path))
+    opened = {"state": "open", "failures": 3, "opened_at": time.time() - 120, "last_error": "status 503"}
+    backend.set("breaker:x|a", orjson.dumps(opened))
+
+    allowed = _run_workers(path, """
+        breaker = CircuitBreaker("breaker:x|a", threshold=3, reset_seconds=60, backend=backend)
+        print(orjson.dumps([breaker.allow() for _ in range(5)]).decode())
+    """)
+    assert sum(sum(calls) for calls in allowed) == 1
+    assert orjson.loads(backend.get("breaker:x|a"))["state"] == "half_open"
+
+
+def test_abandoned_probe_is_taken_over(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "state.db"))
+    breaker = CircuitBreaker("breaker:x|a", threshold=1, reset_seconds=0.3, backend=backend)
+    breaker.record_failure("status 503")
+    time.sleep(0.35)
+    assert breaker.allow()  # the probe; its worker never reports back
+    assert not breaker.allow()
+    time.sleep(0.35)
+    assert breaker.allow()  # taken over
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_rate_limit_slots_are_shared(tmp_path):
+    path = tmp_path / "state.db"
+    interval = 10.0
+    slots = _run_workers(path, f"""
+        limiter = DomainRateLimiter(min_interval={interval}, backend=backend)
+        print(orjson.dumps([time.time() + limiter.reserve("example.com") for _ in range(5)]).decode())
+    """)
+    slots = sorted(slot for worker in slots for slot in worker)
+    assert len(slots) == WORKERS * 5
+    gaps = [b - a for a, b in zip(slots, slots[1:])]
+    # Every reservation got its own slot, min_interval after the previous one
+    assert min(gaps) > interval - 0.5
+    assert slots[-1] - slots[0] < interval * len(slots)
+
+    limiter = DomainRateLimiter(min_interval=interval, backend=SqliteBackend(str(path)))
+    assert limiter.reserve("example.com") > slots[-1] - time.time() + interval - 0.5
+
+
+def test_recipe_cache_write_is_read_by_other_workers(tmp_path):
+    path = tmp_path / "state.db"
+    url = "https://www.recipetineats.com/pie/"
+    _run_workers(path, f"""
+        from app.cache import RecipeCache
+        from app.models import Recipe
+        cache = RecipeCache(shared=backend)
+        cache.set("{url}", Recipe(title="Pie", ingredients=["1 apple"]), fingerprint="fp1")
+        print("null")
+    """, workers=1)
+
+    seen = _run_workers(path, f"""
+        from app.cache import RecipeCache
+        cache = RecipeCache(shared=backend)
+        recipe, stale = cache.lookup("{url}")
+        print(orjson.dumps([recipe.title, recipe.ingredients, stale, cache.is_fresh("{url}"),
+                            cache.match_fingerprint("{url}", "fp1") is not None]).decode())
+    """)
+    assert seen == [["Pie", ["1 apple"], False, True, True]] * WORKERS
+
+
+def test_newer_shared_entry_replaces_a_local_stale_one(tmp_path):
+    from app.cache import RecipeCache
+    from app.models import Recipe
+
+    path = tmp_path / "state.db"
+    url = "https://www.recipetineats.com/pie/"
+    local = RecipeCache(ttl=0.5, stale=60, shared=SqliteBackend(str(path)))
+    local.set(url, Recipe(title="Old pie"))
+    time.sleep(0.6)
+    assert local.lookup(url) == (Recipe(title="Old pie"), True)
+
+    _run_workers(path, f"""
+        from app.cache import RecipeCache
+        from app.models import Recipe
+        RecipeCache(ttl=0.5, stale=60, shared=backend).set("{url}", Recipe(title="New pie"))
+        print("null")
+    """, workers=1)
+    assert local.lookup(url) == (Recipe(title="New pie"), False)
+
+
+def test_negative_cache_is_shared_and_expires(tmp_path):
+    path = tmp_path / "state.db"
+    url = "https://www.recipetineats.com/gone/"
+    _run_workers(path, f"""
+        from app.cache import NegativeCache
+        NegativeCache(backend, ttl=2).set("{url}", 404, "Recipe page not found (status 404)")
+        print("null")
+    """, workers=1)
+    written = time.time()
+
+    read = """
+        from app.cache import NegativeCache
+        print(orjson.dumps(NegativeCache(backend, ttl=2).get("%s")).decode())
+    """ % url
+    assert _run_workers(path, read) == [[404, "Recipe page not found (status 404)"]] * WORKERS
+    time.sleep(max(0.0, written + 2.2 - time.time()))
+    assert _run_workers(path, read) == [None] * WORKERS
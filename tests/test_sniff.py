@@ -0,0 +1,47 @@
+"""Page classification of challenge, block, consent and other interstitials.
+
+``pages/<kind>/*.html`` are captured (trimmed) responses; each must be
+classified as the directory it sits in.  Only blocks count against a fetch
+strategy's circuit breaker.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.fetcher import CircuitBreaker, Page, _accept
+from app.sniff import CHALLENGE, CONSENT, UNKNOWN, classify_page
+from app.state import MemoryBackend
+
+PAGES = Path(__file__).parent / "pages"
+CASES = sorted(p.relative_to(PAGES).as_posix() for p in PAGES.glob("*/*.html"))
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_classify_page(case: str):
+    expected = case.split("/")[0]
+    assert classify_page((PAGES / case).read_bytes()) == expected
+
+
+def test_sniff_limit():
+    body = (PAGES / "challenge/cloudflare_just_a_moment.html").read_bytes()
+    # A challenge marker past the sniffed prefix isn't seen
+    assert classify_page(b" " * 100 + body, limit=100) == UNKNOWN
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker("breaker:test|impersonate", threshold=2, reset_seconds=60, backend=MemoryBackend())
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_only_blocks_trip_the_breaker(case: str):
+    breaker = _breaker()
+    page = Page("https://example.com/", 200, (PAGES / case).read_bytes())
+    for _ in range(3):
+        accepted = _accept(breaker, page)
+    blocked = page.kind in (CHALLENGE, CONSENT)
+    assert accepted is not blocked
+    assert breaker.allow() is not blocked
+    assert breaker.snapshot()["failures"] == (3 if blocked else 0)
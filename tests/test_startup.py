@@ -0,0 +1,56 @@
+"""Cold-start cost of ``import app.main``, measured in a fresh interpreter.
+
+Parser modules, BeautifulSoup and the HTTP clients must load on first use,
+not at import; and the app's own modules (their self time under
+``python -X importtime``, so FastAPI and pydantic don't count) must import
+within IMPORT_BUDGET_MS, checked through the shared ``within_budget`` fixture
+so GOLDEN_BUDGET_SCALE loosens it as for the scraper timings.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import orjson
+
+ROOT = Path(__file__).parent.parent
+IMPORT_BUDGET_MS = 150
+# Best of this many cold imports is held to the budget
+TIMING_RUNS = 3
+
+_LAZY = ("bs4", "soupsieve", "curl_cffi", "requests", "httpx")
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True, timeout=60,
+    )
+
+
+def test_import_leaves_heavy_modules_unloaded():
+    out = _python("-c", "import sys, json, app.main; print(json.dumps(sorted(sys.modules)))").stdout
+    modules = orjson.loads(out.splitlines()[-1])
+    eager = [
+        name for name in modules
+        if name.split(".")[0] in _LAZY or (name.startswith("app.parsers.") and name != "app.parsers")
+    ]
+    assert not eager, f"Imported by app.main: {', '.join(eager)}"
+
+
+def _app_import_ms() -> float:
+    """Total self time of the app's own modules, from one cold import."""
+    stderr = _python("-X", "importtime", "-c", "import app.main").stderr
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit() and (name == "app" or name.startswith("app.")):
+            total_us += int(self_us)
+    return total_us / 1000
+
+
+def test_import_time_budget(within_budget):
+    within_budget.check(min(_app_import_ms() for _ in range(TIMING_RUNS)), IMPORT_BUDGET_MS)
@@ -0,0 +1,102 @@
+"""URL canonicalisation and the per-site "can this be a recipe?" rules."""
+
+from __future__ import annotations
+
+from urllib.parse import urlsplit
+
+import pytest
+
+from app.parsers import SITES, find_site
+from app.urls import canonicalize, non_recipe_reason
+
+
+@pytest.mark.parametrize("raw, expected", [
+    # Tracking parameters go, whatever their case; the order of the rest stays
+    ("https://www.recipetineats.com/pie/?utm_source=fb&utm_medium=social&utm_campaign=x",
+     "https://www.recipetineats.com/pie/"),
+    ("https://www.recipetineats.com/pie/?fbclid=IwAR0abc", "https://www.recipetineats.com/pie/"),
+    ("https://www.recipetineats.com/pie/?gclid=Cj0KC&UTM_Term=pie", "https://www.recipetineats.com/pie/"),
+    ("https://www.food.com/recipe/pie-123?b=2&utm_source=x&a=1", "https://www.food.com/recipe/pie-123?b=2&a=1"),
+    ("https://www.recipetineats.com/pie/?mc_cid=1&_ga=2&msclkid=3&igshid=4", "https://www.recipetineats.com/pie/"),
+    # Default ports and fragments
+    ("https://www.recipetineats.com:443/pie/", "https://www.recipetineats.com/pie/"),
+    ("http://www.recipetineats.com:80/pie/", "http://www.recipetineats.com/pie/"),
+    ("https://www.recipetineats.com:8443/pie/", "https://www.recipetineats.com:8443/pie/"),
+    ("https://www.recipetineats.com/pie/#wprm-recipe-container-123", "https://www.recipetineats.com/pie/"),
+    ("https://www.recipetineats.com/pie/?print=1#comments", "https://www.recipetineats.com/pie/?print=1"),
+    # Scheme and host case, missing schemes, trailing dots
+    ("HTTPS://WWW.RecipeTinEats.COM/pie/", "https://www.recipetineats.com/pie/"),
+    ("www.recipetineats.com/pie/", "https://www.recipetineats.com/pie/"),
+    ("//www.recipetineats.com/pie/", "https://www.recipetineats.com/pie/"),
+    ("  https://www.recipetineats.com./pie/  ", "https://www.recipetineats.com/pie/"),
+    # An empty path becomes "/"; a path's own case and trailing slash are the
+    # site's business (WordPress and food.com disagree on the slash)
+    ("https://www.recipetineats.com", "https://www.recipetineats.com/"),
+    ("https://www.recipetineats.com?p=12", "https://www.recipetineats.com/?p=12"),
+    ("https://www.food.com/recipe/Pie-123", "https://www.food.com/recipe/Pie-123"),
+    ("https://www.recipetineats.com/pie", "https://www.recipetineats.com/pie"),
+    # Parameters that pick the content are kept untouched, blank ones too
+    ("https://www.recipetineats.com/?p=12345", "https://www.recipetineats.com/?p=12345"),
+    ("https://www.food52.com/recipes/123-pie?servings=8&page=2", "https://www.food52.com/recipes/123-pie?servings=8&page=2"),
+    ("https://www.allrecipes.com/recipe/1/pie/?internalSource=hub&flag=", "https://www.allrecipes.com/recipe/1/pie/?internalSource=hub&flag="),
+    ("https://www.recipetineats.com/pie/?q=a%20b&utm_source=x", "https://www.recipetineats.com/pie/?q=a+b"),
+])
+def test_canonicalize(raw, expected):
+    assert canonicalize(raw) == expected
+
+
+def test_canonicalize_is_idempotent():
+    url = canonicalize("HTTP://Food.com:80/recipe/pie-1?utm_source=x&b=2#top")
+    assert canonicalize(url) == url
+
+
+@pytest.mark.parametrize("raw", ["", "   ", "https://", "https:///pie/", "http://:80/"])
+def test_canonicalize_rejects_urls_without_a_host(raw):
+    with pytest.raises(ValueError):
+        canonicalize(raw)
+
+
+# (url, reason or None) for every site: a recipe it serves, and pages it doesn't
+RULES = [
+    ("https://foodnetwork.co.uk/recipes/beef-wellington", None),
+    ("https://foodnetwork.co.uk/recipes/beef-wellington/", None),
+    ("https://foodnetwork.co.uk/recipes/", "not a recipe URL for foodnetwork.co.uk"),
+    ("https://foodnetwork.co.uk/shows/some-show/beef", "not a recipe URL for foodnetwork.co.uk"),
+    ("https://www.food.com/recipe/grandmas-apple-crisp-12345", None),
+    ("https://www.food.com/recipe/grandmas-apple-crisp", "not a recipe URL for food.com"),
+    ("https://www.food.com/ideas/apple-recipes-6123", "not a recipe URL for food.com"),
+    ("https://www.thetableofspice.com/chicken-biryani/", None),
+    ("https://www.thetableofspice.com/category/curries/", "listing or archive page"),
+    ("https://www.allrecipes.com/recipe/24074/alysias-basic-meat-lasagna/", None),
+    ("https://www.allrecipes.com/easy-meatloaf-recipe-8665939", None),
+    ("https://www.allrecipes.com/gallery/best-lasagna/", "not a recipe URL for allrecipes.com"),
+    ("https://www.allrecipes.com/recipes/17561/lunch/", "not a recipe URL for allrecipes.com"),
+    ("https://www.recipetineats.com/chicken-chasseur/", None),
+    ("https://www.recipetineats.com/tag/chicken/", "listing or archive page"),
+    ("https://www.recipetineats.com/page/3/", "listing or archive page"),
+    ("https://www.gimmesomeoven.com/best-caesar-salad/", None),
+    ("https://www.gimmesomeoven.com/author/ali/", "listing or archive page"),
+    ("https://www.saltandlavender.com/creamy-tuscan-chicken/", None),
+    ("https://www.saltandlavender.com/?s=chicken", "search results"),
+    ("https://natashaskitchen.com/classic-beef-stroganoff/", None),
+    ("https://natashaskitchen.com/", "home page"),
+    ("https://www.thechunkychef.com/slow-cooker-beef-ragu/", None),
+    ("https://www.thechunkychef.com/feed/", "listing or archive page"),
+    ("https://food52.com/recipes/12345-carnitas-tacos", None),
+    ("https://food52.com/collections/taco-night", "not a recipe URL for food52.com"),
+    ("https://food52.com/search?q=tacos", "search results"),
+]
+
+
+@pytest.mark.parametrize("url, reason", RULES)
+def test_non_recipe_reason(url, reason):
+    site = find_site(urlsplit(url).hostname)
+    assert site is not None
+    assert non_recipe_reason(canonicalize(url), site) == reason
+
+
+def test_every_site_has_rules_both_ways():
+    accepted = {find_site(urlsplit(u).hostname).module for u, reason in RULES if reason is None}
+    rejected = {find_site(urlsplit(u).hostname).module for u, reason in RULES if reason is not None}
+    modules = {spec.module for spec in SITES}
+    assert accepted == modules and rejected == modules